@@ -0,0 +1,221 @@
+"""
+Benchmarks of the netcalc hot paths, with the stdlib ipaddress module as
+reference, and of the time it takes to import the package.
+
+    python benchmarks/bench.py                          # print the results
+    python benchmarks/bench.py --json results.json      # also save them
+    python benchmarks/bench.py --baseline results.json  # fail on regressions
+
+With --baseline, the exit status is 1 when the throughput of any
+benchmark drops more than --threshold (default 10%) below the baseline.
+"""
+
+import argparse
+import ipaddress
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from netcalc import calc, subnet, Ip
+from netcalc.util import convert
+
+def workloads(size: int, seed: int) -> dict:
+    """
+    Random but reproducible inputs. Masks follow what is usually found in
+    routing tables rather than a uniform distribution.
+    """
+    rnd = random.Random(seed)
+    ipv4 = [str(ipaddress.IPv4Address(rnd.getrandbits(32))) for i in range(size)]
+    ipv6 = [str(ipaddress.IPv6Address(rnd.getrandbits(128))) for i in range(size)]
+
+    return {
+        'ipv4': ipv4,
+        'ipv6': ipv6,
+        'ipv4_prefixes': [(IP, rnd.choice([8, 16, 20, 22, 24, 24, 24, 28, 30, 32])) for IP in ipv4],
+        'ipv6_prefixes': [(IP, rnd.choice([32, 48, 56, 64, 64, 64, 127, 128])) for IP in ipv6],
+        'ipv4_subnets': [subnet.Ipv4(IP, mask) for IP, mask in zip(ipv4, [24] * size)],
+        'ipv6_subnets': [subnet.Ipv6(IP, mask) for IP, mask in zip(ipv6, [64] * size)],
+        'octets': [rnd.randrange(0, 256) for i in range(size)],
+        'hextets': [format(rnd.randrange(0, 65536), 'x') for i in range(size)],
+        'binary_octets': [format(rnd.randrange(0, 256), '08b') for i in range(size)],
+    }
+
+def stdlib_calc(IP: str, mask: int) -> dict:
+    interface = ipaddress.ip_interface('{}/{}'.format(IP, mask))
+    network = interface.network
+
+    return {'net_address': str(network.network_address), 'broadcast': str(network.broadcast_address),
+            'subnet_mask': str(network.netmask), 'wildcard_mask': str(network.hostmask)}
+
+# (name, workload, function). Functions taking a tuple are called with it unpacked.
+BENCHMARKS = [
+    ('calc.calc/ipv4', 'ipv4_prefixes', calc.calc),
+    ('calc.calc/ipv6', 'ipv6_prefixes', calc.calc),
+    ('calc.net_address/ipv4', 'ipv4_prefixes', calc.net_address),
+    ('calc.net_address/ipv6', 'ipv6_prefixes', calc.net_address),
+    ('calc.broadcast/ipv4', 'ipv4_prefixes', calc.broadcast),
+    ('calc.ip_range/ipv4', 'ipv4_prefixes', calc.ip_range),
+    ('calc.ip_usable_range/ipv4', 'ipv4_prefixes', calc.ip_usable_range),
+    ('calc.ip_usable_range/ipv6', 'ipv6_prefixes', calc.ip_usable_range),
+    ('calc.subnet_mask/ipv4', 'ipv4_prefixes', lambda IP, mask: calc.subnet_mask(mask, Ip.Ipv4)),
+    ('calc.wildcard_mask/ipv6', 'ipv6_prefixes', lambda IP, mask: calc.wildcard_mask(mask, Ip.Ipv6)),
+    ('calc.ip_class/ipv4', 'ipv4_prefixes', lambda IP, mask: calc.ip_class(mask)),
+    ('Ip.Ip/ipv4', 'ipv4', Ip.Ip),
+    ('Ip.Ip/ipv6', 'ipv6', Ip.Ip),
+    ('Ip.Ipv4.bin', 'ipv4', lambda IP: Ip.Ipv4(IP).bin()),
+    ('Ip.Ipv6.bin', 'ipv6', lambda IP: Ip.Ipv6(IP).bin()),
+    ('subnet.Ipv4', 'ipv4_prefixes', subnet.Ipv4),
+    ('subnet.Ipv6', 'ipv6_prefixes', subnet.Ipv6),
+    ('subnet.Ipv4.calc', 'ipv4_subnets', lambda sub: sub.calc()),
+    ('subnet.Ipv6.calc', 'ipv6_subnets', lambda sub: sub.calc()),
+    ('subnet.Ipv4.net_address', 'ipv4_subnets', lambda sub: sub.net_address()),
+    ('convert.db', 'octets', lambda octet: convert.db(octet, 8)),
+    ('convert.bd', 'binary_octets', convert.bd),
+    ('convert.dh', 'octets', convert.dh),
+    ('convert.hd', 'hextets', convert.hd),
+    ('convert.hb', 'hextets', lambda hextet: convert.hb(hextet, 16)),
+    ('ipaddress.calc/ipv4', 'ipv4_prefixes', stdlib_calc),
+    ('ipaddress.calc/ipv6', 'ipv6_prefixes', stdlib_calc),
+    ('ipaddress.ip_address/ipv4', 'ipv4', ipaddress.ip_address),
+    ('ipaddress.ip_address/ipv6', 'ipv6', ipaddress.ip_address),
+    ('ipaddress.ip_network/ipv4', 'ipv4_prefixes', lambda IP, mask: ipaddress.ip_network((IP, mask), strict=False)),
+]
+
+# Modules whose import time is measured, each in a new interpreter
+IMPORTS = ['netcalc', 'netcalc.calc', 'netcalc.subnet', 'netcalc.cli']
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def measure_import(module: str, repeat: int, cache: str) -> float:
+    """
+    Best time, in seconds, of 'repeat' imports of the module in a new
+    interpreter. Bytecode is cached in 'cache' by a first, unmeasured,
+    import, so the compilation of the sources is not measured.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONPYCACHEPREFIX=cache)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    code = 'import time; start = time.perf_counter(); import {}; print(time.perf_counter() - start)'.format(module)
+    best = None
+
+    for i in range(repeat + 1):
+        output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+        if i:
+            elapsed = float(output.stdout)
+            best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+def measure(function, items: list, repeat: int) -> float:
+    """
+    Best time, in seconds, of 'repeat' runs of the function over all the items.
+    """
+    unpack = isinstance(items[0], tuple)
+    best = None
+
+    for i in range(repeat):
+        start = time.perf_counter()
+
+        if unpack:
+            for item in items:
+                function(*item)
+        else:
+            for item in items:
+                function(item)
+
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+def run(size: int, repeat: int, seed: int, selected: [str] = None) -> dict:
+    data = workloads(size, seed)
+    results = {}
+
+    for name, workload, function in BENCHMARKS:
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+
+        elapsed = measure(function, data[workload], repeat)
+        results[name] = {'ops_per_sec': size / elapsed, 'ns_per_op': elapsed / size * 1e9}
+
+    with tempfile.TemporaryDirectory() as cache:
+        for module in IMPORTS:
+            name = 'import/' + module
+            if selected and not any(name.startswith(prefix) for prefix in selected):
+                continue
+
+            elapsed = measure_import(module, repeat, cache)
+            results[name] = {'ops_per_sec': 1 / elapsed, 'ns_per_op': elapsed * 1e9}
+
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> [str]:
+    """
+    Names of the benchmarks whose throughput dropped more than 'threshold' below the baseline.
+    """
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        if result['ops_per_sec'] < baseline[name]['ops_per_sec'] * (1 - threshold):
+            regressions.append(name)
+
+    return regressions
+
+def report(results: dict, baseline: dict = None, out = sys.stdout):
+    out.write('{:<32} {:>14} {:>12} {:>10}\n'.format('benchmark', 'ops/s', 'ns/op', 'vs base'))
+
+    for name, result in results.items():
+        change = ''
+        if baseline and name in baseline:
+            change = '{:+.1%}'.format(result['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1)
+
+        out.write('{:<32} {:>14,.0f} {:>12,.0f} {:>10}\n'.format(name, result['ops_per_sec'], result['ns_per_op'], change))
+
+def main(argv: [str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks of the netcalc hot paths.')
+    parser.add_argument('-n', '--size', type=int, default=2000, help='items per workload (default: 2000)')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='runs per benchmark, the best one is kept (default: 5)')
+    parser.add_argument('-s', '--seed', type=int, default=1, help='seed of the workloads (default: 1)')
+    parser.add_argument('-k', '--select', action='append', help='only run benchmarks starting with this name')
+    parser.add_argument('--json', help='file to write the results to, as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed throughput drop against the baseline (default: 0.10)')
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.repeat, args.seed, args.select)
+    baseline = None
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    report(results, baseline)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                       'size': args.size, 'seed': args.seed, 'results': results}, f, indent=2)
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for name in regressions:
+            sys.stderr.write('regression: {} is more than {:.0%} slower than the baseline\n'.format(name, args.threshold))
+
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,74 @@
-from util import convert
-from const import *
+import weakref
+
+from .const import *
+
+HEX_DIGITS = '0123456789abcdefABCDEF'
+
+def _parse_ipv4(IP: str) -> int:
+    """
+    Integer value of an IPv4 address in decimal form, or None if it is not valid.
+    """
+    parts = IP.split('.')
+    if len(parts) != IPV4_OCT_COUNT:
+        return None
+
+    value = 0
+    for part in parts:
+        if not (0 < len(part) <= 3 and part.isdigit() and part.isascii()):
+            return None
+
+        octet = int(part)
+        if octet > MAX_IPV4_OCTET:
+            return None
+
+        value = (value << IPV4_BIT_COUNT) | octet
+
+    return value
+
+def _parse_ipv6(IP: str) -> int:
+    """
+    Integer value of an IPv6 address, or None if it is not valid. Supports
+    '::' compression and an embedded IPv4 address in the last 32 bits.
+    """
+    head, compressed, tail = IP.partition('::')
+    if compressed and ('::' in tail or tail.startswith(':') or head.endswith(':')):
+        return None
+
+    head = head.split(':') if head else []
+    tail = tail.split(':') if tail else []
+    if not compressed and not head:
+        return None
+
+    last = tail if compressed else head
+    ipv4 = None
+    if last and '.' in last[-1]:
+        ipv4 = _parse_ipv4(last.pop())
+        if ipv4 is None:
+            return None
+
+    count = len(head) + len(tail) + (2 if ipv4 is not None else 0)
+    if (compressed and count >= IPV6_OCT_COUNT) or (not compressed and count != IPV6_OCT_COUNT):
+        return None
+
+    value = 0
+    for part in head:
+        if not (0 < len(part) <= 4) or part.strip(HEX_DIGITS):
+            return None
+
+        value = (value << IPV6_BIT_COUNT) | int(part, 16)
+
+    value <<= IPV6_BIT_COUNT * (IPV6_OCT_COUNT - len(head))
+    tail_value = 0
+    for part in tail:
+        if not (0 < len(part) <= 4) or part.strip(HEX_DIGITS):
+            return None
+
+        tail_value = (tail_value << IPV6_BIT_COUNT) | int(part, 16)
+
+    if ipv4 is not None:
+        tail_value = (tail_value << 32) | ipv4
+
+    return value | tail_value
 
 class Ipv4Exception(Exception):
     def __init__(self, IP, message=None):
@@ -19,23 +88,145 @@ class Ipv6Exception(Exception):
 
         super().__init__(self.message)
 
-class Ipv4:
+class _Address:
+    """
+    Comparisons shared by Ipv4 and Ipv6 (and their subnets). Addresses
+    are equal when they have the same type and value, and are ordered
+    by type (IPv4 first) and value. Subnets also compare the mask, and
+    a plain address is taken as a host prefix (/32 or /128).
+    """
+
+    __slots__ = ()
+
+    def _key(self) -> (int, int, int):
+        value = self._value
+        if value is None:
+            value = -1 if self.empty() else self.value
+
+        return (self.tbits, value, self.tbits)
+
+    def __hash__(self):
+        # The value alone, like the hash of an int. Subnets mix in the mask
+        value = self._value
+        if value is None:
+            try:
+                value = -1 if self.empty() else self.value
+            except (Ipv4Exception, Ipv6Exception, ValueError):
+                # Not valid: only equal to itself (see __eq__)
+                return hash(self._IP)
+
+        return value
+
+    def __eq__(self, IP):
+        if self is IP:
+            return True
+
+        if not isinstance(IP, _Address):
+            return NotImplemented
+
+        # Addresses that are not valid are not equal to any other, so == never raises
+        try:
+            return self._key() == IP._key()
+        except (Ipv4Exception, Ipv6Exception, ValueError):
+            return False
+
+    def __ne__(self, IP):
+        result = self.__eq__(IP)
+
+        return result if result is NotImplemented else not result
+
+    def __lt__(self, IP):
+        if not isinstance(IP, _Address):
+            return NotImplemented
+
+        # When both values are known and differ, the mask does not matter and no key is built
+        if self.tbits == IP.tbits and self._value != IP._value and None not in (self._value, IP._value):
+            return self._value < IP._value
+
+        return self._key() < IP._key()
+
+    def __le__(self, IP):
+        if not isinstance(IP, _Address):
+            return NotImplemented
+
+        if self.tbits == IP.tbits and self._value != IP._value and None not in (self._value, IP._value):
+            return self._value <= IP._value
+
+        return self._key() <= IP._key()
+
+    def __gt__(self, IP):
+        if not isinstance(IP, _Address):
+            return NotImplemented
+
+        if self.tbits == IP.tbits and self._value != IP._value and None not in (self._value, IP._value):
+            return self._value > IP._value
+
+        return self._key() > IP._key()
+
+    def __ge__(self, IP):
+        if not isinstance(IP, _Address):
+            return NotImplemented
+
+        if self.tbits == IP.tbits and self._value != IP._value and None not in (self._value, IP._value):
+            return self._value >= IP._value
+
+        return self._key() >= IP._key()
+
+    def __add__(self, offset: int):
+        """
+        The address 'offset' addresses after this one (before it, if
+        negative). Ex: Ipv4('10.0.4.255') + 1 == Ipv4('10.0.5.0')
+        """
+        if not isinstance(offset, int) or isinstance(offset, bool):
+            return NotImplemented
+
+        IP_class = Ipv4 if self.tbits == Ipv4.tbits else Ipv6
+        return IP_class.from_int(self.value + offset)
+
+    __radd__ = __add__
+
+    def __sub__(self, IP):
+        """
+        The address 'IP' addresses before this one when IP is an integer,
+        or the number of addresses between both when it is an address of
+        the same type. Ex: Ipv4('10.0.5.0') - Ipv4('10.0.4.0') == 256
+        """
+        if isinstance(IP, _Address) and not hasattr(IP, 'mask'):
+            if IP.tbits != self.tbits:
+                raise TypeError("Can not subtract an {} address from an {} address".format(IP.type, self.type))
+
+            return self.value - IP.value
+
+        if not isinstance(IP, int) or isinstance(IP, bool):
+            return NotImplemented
+
+        return self + (-IP)
+
+class Ipv4(_Address):
     """
     Representation of an IPv4 address
 
+    The address is kept as a 32 bit integer. The string form is only
+    built when it is needed, so addresses produced by the calc functions
+    never go through a string.
+
     :param IP: IPv4 address in decimal form. Example: '10.0.4.1'.
     :param check: Does the address passed to IP need to be checked when the class is built?
     """
 
+    __slots__ = ('_IP', '_value', '__weakref__')
+
     sep = '.'
     type = 'ipv4'
     bits = IPV4_BIT_COUNT
     octs = IPV4_OCT_COUNT
+    tbits = IPV4_OCT_COUNT * IPV4_BIT_COUNT
     thosts = 2 ** (IPV4_OCT_COUNT * IPV4_BIT_COUNT)
     EMPTY = EMPTY_IP
 
     def __init__(self, IP = None, check = False, empty = False):
         self._IP = IP
+        self._value = None
 
         if check:
             self._IP = self.ip_check()
@@ -43,6 +234,27 @@ class Ipv4:
         if empty:
             self._IP = self.EMPTY
 
+    @classmethod
+    def from_int(cls, value: int, IP: str = None):
+        """
+        Builds the address directly from its integer value, without parsing any string.
+
+        :param value: Integer value of the address, between 0 and thosts - 1.
+        :param IP: String form of the address, if it is already known.
+        """
+        if (value < 0) or (value >= cls.thosts):
+            raise Ipv4Exception(value)
+
+        address = object.__new__(cls)
+        address._IP = IP
+        address._value = value
+
+        return address
+
+    @staticmethod
+    def to_str(value: int) -> str:
+        return '{}.{}.{}.{}'.format(value >> 24, (value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff)
+
     def __len__(self):
         IP_split = self.IP.split(self.sep)
 
@@ -51,23 +263,8 @@ class Ipv4:
 
         return len(IP_split)
 
-    def __eq__(self, IP):
-        try:
-            if self.type == IP.type:
-                return True
-
-            return False
-        except Exception:
-            return False
-
-    def __get_IP(self, ip: str = None) -> str:
-        if ip:
-            return ip
-
-        if self._IP:
-            return self._IP
-
-        raise ValueError('The value for IP could not be None!')
+    def __int__(self):
+        return self.value
 
     def __get_IP(self) -> str:
         if self.IP:
@@ -77,92 +274,126 @@ class Ipv4:
 
     @property
     def IP(self) -> str:
+        if self._IP is None and self._value is not None:
+            self._IP = self.to_str(self._value)
+
         return self._IP
 
     @IP.setter
     def IP(self, new_ip: str):
-        self._IP = new_ip
+        # Addresses are hashed and interned by value, so they can not change once built
+        raise AttributeError("The address of an {} can not be changed, build a new one".format(type(self).__name__))
+
+    @property
+    def value(self) -> int:
+        """
+        Integer value of the address. It is calculated (and the address
+        checked) the first time it is requested.
+        """
+        if self._value is None:
+            self.ip_check()
+
+        return self._value
+
+    def octets(self) -> [int]:
+        value = self.value
+
+        return [(value >> shift) & MAX_IPV4_OCTET for shift in range((self.octs - 1) * self.bits, -1, -self.bits)]
 
     def ip_check(self) -> str:
         """
         Checks if the passed Ipv4 address is valid
         """
-        IP = self.IP
+        IP = self.__get_IP()
+        if self._value is not None:
+            return IP
 
-        if (IP.count('.') != 3) or ('' in IP.split(self.sep)):
-            raise Ipv4Exception(IP)
+        value = _parse_ipv4(IP) if isinstance(IP, str) else None
 
-        IP_splited = IP.split(self.sep)
-        for octet in IP_splited:
-            try:
-                if (int(octet) < MIN_IPV4_OCTET) or (int(octet) > MAX_IPV4_OCTET):
-                    raise Ipv4Exception(IP)
+        if value is None:
+            raise Ipv4Exception(IP)
 
-            except Exception:
-                raise Ipv4Exception(IP)
+        self._value = value
 
         return IP
 
     def bin(self) -> str:
         """
-        Convert IPv4 address to binary format. The result will be, as in the 
+        Convert IPv4 address to binary format. The result will be, as in the
         representation of the type passed, separated by ".".
         """
-        IP = self.__get_IP()
-
-        IP_splited = self.ip_check().split(self.sep)
-        IP_bin = []
-
-        for octet in IP_splited:
-            IP_bin.append(convert.db(octet, IPV4_BIT_COUNT))
-
-        return self.sep.join(IP_bin)
+        return self.sep.join([format(octet, '08b') for octet in self.octets()])
 
     def hex(self) -> str:
         """
-        Convert IPv4 address to binary format. The result will be, as in the 
+        Convert IPv4 address to hex format. The result will be, as in the
         representation of the type passed, separated by ".".
         """
-        IP = self.__get_IP()
-
-        IP_splited = self.ip_check().split(self.sep)
-        IP_bin = []
-
-        for octet in IP_splited:
-            IP_bin.append(convert.dh(octet))
-
-        return self.sep.join(IP_bin)
+        return self.sep.join([format(octet, 'x') for octet in self.octets()])
 
     def empty(self) -> bool:
-        if self.IP == self.EMPTY:
+        if self._IP == self.EMPTY:
             return True
 
         return False
-    
-class Ipv6:
+
+class Ipv6(_Address):
     """
     Representation of an IPv6 address
 
+    The address is kept as a 128 bit integer. The string form is only
+    built when it is needed, so addresses produced by the calc functions
+    never go through a string.
+
     :param IP: IPv6 address in decimal form. Example: '2001:db8:85a3::8a2e:370:7334'.
     :param check: Does the address passed to IP need to be checked when the class is built?
     """
-    
+
+    __slots__ = ('_IP', '_value', '__weakref__')
+
     sep = ':'
     type = 'ipv6'
     bits = IPV6_BIT_COUNT
     octs = IPV6_OCT_COUNT
+    tbits = IPV6_OCT_COUNT * IPV6_BIT_COUNT
     thosts = 2 ** (IPV6_OCT_COUNT * IPV6_BIT_COUNT)
     EMPTY = EMPTY_IP
 
     def __init__(self, IP = None,  check = False, empty = False):
         self._IP = IP
-        self.IP = IP
+        self._value = _parse_ipv6(IP) if isinstance(IP, str) else None
+
+        if self._value is not None:
+            self._IP = None
 
         if check:
-            self.IP = self.ip_check()
+            self._IP = self.ip_check()
 
         if empty:
-            self._IP = EMPTY
+            self._IP = self.EMPTY
+
+    @classmethod
+    def from_int(cls, value: int, IP: str = None):
+        """
+        Builds the address directly from its integer value, without parsing any string.
+
+        :param value: Integer value of the address, between 0 and thosts - 1.
+        :param IP: String form of the address, if it is already known.
+        """
+        if (value < 0) or (value >= cls.thosts):
+            raise Ipv6Exception(value)
+
+        address = object.__new__(cls)
+        address._IP = IP
+        address._value = value
+
+        return address
+
+    @staticmethod
+    def to_str(value: int) -> str:
+        hextets = '%032x' % value
+
+        return ':'.join([hextets[i:i + 4].lstrip('0') or '0000' for i in range(0, 32, 4)])
 
     def __iter__(self):
         IP_split = self.IP.split(self.sep)
@@ -170,7 +401,7 @@ class Ipv6:
         for i in range(0, IP_split.count('')):
             IP_split.remove('')
 
-        return iter(IP_split) 
+        return iter(IP_split)
 
     def __len__(self):
         IP_split = self.IP.split(self.sep)
@@ -180,133 +411,289 @@ class Ipv6:
 
         return len(IP_split)
 
-    def __eq__(self, IP):
-        try:
-            if self.type == IP.type:
-                return True
-
-            return False
-        except Exception:
-            return False
+    def __int__(self):
+        return self.value
 
     def __get_IP(self) -> str:
         if self.IP:
             return self.IP
 
-        raise ValueError('The value for IP could not be None!')      
+        raise ValueError('The value for IP could not be None!')
 
     @property
     def IP(self) -> str:
+        if self._IP is None and self._value is not None:
+            self._IP = self.to_str(self._value)
+
         return self._IP
 
     @IP.setter
     def IP(self, new_ip: str):
-        while (new_ip.count(':0:')):
-            new_ip = new_ip.replace(':0:', ':0000:')
-
-        if new_ip.startswith('0:'):
-            new_ip = '000' + new_ip
+        # Addresses are hashed and interned by value, so they can not change once built
+        raise AttributeError("The address of an {} can not be changed, build a new one".format(type(self).__name__))
 
-        if new_ip.endswith(':0'):
-            new_ip = new_ip + '000'
+    @property
+    def value(self) -> int:
+        """
+        Integer value of the address. It is calculated (and the address
+        checked) the first time it is requested.
+        """
+        if self._value is None:
+            self.ip_check()
 
-        if '::' in new_ip:
-            r = self.octs - len(self)
-            new_ip = new_ip.replace('::', ':0000:' * r).replace('::', ':')
+        return self._value
 
-            if new_ip.startswith(':'):
-                new_ip = new_ipP[1:]
-            
-            elif new_ip.endswith(':'):
-                new_ip = new_ip[0:len(new_ip) - 1]
+    def octets(self) -> [int]:
+        value = self.value
 
-        self._IP = new_ip
+        return [(value >> shift) & MAX_IPV6_OCTET for shift in range((self.octs - 1) * self.bits, -1, -self.bits)]
 
     def ip_check(self) -> str:
         """
-        Checks if the passed Ipv6 address is valid. Note that 
+        Checks if the passed Ipv6 address is valid. Note that
         this method can be called without the class having been constructed.
         """
         IP = self.__get_IP()
-        
-        #IP = IP.replace('::', ':0000:')
+        if self._value is not None:
+            return IP
 
-        if (IP.count(':') != 7) or ('' in IP.split(self.sep)):
-            raise Ipv6Exception(IP)
-
-        IP_splited = IP.split(self.sep)
-        for octet in IP_splited:
-            try:
-                octet_decimal = convert.hd(octet)
+        value = _parse_ipv6(IP) if isinstance(IP, str) else None
 
-                if ((octet_decimal < MIN_IPV6_OCTET) or (octet_decimal > MAX_IPV6_OCTET)):
-                    raise Ipv6Exception(IP)
+        if value is None:
+            raise Ipv6Exception(IP)
 
-            except Exception:
-                raise Ipv6Exception(IP)
+        self._value = value
 
-        return self.sep.join(IP_splited)
+        return self.to_str(value)
 
     def bin(self) -> str:
         """
-        Convert IPv4 address to binary format. The result will be, as in the 
+        Convert IPv6 address to binary format. The result will be, as in the
         representation of the type passed, separated by ":".
-        """        
-        IP = self.__get_IP()
-        IP_splited = self.ip_check().split(self.sep)
-        IP_bin = []
-
-        for octet in IP_splited:
-            IP_bin.append(convert.hb(octet, IPV6_BIT_COUNT))
-
-        return self.sep.join(IP_bin) 
+        """
+        return self.sep.join([format(octet, '016b') for octet in self.octets()])
 
     def hex(self):
         """
-        Convert IPv4 address to hex format. The result will be, as in the 
-        representation of the type passed, separated by ".".
+        Convert IPv6 address to hex format. The result will be, as in the
+        representation of the type passed, separated by ":".
         """
-        IP = self.__get_IP(IP)
-
-        IP_splited = self.ip_check().split(self.sep)
-        IP_bin = []
-
-        for octet in IP_splited:
-            IP_bin.append(convert.dh(octet))
-
-        return self.sep.join(IP_bin)
+        return self.sep.join([format(octet, 'x') for octet in self.octets()])
 
     def empty(self) -> bool:
-        if self.IP == self.EMPTY:
+        if self._IP == self.EMPTY:
             return True
 
         return False
 
 def is_ipv4(IP: str) -> bool:
-    try:
-        Ipv4(IP, True)
-        return True
-    except Exception:
-        return False
+    return isinstance(IP, str) and _parse_ipv4(IP) is not None
 
 def is_ipv6(IP: str) -> bool:
-    try:
-        Ipv6(IP, True)
-        return True
-    except Exception:
-        return False
+    return isinstance(IP, str) and _parse_ipv6(IP) is not None
+
+def parse(IP: str) -> (str, int):
+    """
+    Detects the type of the address and calculates its integer value,
+    without building any object.
+
+    Ex:
+        parse('10.0.4.1') == ('ipv4', 167773185)
+        parse('::ffff:10.0.4.1') == ('ipv6', 281470849008641)
+
+    :param IP: IPv4 or IPv6 address
+    """
+    if ':' in IP:
+        value = _parse_ipv6(IP)
+        if value is None:
+            raise Ipv6Exception(IP)
+
+        return (Ipv6.type, value)
+
+    value = _parse_ipv4(IP)
+    if value is None:
+        raise Ipv4Exception(IP)
+
+    return (Ipv4.type, value)
 
 def Ip(IP: Ipv4 | Ipv6 | str) -> Ipv4 | Ipv6 | str:
     if not isinstance(IP, str):
         return IP
 
-    if is_ipv4(IP):
-        return Ipv4(IP, True)
+    IP_type, value = parse(IP)
+    if IP_type == Ipv4.type:
+        return Ipv4.from_int(value, IP)
+
+    return Ipv6.from_int(value)
+
+def _parse_many_ipv4(np, data: bytes):
+    """
+    Vectorized parsing of IPv4 addresses, one per line (every line ending
+    with a newline). Returns None if any of them is not valid.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    digits = buffer - np.uint8(ord('0'))
+    is_sep = (buffer == ord('.')) | (buffer == ord('\n'))
+    seps = np.flatnonzero(is_sep)
+
+    if (len(seps) % 4) or ((digits > 9) & ~is_sep).any():
+        return None
+
+    kinds = buffer[seps].reshape(-1, 4)
+    if not ((kinds[:, :3] == ord('.')).all() and (kinds[:, 3] == ord('\n')).all()):
+        return None
+
+    lengths = np.diff(seps, prepend=-1) - 1
+    if (lengths < 1).any() or (lengths > 3).any():
+        return None
+
+    octets = (digits[seps - 1].astype(np.uint32) + 10 * digits[seps - 2].astype(np.uint32) * (lengths >= 2) +
+              100 * digits[seps - 3].astype(np.uint32) * (lengths >= 3)).reshape(-1, 4)
+
+    if (octets > MAX_IPV4_OCTET).any():
+        return None
+
+    return ((octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]).astype(np.uint32)
+
+def parse_many(buffer: bytes | str, IP_type: str = None):
+    """
+    Parses a buffer with one address per line into a NumPy array, in the
+    layout used by calc.calc_many: uint32 for IPv4 and (n, 2) uint64 lanes
+    (high and low 64 bits) for IPv6. Empty lines are skipped. All the
+    addresses must be of the same type; an exception is raised on the
+    first one that is not valid.
+
+    :param buffer: Addresses separated by newlines
+    :param IP_type: 'ipv4' or 'ipv6'. If not passed, it is taken from the first address
+    """
+    import numpy as np
+
+    if isinstance(buffer, str):
+        buffer = buffer.encode('ascii', 'replace')
+
+    data = buffer.strip(b'\n')
+    if (b'\r' in data) or (b'\n\n' in data):
+        import re
+
+        data = re.sub(rb'\r?\n(\s*\n)*', b'\n', data).strip(b'\n')
+
+    if IP_type is None:
+        IP_type = Ipv6.type if b':' in data.split(b'\n', 1)[0] else Ipv4.type
+
+    if not data:
+        return np.zeros((0,) if IP_type == Ipv4.type else (0, 2), dtype=np.uint32 if IP_type == Ipv4.type else np.uint64)
+
+    if IP_type == Ipv4.type:
+        values = _parse_many_ipv4(np, data + b'\n')
+        if values is not None:
+            return values
+
+    values = []
+    parser, exception = (_parse_ipv4, Ipv4Exception) if IP_type == Ipv4.type else (_parse_ipv6, Ipv6Exception)
+
+    for line in data.decode('ascii', 'replace').split('\n'):
+        value = parser(line.strip())
+        if value is None:
+            raise exception(line)
+
+        values.append(value)
+
+    if IP_type == Ipv4.type:
+        return np.array(values, dtype=np.uint32)
+
+    lane = (1 << 64) - 1
+
+    return np.array([(value >> 64, value & lane) for value in values], dtype=np.uint64).reshape(-1, 2)
+
+def ip_from_int(value: int, IP_type: str = Ipv4.type, IP: str = None) -> Ipv4 | Ipv6:
+    """
+    Builds an Ipv4 or Ipv6 address from its integer value.
+
+    :param value: Integer value of the address
+    :param IP_type: Type of the address, 'ipv4' or 'ipv6'
+    :param IP: String form of the address, if it is already known
+    """
+    if IP_type == Ipv4.type:
+        return Ipv4.from_int(value, IP)
+
+    if IP_type == Ipv6.type:
+        return Ipv6.from_int(value, IP)
 
-    return Ipv6(IP, True)
+    raise ValueError("Type '{}' is not a supported IP type!".format(IP_type))
 
 def is_ipv4_ipv6(IP: any) -> bool:
-    if (IP == Ipv4) or (IP == Ipv6):
-        return True
+    return getattr(IP, 'type', None) in (Ipv4.type, Ipv6.type)
+
+class InternPool:
+    """
+    Pool of addresses and subnets held through weak references. Equal
+    objects (of the same class) that go through the pool come out as a
+    single instance while it is alive somewhere, so a stream with many
+    repeated addresses keeps one object per distinct address, and those
+    are compared by identity in sets and dicts. Objects that are not
+    used anymore leave the pool by themselves.
+
+    Ex:
+        pool = InternPool()
+        IP = pool.intern(Ip('10.0.4.1'))
+        pool.intern(Ip('10.0.4.1')) is IP
+        pool.from_int(0x0a000401) is IP
+    """
+
+    __slots__ = ('_pools',)
+
+    def __init__(self):
+        # Weak dictionaries by class, by the (value, mask) of the objects
+        self._pools = {}
+
+    def __len__(self):
+        return sum([len(pool) for pool in self._pools.values()])
+
+    def _pool(self, IP_class: type) -> weakref.WeakValueDictionary:
+        pool = self._pools.get(IP_class)
+        if pool is None:
+            pool = self._pools[IP_class] = weakref.WeakValueDictionary()
+
+        return pool
+
+    def intern(self, IP: Ipv4 | Ipv6) -> Ipv4 | Ipv6:
+        """
+        Returns the object of the pool equal to IP, adding IP if there is none.
+
+        :param IP (Ip.Ipv4, Ip.Ipv6, subnet.Ipv4, subnet.Ipv6): Address or subnet
+        """
+        pool = self._pool(type(IP))
+        key = IP._key()[1:]
+
+        found = pool.get(key)
+        if found is None:
+            pool[key] = found = IP
+
+        return found
+
+    def from_int(self, value: int, IP_class: type = Ipv4) -> Ipv4 | Ipv6:
+        """
+        Returns the address of the pool with the integer value, building
+        it only if it is not in the pool.
+
+        :param value (int): Integer value of the address
+        :param IP_class (Ip.Ipv4, Ip.Ipv6): Class of the address
+        """
+        pool = self._pool(IP_class)
+        key = (value, IP_class.tbits)
+
+        found = pool.get(key)
+        if found is None:
+            pool[key] = found = IP_class.from_int(value)
+
+        return found
+
+    def parse(self, IP: str) -> Ipv4 | Ipv6:
+        """
+        Returns the address of the pool for the string (see Ip).
+
+        :param IP (str): IPv4 or IPv6 address
+        """
+        IP_type, value = parse(IP)
 
-    return False
+        return self.from_int(value, Ipv4 if IP_type == Ipv4.type else Ipv6)
@@ -1,9 +1,27 @@
-import sys, os
+import importlib
+import os
 
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+__all__ = ["calc", "subnet", "Ip", "table", "ipset", "planner", "prefixfile", "sharedtable", "server", "instrument",
+           "audit", "allocator", "heavyhitters", "sampling", "diff",
+           "cli"]
 
-import subnet
-import calc
-import Ip
+def __getattr__(name: str):
+    """
+    Submodules are imported the first time they are used, so importing
+    the package only pays for the modules that are needed.
+    """
+    if name in __all__:
+        module = importlib.import_module('.' + name, __name__)
+        globals()[name] = module
+        return module
 
-__all__ = ["calc", "subnet", "Ip"]
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+# NETCALC_INSTRUMENT=1 enables the instrumentation without changing the code
+# (and NETCALC_INSTRUMENT_DUMP=<file> also dumps the stats every 10 seconds)
+if os.environ.get('NETCALC_INSTRUMENT'):
+    from . import instrument
+    instrument._enable_from_environ()
@@ -0,0 +1,245 @@
+import json
+
+from .nettypes import *
+from . import calc
+from . import subnet
+from . import Ip
+
+SNAPSHOT_VERSION = 1
+
+class AllocationException(Exception):
+    def __init__(self, prefix, message=None):
+        if message:
+            self.message = message
+        else:
+            self.message = "There is no free space for the prefix '{}'".format(prefix)
+
+        super().__init__(self.message)
+
+def _subnet(IP: IPType, net: int, mask: MaskType) -> IPType:
+    if IP.type == Ip.Ipv4.type:
+        return subnet.Ipv4.from_int(net, mask)
+
+    return subnet.Ipv6.from_int(net, mask)
+
+def _prefix_str(IP: IPType, net: int, mask: MaskType) -> str:
+    return '{}/{}'.format(IP.to_str(net), mask)
+
+class Allocator:
+    """
+    Buddy system allocator of child prefixes inside one or more parent
+    prefixes.
+
+    There is one free list per mask. A request for a mask takes a block
+    of that mask or, if there is none, splits the smallest larger free
+    block in halves until it gets one, leaving the other halves (the
+    buddies) free. When a prefix is released and its buddy is free, both
+    are merged back into their parent block, and so on upwards. Every
+    operation walks at most one step per bit of the mask.
+
+    Ex:
+        pool = Allocator(['10.0.0.0/24'])
+        pool.allocate(26) == subnet.Ipv4('10.0.0.0', 26)
+        pool.allocate(26) == subnet.Ipv4('10.0.0.64', 26)
+        pool.allocate_specific('10.0.0.192/27') == subnet.Ipv4('10.0.0.192', 27)
+        pool.release('10.0.0.64/26')
+    """
+
+    def __init__(self, parents = None):
+        # Free blocks by mask, as ordered dicts of network address -> mask of its parent
+        self._free = {IP.type: [{} for mask in range(0, IP.tbits + 1)] for IP in (Ip.Ipv4, Ip.Ipv6)}
+        # Allocated prefixes: network address -> (mask, mask of its parent)
+        self._allocated = {Ip.Ipv4.type: {}, Ip.Ipv6.type: {}}
+        self._parents = {Ip.Ipv4.type: {}, Ip.Ipv6.type: {}}
+
+        for parent in parents or []:
+            self.add_parent(parent)
+
+    def __len__(self):
+        return sum([len(allocated) for allocated in self._allocated.values()])
+
+    def add_parent(self, parent: GenericIpType):
+        """
+        Adds a parent prefix, all of it free. It can not overlap the other parents.
+
+        :param parent (str, subnet.Ipv4, subnet.Ipv6): Parent prefix
+        """
+        IP, net, mask = subnet.prefix_value(parent)
+        last = net | calc.host_bits(mask, IP)
+
+        for other, other_mask in self._parents[IP.type].items():
+            if net <= other | calc.host_bits(other_mask, IP) and other <= last:
+                raise AllocationException(parent, "The parent '{}' overlaps '{}'".format(
+                    _prefix_str(IP, net, mask), _prefix_str(IP, other, other_mask)))
+
+        self._parents[IP.type][net] = mask
+        self._free[IP.type][mask][net] = mask
+
+    def allocate(self, mask: MaskType, IP: IPType = Ip.Ipv4) -> IPType:
+        """
+        Allocates a free prefix with the given mask and returns it.
+
+        :param mask (int): Mask of the prefix
+        :param IP (Ip.Ipv4, Ip.Ipv6): IP class of the prefix
+        """
+        calc.mask_result(mask, IP.type)
+        free = self._free[IP.type]
+
+        size = mask
+        while size >= 0 and not free[size]:
+            size -= 1
+
+        if size < 0:
+            raise AllocationException('/{}'.format(mask))
+
+        net, parent_mask = free[size].popitem()
+
+        # The block is split in halves, keeping the first and freeing the second
+        while size < mask:
+            size += 1
+            free[size][net | (1 << (IP.tbits - size))] = parent_mask
+
+        self._allocated[IP.type][net] = (mask, parent_mask)
+
+        return _subnet(IP, net, mask)
+
+    def allocate_specific(self, prefix: GenericIpType) -> IPType:
+        """
+        Allocates the given prefix, if all of it is free, and returns it.
+
+        :param prefix (str, subnet.Ipv4, subnet.Ipv6): Prefix to allocate
+        """
+        IP, net, mask = subnet.prefix_value(prefix)
+        free = self._free[IP.type]
+
+        size = mask
+        while size >= 0 and (net & calc.net_bits(size, IP)) not in free[size]:
+            size -= 1
+
+        if size < 0:
+            raise AllocationException(prefix, "The prefix '{}' is not free".format(_prefix_str(IP, net, mask)))
+
+        block = net & calc.net_bits(size, IP)
+        parent_mask = free[size].pop(block)
+
+        # The block is split towards the prefix, freeing the halves that do not hold it
+        while size < mask:
+            size += 1
+            half = 1 << (IP.tbits - size)
+            free[size][block if net & half else block | half] = parent_mask
+            block |= net & half
+
+        self._allocated[IP.type][net] = (mask, parent_mask)
+
+        return _subnet(IP, net, mask)
+
+    def release(self, prefix: GenericIpType):
+        """
+        Frees an allocated prefix, merging it with its buddy while the
+        buddy is free too.
+
+        :param prefix (str, subnet.Ipv4, subnet.Ipv6): Prefix to release
+        """
+        IP, net, mask = subnet.prefix_value(prefix)
+        allocated = self._allocated[IP.type]
+
+        if allocated.get(net, (None,))[0] != mask:
+            raise AllocationException(prefix, "The prefix '{}' is not allocated".format(_prefix_str(IP, net, mask)))
+
+        parent_mask = allocated.pop(net)[1]
+        free = self._free[IP.type]
+
+        while mask > parent_mask:
+            buddy = net ^ (1 << (IP.tbits - mask))
+            if buddy not in free[mask]:
+                break
+
+            del free[mask][buddy]
+            net &= ~(1 << (IP.tbits - mask))
+            mask -= 1
+
+        free[mask][net] = parent_mask
+
+    def allocated(self):
+        """
+        Generator of the allocated prefixes, IPv4 first, ordered by address.
+        """
+        for IP in (Ip.Ipv4, Ip.Ipv6):
+            for net, (mask, parent_mask) in sorted(self._allocated[IP.type].items()):
+                yield _subnet(IP, net, mask)
+
+    def free(self):
+        """
+        Generator of the free blocks, IPv4 first, ordered by address.
+        """
+        for IP in (Ip.Ipv4, Ip.Ipv6):
+            blocks = [(net, mask) for mask, nets in enumerate(self._free[IP.type]) for net in nets]
+
+            for net, mask in sorted(blocks):
+                yield _subnet(IP, net, mask)
+
+    def available(self, IP: IPType = Ip.Ipv4) -> int:
+        """
+        Number of free addresses.
+        """
+        return sum([len(nets) << (IP.tbits - mask) for mask, nets in enumerate(self._free[IP.type])])
+
+    def _parent_mask(self, IP: IPType, net: int) -> MaskType:
+        parents = self._parents[IP.type]
+
+        for mask in range(IP.tbits, -1, -1):
+            parent = net & calc.net_bits(mask, IP)
+            if parents.get(parent) == mask:
+                return mask
+
+    def to_dict(self) -> dict:
+        """
+        State of the allocator, with the free lists in their current order
+        so that a restored allocator hands out the same prefixes.
+        """
+        state = {'version': SNAPSHOT_VERSION, 'parents': [], 'allocated': [], 'free': []}
+
+        for IP in (Ip.Ipv4, Ip.Ipv6):
+            state['parents'].extend([_prefix_str(IP, net, mask) for net, mask in self._parents[IP.type].items()])
+            state['allocated'].extend([_prefix_str(IP, net, mask)
+                                       for net, (mask, parent_mask) in self._allocated[IP.type].items()])
+            state['free'].extend([_prefix_str(IP, net, mask)
+                                  for mask, nets in enumerate(self._free[IP.type]) for net in nets])
+
+        return state
+
+    @classmethod
+    def from_dict(cls, state: dict):
+        if state.get('version') != SNAPSHOT_VERSION:
+            raise ValueError("The allocator snapshot version {} is not supported".format(state.get('version')))
+
+        allocator = cls()
+
+        for prefix in state['parents']:
+            IP, net, mask = subnet.prefix_value(prefix)
+            allocator._parents[IP.type][net] = mask
+
+        for prefix in state['free']:
+            IP, net, mask = subnet.prefix_value(prefix)
+            allocator._free[IP.type][mask][net] = allocator._parent_mask(IP, net)
+
+        for prefix in state['allocated']:
+            IP, net, mask = subnet.prefix_value(prefix)
+            allocator._allocated[IP.type][net] = (mask, allocator._parent_mask(IP, net))
+
+        return allocator
+
+    def snapshot(self, path: str):
+        """
+        Saves the state of the allocator to a JSON file.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def restore(cls, path: str):
+        """
+        Loads an allocator saved with snapshot.
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,75 @@
+from collections import namedtuple
+from heapq import heappush, heappop
+
+from .nettypes import *
+from .ipset import _interval
+from . import Ip
+
+# 'kind' is 'duplicate', 'nested', 'overlap' or 'gap'. For the first three,
+# 'first' and 'second' are the conflicting items (for 'nested', 'first' is
+# the one that contains the other) and 'start' and 'end' the addresses they
+# share. For 'gap', they are the items around the gap and 'start' and 'end'
+# the first and last addresses not covered by any item.
+Conflict = namedtuple('Conflict', ['kind', 'first', 'second', 'start', 'end'])
+
+def _sweep(IP: IPType, intervals: [(int, int, int)], items: list, gaps: bool):
+    """
+    Sweeps the (start, end, index) intervals of one IP type, sorted by
+    start and then from the largest to the smallest.
+    """
+    active = []
+    last_end = last = None
+
+    for start, end, i in intervals:
+        while active and active[0][0] < start:
+            heappop(active)
+
+        if gaps and last is not None and start > last_end + 1:
+            yield Conflict('gap', items[last], items[i], IP.from_int(last_end + 1), IP.from_int(start - 1))
+
+        # Everything still active starts before this interval and ends inside or after it
+        for other_end, other_start, other in active:
+            if other_start == start and other_end == end:
+                kind = 'duplicate'
+            elif other_end >= end:
+                kind = 'nested'
+            else:
+                kind = 'overlap'
+
+            yield Conflict(kind, items[other], items[i], IP.from_int(start), IP.from_int(min(end, other_end)))
+
+        heappush(active, (end, start, i))
+
+        if last is None or end > last_end:
+            last_end, last = end, i
+
+def conflicts(items, gaps: bool = False):
+    """
+    Generator of every duplicate, nested or overlapping pair of prefixes
+    (or ranges) in 'items' and, optionally, of the gaps between them.
+
+    The items are sorted once and swept from the lowest address, keeping
+    only those that reach the current one, so it takes O(n log n + k)
+    for n items and k conflicts. The conflicts come out ordered by IP
+    type (IPv4 first) and by their second item, in no particular order
+    between those with the same second item.
+
+    Ex:
+        list(conflicts(['10.0.0.0/8', '10.1.0.0/16', '10.3.0.0/16'], gaps=True))
+        == [Conflict('nested', '10.0.0.0/8', '10.1.0.0/16', Ip.Ipv4('10.1.0.0'), Ip.Ipv4('10.1.255.255')),
+            Conflict('nested', '10.0.0.0/8', '10.3.0.0/16', Ip.Ipv4('10.3.0.0'), Ip.Ipv4('10.3.255.255'))]
+
+    :param items: Prefixes (subnet objects or 'IP/mask' strings), addresses or ranges ((first, last)
+                  tuples or 'first-last' strings). They are returned in the conflicts as passed
+    :param gaps (bool): Also report the addresses between the items that no item covers
+    """
+    items = list(items)
+    intervals = {Ip.Ipv4.type: [], Ip.Ipv6.type: []}
+
+    for i, item in enumerate(items):
+        IP, start, end = _interval(item)
+        intervals[IP.type].append((start, -end, i))
+
+    for IP in (Ip.Ipv4, Ip.Ipv6):
+        ordered = sorted(intervals[IP.type])
+        yield from _sweep(IP, [(start, -end, i) for start, end, i in ordered], items, gaps)
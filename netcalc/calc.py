@@ -1,9 +1,10 @@
-from util import convert
-from nettypes import *
-from const import *
+from .util import convert
+from .nettypes import *
+from .const import *
+from collections import namedtuple
+import operator
 
-import math
-import Ip
+from . import Ip
 
 class MaskException(Exception):
     def __init__(self, mask, message=None):
@@ -14,6 +15,21 @@ class MaskException(Exception):
 
         super().__init__(self.message)
 
+def _mask_value(mask: MaskType) -> int:
+    """
+    Integer value of a mask that is not an int: integer types (like the ones of
+    NumPy) and integral floats (24.0) are converted, anything else is not a mask.
+    """
+    try:
+        return operator.index(mask)
+    except TypeError:
+        pass
+
+    if isinstance(mask, float) and mask.is_integer():
+        return int(mask)
+
+    raise MaskException(mask)
+
 def ipv4_mask(mask: MaskType) -> int:
     """
     Check the validity of an IPv4 type network mask.
@@ -21,7 +37,10 @@ def ipv4_mask(mask: MaskType) -> int:
     :param mask: Mask to check validity
     :return: will mask the passed network, if it is valid
     """
-    if (mask < MIN_IPV4_OCTET) or (mask > MAX_IPV4_OCTET):
+    if type(mask) is not int:
+        mask = _mask_value(mask)
+
+    if (mask < MIN_IPV4_MASK) or (mask > MAX_IPV4_MASK):
         raise MaskException(mask)
 
     return mask
@@ -33,7 +52,10 @@ def ipv6_mask(mask: MaskType) -> int:
     :param mask: Mask to check validity
     :return: will mask the passed network, if it is valid
     """    
-    if (mask < MIN_IPV6_OCTET) or (mask > MAX_IPV6_OCTET):
+    if type(mask) is not int:
+        mask = _mask_value(mask)
+
+    if (mask < MIN_IPV6_MASK) or (mask > MAX_IPV6_MASK):
         raise MaskException(mask)
 
     return mask
@@ -46,6 +68,18 @@ def mask_result(mask: MaskType, IP_type: str = Ip.Ipv4.type):
 
     raise MaskException(mask)
 
+def is_supported(IP: IPType, IP_supported: [IPType]) -> bool:
+    """
+    Checks if the IP class or address is of one of the types in 'IP_supported'.
+    """
+    IP_type = getattr(IP, 'type', None)
+
+    for IP_class in IP_supported:
+        if IP_type == IP_class.type:
+            return True
+
+    return False
+
 def IPCalc(IP_supported: [IPType]):
     """
     * Decorator used in functions that take an IP address 
@@ -85,11 +119,16 @@ def IPCalc(IP_supported: [IPType]):
             else:
                 IP_result = IP
             
-            if (not IP_result in IP_supported):
+            if not is_supported(IP_result, IP_supported):
                 raise ValueError("Type value passed as argument to IP is not supported!")
 
             return f(IP_result, mask_result(mask, IP_result.type.lower()), *args[2:])
 
+        # Lets instrument find the decorated function and time it apart from the checks
+        wrapper.__wrapped__ = f
+        wrapper.__name__ = f.__name__
+        wrapper.decorator = 'IPCalc'
+
         return wrapper
 
     return decorator
@@ -122,7 +161,7 @@ def IPCalcMask(IP_supported: [IPType]):
 
             try:
                 IP = args[1]
-                if (not IP in IP_supported):
+                if not is_supported(IP, IP_supported):
                     raise ValueError("Type passed as argument to IP is not supported!") 
             except IndexError:
                 pass
@@ -134,6 +173,11 @@ def IPCalcMask(IP_supported: [IPType]):
 
             return f(mask, *args[1:])
 
+        # Lets instrument find the decorated function and time it apart from the checks
+        wrapper.__wrapped__ = f
+        wrapper.__name__ = f.__name__
+        wrapper.decorator = 'IPCalcMask'
+
         return wrapper
 
     return decorator
@@ -169,11 +213,16 @@ def IPCalcIp(IP_supported: [IPType]):
             else:
                 IP_result = IP
             
-            if (not IP in IP_supported):
+            if not is_supported(IP_result, IP_supported):
                 raise ValueError("Type passed as argument to IP is not supported!")
 
             return f(IP_result, *args[1:])
 
+        # Lets instrument find the decorated function and time it apart from the checks
+        wrapper.__wrapped__ = f
+        wrapper.__name__ = f.__name__
+        wrapper.decorator = 'IPCalcIp'
+
         return wrapper
     
     return decorator
@@ -195,6 +244,56 @@ def join_ip(IP_split: [str], IP_type) -> IPType:
     if IP_type == Ip.Ipv6.type:
         return Ip.Ipv6(':'.join([str(convert.bh(bin_oct)) for bin_oct in IP_split]))
 
+MaskInfo = namedtuple('MaskInfo', ['mask', 'net_bits', 'host_bits', 'subnet_mask', 'wildcard_mask',
+                                   'hosts', 'usable_hosts', 'ip_class'])
+
+def mask_info(mask: MaskType, IP: IPType) -> MaskInfo:
+    """
+    Calculates everything that only depends on the mask. Used to
+    build MASK_TABLES, prefer looking the values up there.
+
+    :param mask (int): Reference mask
+    :param IP (Ip.Ipv4, Ip.Ipv6): IP class the mask refers to
+    """
+    host = (1 << (IP.tbits - mask)) - 1
+    net = (IP.thosts - 1) ^ host
+    usable = host - 1 if mask < IP.tbits - 1 else 0
+    IP_class = None
+
+    if IP.type == Ip.Ipv4.type:
+        for end, name in ((IPV4_CLASS_A_END, 'A'), (IPV4_CLASS_B_END, 'B'), (IPV4_CLASS_C_END, 'C')):
+            if mask <= end:
+                IP_class = name
+                break
+
+    return MaskInfo(mask, net, host, IP.to_str(net), IP.to_str(host), host + 1, usable, IP_class)
+
+# Every possible mask is calculated once, when the module is loaded
+MASK_TABLES = {
+    Ip.Ipv4.type: tuple([mask_info(mask, Ip.Ipv4) for mask in range(MIN_IPV4_MASK, MAX_IPV4_MASK + 1)]),
+    Ip.Ipv6.type: tuple([mask_info(mask, Ip.Ipv6) for mask in range(MIN_IPV6_MASK, MAX_IPV6_MASK + 1)]),
+}
+
+def host_bits(mask: MaskType, IP: IPType) -> int:
+    """
+    Integer with the host part of the address set, that is, the bits
+    that are not covered by the mask. Ex: host_bits(24, Ip.Ipv4) == 0xff
+
+    :param mask (int): Reference mask
+    :param IP (Ip.Ipv4, Ip.Ipv6): IP class or address the mask refers to
+    """
+    return MASK_TABLES[IP.type][mask].host_bits
+
+def net_bits(mask: MaskType, IP: IPType) -> int:
+    """
+    Integer with the network part of the address set, that is, the bits
+    covered by the mask. Ex: net_bits(24, Ip.Ipv4) == 0xffffff00
+
+    :param mask (int): Reference mask
+    :param IP (Ip.Ipv4, Ip.Ipv6): IP class or address the mask refers to
+    """
+    return MASK_TABLES[IP.type][mask].net_bits
+
 @IPCalc([Ip.Ipv4, Ip.Ipv6])
 def net_address(IP: GenericIpType, mask: MaskType) -> GenericIpType:
     """
@@ -209,23 +308,7 @@ def net_address(IP: GenericIpType, mask: MaskType) -> GenericIpType:
     :param IP (str, Ip.Ipv4, Ip.ipv6): Reference IP
     :param mask (int): Reference mask
     """
-    IP_bin_split = IP.bin().split(IP.sep)
-    mask = mask_result(mask, IP.type)
-
-    net_split = [''] * IP.octs
-    bit_count = 0
-
-    for i, bin_oct in enumerate(IP_bin_split):
-        for bit in bin_oct:
-            if bit_count == mask:
-                break
-
-            net_split[i] += bit
-            bit_count += 1
-
-    net_split = list(map(lambda bin_oct: bin_oct + ('0' * (IP.bits - len(bin_oct))), net_split))
-    
-    return join_ip(net_split, IP.type)
+    return Ip.ip_from_int(int(IP) & net_bits(mask, IP), IP.type)
 
 @IPCalc([Ip.Ipv4, Ip.Ipv6])
 def ip_usable_range(IP: GenericIpType, mask: MaskType) -> (GenericIpType, GenericIpType):
@@ -236,29 +319,14 @@ def ip_usable_range(IP: GenericIpType, mask: MaskType) -> (GenericIpType, Generi
     :param IP (str, Ip.Ipv4, Ip.ipv6): Reference IP
     :param mask (int): Reference mask    
     """
-    if mask >= (IP.octs * IP.bits) - 1:
-        return (Ip.Ipv4(empty=True), Ip.Ipv4(empty=True))
-
-    naddr_split = net_address(IP, mask).bin().split(IP.sep)
+    if mask >= IP.tbits - 1:
+        IP_class = Ip.Ipv4 if IP.type == Ip.Ipv4.type else Ip.Ipv6
+        return (IP_class(empty=True), IP_class(empty=True))
 
-    first_ip = naddr_split
-    first_ip[-1] = first_ip[-1][:-1] + '1'
+    host = host_bits(mask, IP)
+    net = int(IP) & ~host
 
-    last_ip = [''] * IP.octs
-    bit_count = 0
-
-    for i, bin_oct in enumerate(naddr_split):
-        for bit in bin_oct:
-            if bit_count >= mask:
-                last_ip[i] += '1'
-            else:
-                last_ip[i] += bit
-
-            bit_count += 1
-
-    last_ip[-1] = last_ip[-1][:-1] + '0'
-
-    return (join_ip(first_ip, IP.type), join_ip(last_ip, IP.type))
+    return (Ip.ip_from_int(net + 1, IP.type), Ip.ip_from_int((net | host) - 1, IP.type))
 
 @IPCalc([Ip.Ipv4, Ip.Ipv6])
 def broadcast(IP: GenericIpType, mask: MaskType) -> IPType:
@@ -269,17 +337,7 @@ def broadcast(IP: GenericIpType, mask: MaskType) -> IPType:
     :param IP (str, Ip.Ipv4, Ip.ipv6): Reference IP
     :param mask (int): Reference mask       
     """
-
-    ip_usable_range_ = ip_usable_range(IP, mask)
-    if ip_usable_range_[0].empty() or ip_usable_range_[1].empty():
-        return IP
-
-    last_ip_usable = ip_usable_range_[1].bin().split(IP.sep)
-
-    broadcast = last_ip_usable
-    broadcast[-1] = broadcast[-1][:-1] + '1'
-
-    return join_ip(broadcast, IP.type)
+    return Ip.ip_from_int(int(IP) | host_bits(mask, IP), IP.type)
 
 @IPCalcMask([Ip.Ipv4, Ip.Ipv6])
 def subnet_mask(mask: MaskType, IP: IPType = None) -> IPType:
@@ -289,20 +347,12 @@ def subnet_mask(mask: MaskType, IP: IPType = None) -> IPType:
     :param IP (str, Ip.Ipv4, Ip.ipv6): Reference IP
     :param mask (int): Reference mask       
     """
-    if not IP:
+    if IP is None:
         raise TypeError("subnet_mask missing required argument: IP")
-    
-    subnet_mask_splited = [''] * IP.octs
-
-    for i in range(0, IP.bits * IP.octs):
-        j = math.ceil((i + 1) / IP.bits) - 1
 
-        if i >= mask:
-            subnet_mask_splited[j] += '0'
-        else:
-            subnet_mask_splited[j] += '1'
+    info = MASK_TABLES[IP.type][mask]
 
-    return join_ip(subnet_mask_splited, IP.type)
+    return Ip.ip_from_int(info.net_bits, IP.type, info.subnet_mask)
 
 @IPCalc([Ip.Ipv4, Ip.Ipv6])
 def ip_range(IP: GenericIpType, mask: MaskType) -> (IPType, IPType):
@@ -321,46 +371,504 @@ def ip_range(IP: GenericIpType, mask: MaskType) -> (IPType, IPType):
 
 @IPCalcMask([Ip.Ipv4, Ip.Ipv6])
 def wildcard_mask(mask: MaskType, IP: IPType = None) -> IPType:
-    if not IP:
+    if IP is None:
         raise TypeError("wildcard_mask missing required argument: IP")
 
-    subnet_mask_ = subnet_mask(mask, IP).bin().split(IP.sep)
-    wm_splited = [''] * IP.octs
-
-    for i, bin_oct in enumerate(subnet_mask_):
-        for bit in bin_oct:
-            if bit == '1':
-                wm_splited[i] += '0'
-            else:
-                wm_splited[i] += '1'
+    info = MASK_TABLES[IP.type][mask]
 
-    return join_ip(wm_splited, IP.type)
+    return Ip.ip_from_int(info.host_bits, IP.type, info.wildcard_mask)
 
 @IPCalcMask([Ip.Ipv4])
 def ip_class(mask: MaskType) -> str:
-    if mask <= IPV4_CLASS_A_END:
-        return "A"
+    return MASK_TABLES[Ip.Ipv4.type][mask].ip_class
+
+@IPCalcMask([Ip.Ipv4, Ip.Ipv6])
+def host_count(mask: MaskType, IP: IPType = None, usable: bool = False) -> int:
+    """
+    Number of addresses in a subnet with the reference mask. With
+    'usable', the network and broadcast addresses are not counted
+    (0 for /31 and /32, as in ip_usable_range).
+
+    :param mask (int): Reference mask
+    :param IP (Ip.Ipv4, Ip.Ipv6): Reference IP class
+    """
+    if IP is None:
+        raise TypeError("host_count missing required argument: IP")
+
+    info = MASK_TABLES[IP.type][mask]
+
+    return info.usable_hosts if usable else info.hosts
+
+def range_cidr_values(start: int, end: int, tbits: int):
+    """
+    Generator of the (network, mask) pairs, as integers, of the minimal
+    list of prefixes that covers exactly the addresses from start to end.
+    Each prefix is the largest block aligned at 'start' (its trailing
+    zero bits) that does not go past 'end'.
+
+    :param start (int): First address
+    :param end (int): Last address
+    :param tbits (int): Bits of the addresses (32 or 128)
+    """
+    while start <= end:
+        bits = min((start & -start).bit_length() - 1 if start else tbits, (end - start + 1).bit_length() - 1)
+        yield (start, tbits - bits)
+        start += 1 << bits
+
+def range_cidrs(first: GenericIpType, last: GenericIpType) -> [(IPType, MaskType)]:
+    """
+    Calculates the minimal list of prefixes that covers exactly the
+    addresses from first to last, the reverse of ip_range.
+
+    Ex:
+        range_cidrs('10.0.0.1', '10.0.0.6') == [(Ip.Ipv4('10.0.0.1'), 32), (Ip.Ipv4('10.0.0.2'), 31),
+                                               (Ip.Ipv4('10.0.0.4'), 31), (Ip.Ipv4('10.0.0.6'), 32)]
+
+    :param first (str, Ip.Ipv4, Ip.Ipv6): First address of the range
+    :param last (str, Ip.Ipv4, Ip.Ipv6): Last address of the range
+    """
+    first, last = Ip.Ip(first), Ip.Ip(last)
+    if not is_supported(first, [Ip.Ipv4, Ip.Ipv6]) or first.type != last.type:
+        raise ValueError("The range '{} - {}' mixes IP types!".format(first, last))
+
+    if int(first) > int(last):
+        raise ValueError("The range '{} - {}' ends before it starts!".format(first.IP, last.IP))
+
+    IP = Ip.Ipv4 if first.type == Ip.Ipv4.type else Ip.Ipv6
+
+    return [(IP.from_int(net), mask) for net, mask in range_cidr_values(int(first), int(last), IP.tbits)]
+
+class SubnetInfo:
+    """
+    Result of a full calculation over a reference IP and a reference mask.
+
+    The address and the mask are checked once, when it is built, and the
+    network and broadcast addresses are calculated as integers. Every other
+    field is derived from them (or looked up in MASK_TABLES) only when it
+    is read, and the addresses are returned as new Ip.Ipv4/Ip.Ipv6 objects,
+    so a SubnetInfo never changes.
+
+    Ex:
+        info = SubnetInfo('10.0.4.1', 10)
+        info.broadcast.IP == '10.63.255.255'
+        info.to_dict() == calc('10.0.4.1', 10)
+
+    :param IP (str, Ip.Ipv4, Ip.ipv6): Reference IP
+    :param mask (int): Reference mask
+    """
+
+    __slots__ = ('_IP', '_value', '_IP_class', '_mask', '_info', '_net')
+
+    def __init__(self, IP: GenericIpType, mask: MaskType):
+        IP = Ip.Ip(IP)
+        if not is_supported(IP, [Ip.Ipv4, Ip.Ipv6]):
+            raise ValueError("Type value passed as argument to IP is not supported!")
+
+        self._build(IP, mask_result(mask, IP.type))
+
+    @classmethod
+    def _checked(cls, IP: IPType, mask: MaskType):
+        """
+        Builds the result of an address object and a mask that are already
+        checked (by IPCalc), without checking them again.
+        """
+        result = object.__new__(cls)
+        result._build(IP, mask)
 
-    if mask <= IPV4_CLASS_B_END:
-        return "B"
+        return result
 
-    if mask <= IPV4_CLASS_C_END:
-        return "C"
+    def _build(self, IP: IPType, mask: MaskType):
+        # Only the string and the value are kept, the address object can still change
+        value = int(IP)
+        info = MASK_TABLES[IP.type][mask]
+
+        object.__setattr__(self, '_IP', IP.IP)
+        object.__setattr__(self, '_value', value)
+        object.__setattr__(self, '_IP_class', Ip.Ipv4 if IP.type == Ip.Ipv4.type else Ip.Ipv6)
+        object.__setattr__(self, '_mask', mask)
+        object.__setattr__(self, '_info', info)
+        object.__setattr__(self, '_net', value & info.net_bits)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SubnetInfo is immutable")
+
+    def __repr__(self):
+        return "SubnetInfo('{}', {})".format(self._IP, self._mask)
+
+    def __getitem__(self, key: str):
+        return self.to_dict()[key]
+
+    def _key(self) -> (str, int, int):
+        return (self._IP_class.type, self._mask, self._value)
+
+    def __eq__(self, other):
+        if isinstance(other, SubnetInfo):
+            return self._key() == other._key()
+
+        if isinstance(other, dict):
+            return self.to_dict() == other
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._key())
+
+    @property
+    def ip(self) -> IPType:
+        return self._IP_class.from_int(self._value)
+
+    @property
+    def mask(self) -> MaskType:
+        return self._mask
+
+    @property
+    def type(self) -> str:
+        return self._IP_class.type
+
+    @property
+    def net_address(self) -> IPType:
+        return self._IP_class.from_int(self._net)
+
+    @property
+    def broadcast(self) -> IPType:
+        return self._IP_class.from_int(self._net | self._info.host_bits)
+
+    @property
+    def range(self) -> (IPType, IPType):
+        return (self.net_address, self.broadcast)
+
+    @property
+    def usable_range(self) -> (IPType, IPType):
+        if not self._info.usable_hosts:
+            return (self._IP_class(empty=True), self._IP_class(empty=True))
+
+        return (self._IP_class.from_int(self._net + 1), self._IP_class.from_int(self._net + self._info.usable_hosts))
+
+    @property
+    def subnet_mask(self) -> IPType:
+        return self._IP_class.from_int(self._info.net_bits, self._info.subnet_mask)
+
+    @property
+    def wildcard_mask(self) -> IPType:
+        return self._IP_class.from_int(self._info.host_bits, self._info.wildcard_mask)
+
+    @property
+    def ip_class(self) -> str:
+        """
+        Class of the mask ('A', 'B' or 'C'). None for IPv6.
+        """
+        return self._info.ip_class
+
+    @property
+    def hosts(self) -> int:
+        return self._info.hosts
+
+    @property
+    def usable_hosts(self) -> int:
+        return self._info.usable_hosts
+
+    def to_dict(self) -> dict:
+        """
+        The same dictionary returned by calc.
+        """
+        to_str = self._IP_class.to_str
+        info = self._info
+        net = self._net
+        last = net | info.host_bits
+
+        if info.usable_hosts:
+            usable_range = (to_str(net + 1), to_str(last - 1))
+        else:
+            usable_range = (self._IP_class.EMPTY, self._IP_class.EMPTY)
+
+        result = {}
+        result.update({ 'ip': '{}/{}'.format(self._IP, self._mask) })
+
+        if self._IP_class.type == Ip.Ipv4.type:
+            result.update({ 'broadcast': to_str(last) })
+            result.update({ 'class': info.ip_class })
+            result.update({ 'usable_range': usable_range })
+
+        result.update({ 'net_address': to_str(net) })
+        result.update({ 'range': (to_str(net), to_str(last)) })
+        result.update({ 'usable_range': usable_range })
+        result.update({ 'wildcard_mask': info.wildcard_mask })
+        result.update({ 'subnet_mask': info.subnet_mask })
+
+        return result
 
 @IPCalc([Ip.Ipv4, Ip.Ipv6])
 def calc(IP: GenericIpType, mask: MaskType):
-    result = {}
-    result.update({ 'ip': '{}/{}'.format(IP.IP, mask) })
+    # IPCalc has already checked the address and the mask
+    return SubnetInfo._checked(IP, mask).to_dict()
+
+IPV6_LANES_DTYPE = [('hi', 'u8'), ('lo', 'u8')]
+
+_many_tables = {}
+
+def _calc_many_tables(np, IP_type: str) -> dict:
+    """
+    NumPy copies of MASK_TABLES used by calc_many. They are built
+    the first time a batch of the given type is calculated.
+    """
+    if IP_type in _many_tables:
+        return _many_tables[IP_type]
+
+    infos = MASK_TABLES[IP_type]
+    tables = {}
+
+    if IP_type == Ip.Ipv4.type:
+        tables['class'] = np.array([info.ip_class for info in infos])
+        tables['net'] = np.array([info.net_bits for info in infos], dtype=np.uint32)
+        tables['host'] = np.array([info.host_bits for info in infos], dtype=np.uint32)
+    else:
+        lane = (1 << 64) - 1
+        tables['net'] = np.array([(info.net_bits >> 64, info.net_bits & lane) for info in infos], dtype=np.uint64)
+        tables['host'] = np.array([(info.host_bits >> 64, info.host_bits & lane) for info in infos], dtype=np.uint64)
+
+    _many_tables[IP_type] = tables
+
+    return tables
+
+def calc_many(IPs, masks, IP_type: str = None) -> dict:
+    """
+    Calculates calc for whole arrays of addresses and masks at once, using
+    vectorized NumPy operations. NumPy is only needed by this function.
+
+    IPv4 addresses are passed as integers (uint32). IPv6 addresses are passed
+    as a (n, 2) uint64 array with the high and low 64 bits of each address,
+    or as a structured array with the uint64 fields 'hi' and 'lo'
+    (IPV6_LANES_DTYPE). The addresses in the result have the same layout
+    as the ones passed.
+
+    The result has the same keys as calc, with one array per field (a tuple
+    of arrays for 'ip', 'range' and 'usable_range'). The usable range is a
+    masked array, masked where calc returns the empty address.
+
+    Ex:
+        result = calc_many(np.array([0x0a000401], dtype=np.uint32), [10])
+        result['net_address'] == array([0x0a000000])
+
+    :param IPs: Array of addresses
+    :param masks (int, [int]): Array of masks, or a single mask for every address
+    :param IP_type (str): 'ipv4' or 'ipv6'. If not passed, it is taken from the layout of IPs
+    """
+    import numpy as np
+
+    IPs = np.asarray(IPs)
+    if IP_type is None:
+        IP_type = Ip.Ipv6.type if (IPs.dtype.names or IPs.ndim == 2) else Ip.Ipv4.type
+
+    IP = Ip.Ipv4 if IP_type == Ip.Ipv4.type else Ip.Ipv6
+    if IP_type != IP.type:
+        raise ValueError("Type '{}' is not a supported IP type!".format(IP_type))
+
+    masks = np.broadcast_to(np.asarray(masks), (len(IPs),))
+    if masks.size:
+        for mask in (masks.min(), masks.max()):
+            mask_result(int(mask), IP.type)
+
+    masks = masks.astype(np.intp)
+    tables = _calc_many_tables(np, IP.type)
+    empty = masks >= IP.tbits - 1
 
     if IP.type == Ip.Ipv4.type:
-        result.update({ 'broadcast': broadcast(IP, mask).IP })
-        result.update({ 'class': ip_class(mask) })
-        result.update({ 'usable_range': tuple([ip.IP for ip in ip_usable_range(IP, mask)]) })
-    
-    result.update({ 'net_address': net_address(IP, mask).IP })
-    result.update({ 'range': tuple([ip.IP for ip in ip_range(IP, mask)]) })
-    result.update({ 'usable_range': tuple([ip.IP for ip in ip_usable_range(IP, mask)]) })
-    result.update({ 'wildcard_mask': wildcard_mask(mask, IP).IP })
-    result.update({ 'subnet_mask': subnet_mask(mask, IP).IP })
+        if IPs.dtype != np.uint32:
+            if IPs.size and ((IPs.min() < 0) or (IPs.max() >= IP.thosts)):
+                raise Ip.Ipv4Exception(IPs.max() if IPs.max() >= IP.thosts else IPs.min())
+
+            IPs = IPs.astype(np.uint32)
+
+        netmask = tables['net'][masks]
+        wildcard = tables['host'][masks]
+        net = IPs & netmask
+        last = net | wildcard
+
+        return {
+            'ip': (IPs, masks),
+            'broadcast': last,
+            'class': tables['class'][masks],
+            'usable_range': (np.ma.masked_array(net + np.uint32(1), mask=empty),
+                             np.ma.masked_array(last - np.uint32(1), mask=empty)),
+            'net_address': net,
+            'range': (net, last),
+            'wildcard_mask': wildcard,
+            'subnet_mask': netmask,
+        }
+
+    if IPs.dtype.names:
+        hi, lo = IPs['hi'].astype(np.uint64), IPs['lo'].astype(np.uint64)
+
+        def pack(hi, lo):
+            lanes = np.empty(len(hi), dtype=IPV6_LANES_DTYPE)
+            lanes['hi'], lanes['lo'] = hi, lo
+            return lanes
+
+        lanes_empty = empty
+    else:
+        hi, lo = IPs[:, 0].astype(np.uint64), IPs[:, 1].astype(np.uint64)
+
+        def pack(hi, lo):
+            return np.stack([hi, lo], axis=1)
+
+        lanes_empty = np.stack([empty, empty], axis=1)
+
+    netmask = tables['net'][masks]
+    wildcard = tables['host'][masks]
+    net_hi, net_lo = hi & netmask[:, 0], lo & netmask[:, 1]
+    last_hi, last_lo = net_hi | wildcard[:, 0], net_lo | wildcard[:, 1]
+    net = pack(net_hi, net_lo)
+    last = pack(last_hi, last_lo)
+
+    # Outside the masked rows the lowest bit of the network address is 0 and
+    # the one of the last address is 1, so there is never a carry between lanes.
+    return {
+        'ip': (pack(hi, lo), masks),
+        'net_address': net,
+        'range': (net, last),
+        'usable_range': (np.ma.masked_array(pack(net_hi, net_lo + np.uint64(1)), mask=lanes_empty),
+                         np.ma.masked_array(pack(last_hi, last_lo - np.uint64(1)), mask=lanes_empty)),
+        'wildcard_mask': pack(wildcard[:, 0], wildcard[:, 1]),
+        'subnet_mask': pack(netmask[:, 0], netmask[:, 1]),
+    }
+
+def calc_many_rows(result: dict):
+    """
+    Generator that turns the columns returned by calc_many back into
+    the dictionaries returned by calc, one per address.
+
+    :param result: Result of calc_many
+    """
+    IP = Ip.Ipv4 if 'class' in result else Ip.Ipv6
+
+    def value(column, i) -> int:
+        if IP.type == Ip.Ipv4.type:
+            return int(column[i])
+
+        if column.dtype.names:
+            return (int(column['hi'][i]) << 64) | int(column['lo'][i])
+
+        return (int(column[i, 0]) << 64) | int(column[i, 1])
+
+    def address(column, i) -> str:
+        return IP.to_str(value(column, i))
+
+    first, last = result['usable_range']
+    IPs, masks = result['ip']
+
+    for i in range(0, len(masks)):
+        row = {}
+        row.update({ 'ip': '{}/{}'.format(address(IPs, i), masks[i]) })
+
+        if IP.type == Ip.Ipv4.type:
+            row.update({ 'broadcast': address(result['broadcast'], i) })
+            row.update({ 'class': str(result['class'][i]) })
+            row.update({ 'usable_range': None })
+
+        if masks[i] >= IP.tbits - 1:
+            usable_range = (IP.EMPTY, IP.EMPTY)
+        else:
+            usable_range = (address(first.data, i), address(last.data, i))
+
+        row.update({ 'net_address': address(result['net_address'], i) })
+        row.update({ 'range': tuple([address(column, i) for column in result['range']]) })
+        row.update({ 'usable_range': usable_range })
+        row.update({ 'wildcard_mask': address(result['wildcard_mask'], i) })
+        row.update({ 'subnet_mask': address(result['subnet_mask'], i) })
+
+        yield row
+
+def range_cidrs_many(firsts, lasts, IP_type: str = None):
+    """
+    Calculates range_cidrs for whole arrays of ranges at once. NumPy is
+    only needed by this function.
+
+    The addresses are passed as in calc_many: integers (uint32) for IPv4,
+    and (n, 2) uint64 arrays or structured arrays (IPV6_LANES_DTYPE) for
+    IPv6. Returns the network addresses and masks of every prefix, one
+    range after the other, and the offsets where the prefixes of each
+    range start: those of the range i are nets[offsets[i]:offsets[i + 1]].
+
+    IPv4 ranges are split with vectorized operations, one prefix of every
+    range per step. IPv6 ranges are split one by one with Python integers.
+
+    Ex:
+        nets, masks, offsets = range_cidrs_many(np.array([0x0a000001], dtype=np.uint32),
+                                                np.array([0x0a000006], dtype=np.uint32))
+        masks == array([32, 31, 31, 32]), offsets == array([0, 4])
+
+    :param firsts: Array of first addresses
+    :param lasts: Array of last addresses
+    :param IP_type (str): 'ipv4' or 'ipv6'. If not passed, it is taken from the layout of firsts
+    """
+    import numpy as np
+
+    firsts, lasts = np.asarray(firsts), np.asarray(lasts)
+    if IP_type is None:
+        IP_type = Ip.Ipv6.type if (firsts.dtype.names or firsts.ndim == 2) else Ip.Ipv4.type
+
+    if IP_type == Ip.Ipv4.type:
+        start, end = firsts.astype(np.int64), lasts.astype(np.int64)
+        if start.size:
+            # The value reported is the one that is out of the address space
+            low, high = int(min(start.min(), end.min())), int(max(start.max(), end.max()))
+            if low < 0 or high >= Ip.Ipv4.thosts:
+                raise Ip.Ipv4Exception(low if low < 0 else high)
+
+        if (start > end).any():
+            raise ValueError("The range {} ends before it starts!".format(int(np.argmax(start > end))))
+
+        pending = np.arange(len(start))
+        steps = []
+
+        while len(pending):
+            current, last = start[pending], end[pending]
+
+            # Trailing zeros of the start (all of them for 0) and bits of the range size
+            aligned = np.where(current == 0, Ip.Ipv4.tbits, np.frexp(current & -current)[1] - 1)
+            bits = np.minimum(aligned, np.frexp(last - current + 1)[1] - 1).astype(np.int64)
+            steps.append((pending, current, Ip.Ipv4.tbits - bits))
+
+            current = current + np.left_shift(np.int64(1), bits)
+            start[pending] = current
+            pending = pending[current <= last]
+
+        ranges = np.concatenate([step[0] for step in steps]) if steps else np.zeros(0, dtype=np.intp)
+        nets = np.concatenate([step[1] for step in steps]) if steps else np.zeros(0, dtype=np.int64)
+        masks = np.concatenate([step[2] for step in steps]) if steps else np.zeros(0, dtype=np.int64)
+
+        # The steps are in order, so a stable sort by range keeps the prefixes of each range in order
+        order = np.argsort(ranges, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(ranges, minlength=len(firsts)))])
+
+        return (nets[order].astype(np.uint32), masks[order].astype(np.uint8), offsets.astype(np.intp))
+
+    if IP_type != Ip.Ipv6.type:
+        raise ValueError("Type '{}' is not a supported IP type!".format(IP_type))
+
+    def values(IPs) -> [int]:
+        if IPs.dtype.names:
+            return [(int(hi) << 64) | int(lo) for hi, lo in zip(IPs['hi'], IPs['lo'])]
+
+        return [(int(hi) << 64) | int(lo) for hi, lo in IPs]
+
+    nets, masks, offsets = [], [], [0]
+    lane = (1 << 64) - 1
+
+    for first, last in zip(values(firsts), values(lasts)):
+        if first > last:
+            raise ValueError("The range {} ends before it starts!".format(len(offsets) - 1))
+
+        for net, mask in range_cidr_values(first, last, Ip.Ipv6.tbits):
+            nets.append((net >> 64, net & lane))
+            masks.append(mask)
+
+        offsets.append(len(masks))
+
+    nets = np.array(nets, dtype=np.uint64).reshape(-1, 2)
+    if firsts.dtype.names:
+        lanes = np.empty(len(nets), dtype=IPV6_LANES_DTYPE)
+        lanes['hi'], lanes['lo'] = nets[:, 0], nets[:, 1]
+        nets = lanes
 
-    return result
+    return (nets, np.array(masks, dtype=np.uint8), np.array(offsets, dtype=np.intp))
@@ -0,0 +1,164 @@
+from collections import deque
+import argparse
+import itertools
+import json
+import csv
+import io
+import os
+import sys
+
+from . import calc
+
+CSV_FIELDS = ['ip', 'net_address', 'broadcast', 'class', 'range_first', 'range_last',
+              'usable_first', 'usable_last', 'wildcard_mask', 'subnet_mask']
+
+def calc_line(line: str) -> dict:
+    """
+    Runs calc.calc over a line in the 'IP/mask' form.
+    """
+    IP, sep, mask = line.partition('/')
+    if not sep:
+        raise ValueError("The value '{}' is not in the 'IP/mask' form!".format(line))
+
+    return calc.calc(IP.strip(), int(mask))
+
+def csv_row(result: dict) -> list:
+    return [result['ip'], result['net_address'], result.get('broadcast', ''), result.get('class', ''),
+            result['range'][0], result['range'][1], result['usable_range'][0], result['usable_range'][1],
+            result['wildcard_mask'], result['subnet_mask']]
+
+def calc_chunk(start: int, lines: [str], output_format: str) -> (str, [str]):
+    """
+    Calculates a chunk of lines and returns them already formatted, together
+    with the errors found. 'start' is the number of the first line of the chunk.
+    """
+    out = io.StringIO()
+    errors = []
+    writer = csv.writer(out, lineterminator='\n') if output_format == 'csv' else None
+
+    for i, line in enumerate(lines, start):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        try:
+            result = calc_line(line)
+        except Exception as e:
+            errors.append('line {}: {}'.format(i, e))
+            continue
+
+        if writer:
+            writer.writerow(csv_row(result))
+        else:
+            out.write(json.dumps(result))
+            out.write('\n')
+
+    return (out.getvalue(), errors)
+
+def read_lines(files: [str], stdin):
+    for name in files or ['-']:
+        if name == '-':
+            yield from stdin
+            continue
+
+        with open(name, 'r', buffering=1 << 20) as f:
+            yield from f
+
+def chunks(lines, size: int):
+    lines = iter(lines)
+    start = 1
+
+    while True:
+        chunk = list(itertools.islice(lines, size))
+        if not chunk:
+            return
+
+        yield (start, chunk)
+        start += len(chunk)
+
+def run_pool(chunks_, output_format: str, jobs: int, ordered: bool):
+    """
+    Generator of calculated chunks. At most two chunks per process are
+    in flight, so memory does not depend on the size of the input.
+    """
+    # Only imported here, multiprocessing is slow to import and most runs do not need it
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    with ProcessPoolExecutor(jobs) as pool:
+        pending = deque()
+
+        for start, lines in chunks_:
+            pending.append(pool.submit(calc_chunk, start, lines, output_format))
+
+            if len(pending) < jobs * 2:
+                continue
+
+            if ordered:
+                yield pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+
+        while pending:
+            yield pending.popleft().result()
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m netcalc',
+                                     description="Calculates every 'IP/mask' line read from the files (or stdin).")
+    parser.add_argument('files', nargs='*', help="files to read, '-' for stdin (default)")
+    parser.add_argument('-f', '--format', choices=['jsonl', 'csv'], default='jsonl', help='output format (default: jsonl)')
+    parser.add_argument('-o', '--output', help='file to write to (default: stdout)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of processes, 0 for one per CPU (default: 1, no pool)')
+    parser.add_argument('-c', '--chunk-size', type=int, default=10000, help='lines per chunk (default: 10000)')
+    parser.add_argument('-u', '--unordered', action='store_true', help='write chunks as soon as they are ready')
+    parser.add_argument('--socket', help='instead of reading files, serve JSON lines requests on this UNIX socket')
+    parser.add_argument('--port', type=int, help='instead of reading files, serve JSON lines requests on this TCP port')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on with --port (default: 127.0.0.1)')
+
+    return parser
+
+def main(argv: [str] = None, stdin = None, stdout = None, stderr = None) -> int:
+    args = parser().parse_args(argv)
+    stdin = stdin or sys.stdin
+    stderr = stderr or sys.stderr
+    jobs = args.jobs or os.cpu_count()
+
+    if args.chunk_size < 1 or jobs < 1:
+        stderr.write('netcalc: --jobs and --chunk-size must be positive\n')
+        return 2
+
+    if args.socket or args.port is not None:
+        from . import server
+
+        server.serve(args.socket, args.host, args.port or 0)
+        return 0
+
+    out = stdout or sys.stdout
+    if args.output:
+        out = open(args.output, 'w', newline='')
+
+    try:
+        if args.format == 'csv':
+            csv.writer(out, lineterminator='\n').writerow(CSV_FIELDS)
+
+        chunks_ = chunks(read_lines(args.files, stdin), args.chunk_size)
+        if jobs == 1:
+            results = (calc_chunk(start, lines, args.format) for start, lines in chunks_)
+        else:
+            results = run_pool(chunks_, args.format, jobs, not args.unordered)
+
+        failed = False
+        for text, errors in results:
+            out.write(text)
+
+            for error in errors:
+                stderr.write('netcalc: {}\n'.format(error))
+                failed = True
+    finally:
+        if args.output:
+            out.close()
+
+    return 1 if failed else 0
@@ -15,3 +15,9 @@ IPV4_CLASS_B_END = 16
 IPV4_CLASS_C_END = 32
 
 EMPTY_IP = "NAN"
+
+MIN_IPV4_MASK = 0
+MAX_IPV4_MASK = 32
+
+MIN_IPV6_MASK = 0
+MAX_IPV6_MASK = 128
@@ -0,0 +1,236 @@
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from operator import itemgetter
+
+from .nettypes import *
+from . import calc
+from . import subnet
+from . import prefixfile
+from . import Ip
+
+# 'kind' is 'added', 'removed', 'changed', 'split' or 'merged'. 'old' and 'new'
+# are the prefix (as subnet object) on each side, None for the side of an added
+# or removed prefix, and 'old_value' and 'new_value' their values. For 'split',
+# 'new' and 'new_value' are tuples with the prefixes that cover the old one and
+# their values; for 'merged', 'old' and 'old_value' are the tuples instead.
+Change = namedtuple('Change', ['kind', 'old', 'new', 'old_value', 'new_value'])
+
+# Position of each IP type in the order of the keys (IPv4 first)
+TYPE_ORDER = {Ip.Ipv4.type: 0, Ip.Ipv6.type: 1}
+TYPE_CLASSES = ((Ip.Ipv4, subnet.Ipv4), (Ip.Ipv6, subnet.Ipv6))
+
+# (mask, network bits, host bits) of every mask, by IP type and mask as written in 'IP/mask'
+MASK_STRINGS = {IP_type: {str(info.mask): (info.mask, info.net_bits, info.host_bits) for info in table}
+                for IP_type, table in calc.MASK_TABLES.items()}
+
+OLD, NEW = 0, 1
+
+def _key(prefix: GenericIpType) -> (int, int, MaskType, int):
+    """
+    The (type order, network address, mask, last address) of a prefix.
+    'IP/mask' strings are parsed without building any object.
+    """
+    if isinstance(prefix, str) and '/' in prefix:
+        IP, mask = prefix.split('/', 1)
+        IP_type, value = Ip.parse(IP)
+        bits = MASK_STRINGS[IP_type].get(mask)
+
+        if bits is not None:
+            mask, net_bits, host_bits = bits
+            return (TYPE_ORDER[IP_type], value & net_bits, mask, (value & net_bits) | host_bits)
+
+    IP, net, mask = subnet.prefix_value(prefix)
+    return (TYPE_ORDER[IP.type], net, mask, net | calc.host_bits(mask, IP))
+
+def _entries(prefixes) -> [(int, int, MaskType, int, any)]:
+    """
+    The (type order, network address, mask, last address, value) of every
+    prefix, sorted by type, address and then from the shortest mask. When
+    a prefix is repeated, the last value is kept.
+    """
+    if isinstance(prefixes, prefixfile.PrefixFile):
+        entries = _file_entries(prefixes)
+    else:
+        if hasattr(prefixes, 'items'):
+            pairs = prefixes.items()
+        else:
+            pairs = [item if isinstance(item, (tuple, list)) else (item, None) for item in prefixes]
+
+        entries = [_key(prefix) + (value,) for prefix, value in pairs]
+
+    # The sort is stable, so the last of the repeated prefixes is the last one kept
+    entries.sort(key=itemgetter(0, 1, 2))
+    unique = []
+    for entry in entries:
+        if unique and unique[-1][:3] == entry[:3]:
+            unique[-1] = entry
+        else:
+            unique.append(entry)
+
+    return unique
+
+def _file_entries(prefixes: prefixfile.PrefixFile) -> [(int, int, MaskType, int, any)]:
+    """
+    The entries of a prefix file, taken from its arrays instead of
+    building a subnet object for every prefix.
+    """
+    order = TYPE_ORDER[prefixes.IP.type]
+    masks = prefixes.masks.tolist()
+    values = prefixes.values.tolist() if prefixes.values is not None else [None] * len(masks)
+
+    if prefixes.IP.type == Ip.Ipv4.type:
+        addresses = prefixes.addresses.tolist()
+    else:
+        addresses = [(high << 64) | low for high, low in zip(prefixes.addresses['hi'].tolist(),
+                                                              prefixes.addresses['lo'].tolist())]
+
+    table = calc.MASK_TABLES[prefixes.IP.type]
+    entries = []
+    for address, mask, value in zip(addresses, masks, values):
+        net = address & table[mask].net_bits
+        entries.append((order, net, mask, net | table[mask].host_bits, value))
+
+    return entries
+
+def _prefix(entry: tuple) -> IPType:
+    return TYPE_CLASSES[entry[0]][1].from_int(entry[1], entry[2])
+
+def _tiling(container: tuple, entries: [tuple], nets: [int], used: set) -> [int]:
+    """
+    Indexes of the prefixes of 'entries' (sorted as in _entries, with
+    their network addresses in 'nets') that are not used, are inside the
+    container and not inside each other, if there are two or more of them
+    and they cover exactly the addresses of the container. Otherwise an
+    empty list.
+    """
+    order, net, mask, last = container[:4]
+    tiles = []
+    covered = net - 1
+
+    for i in range(bisect_left(nets, net), bisect_right(nets, last)):
+        if i in used or entries[i][2] <= mask:
+            continue
+
+        # Prefixes do not partially overlap, so the ones that start inside
+        # the last tile are inside it
+        if entries[i][1] <= covered:
+            continue
+
+        if entries[i][1] != covered + 1:
+            return []
+
+        tiles.append(i)
+        covered = entries[i][3]
+
+    return tiles if len(tiles) > 1 and covered == last else []
+
+def _resolve(cluster: [tuple]) -> [Change]:
+    """
+    Changes between the unmatched prefixes of a cluster (prefixes of
+    both sides that overlap, one after another). An old prefix covered
+    exactly by new ones is split, a new prefix covered exactly by old ones
+    is a merge, and anything else is added or removed.
+    """
+    sides = ([entry for entry in cluster if entry[5] == OLD], [entry for entry in cluster if entry[5] == NEW])
+    nets = ([entry[1] for entry in sides[OLD]], [entry[1] for entry in sides[NEW]])
+    used = (set(), set())
+    found = []
+
+    for side, other, kind in ((OLD, NEW, 'split'), (NEW, OLD, 'merged')):
+        for i, entry in enumerate(sides[side]):
+            if i in used[side]:
+                continue
+
+            tiles = _tiling(entry, sides[other], nets[other], used[other])
+            if not tiles:
+                continue
+
+            used[side].add(i)
+            used[other].update(tiles)
+            prefixes = tuple([_prefix(sides[other][j]) for j in tiles])
+            values = tuple([sides[other][j][4] for j in tiles])
+
+            if kind == 'split':
+                found.append((entry[:3], Change(kind, _prefix(entry), prefixes, entry[4], values)))
+            else:
+                found.append((entry[:3], Change(kind, prefixes, _prefix(entry), values, entry[4])))
+
+    for side, kind in ((OLD, 'removed'), (NEW, 'added')):
+        for i, entry in enumerate(sides[side]):
+            if i in used[side]:
+                continue
+
+            if side == OLD:
+                found.append((entry[:3], Change(kind, _prefix(entry), None, entry[4], None)))
+            else:
+                found.append((entry[:3], Change(kind, None, _prefix(entry), None, entry[4])))
+
+    found.sort(key=itemgetter(0))
+    return [change for key, change in found]
+
+def diff(old, new):
+    """
+    Generator of the changes between two collections of prefixes (for
+    example, yesterday's and today's routing table), with or without
+    values attached to them.
+
+    Both sides are turned into sorted integer keys and then walked once
+    together. A prefix on both sides is reported as 'changed' if its value
+    is not the same, and nothing else is kept for it. The prefixes found
+    on one side only are grouped while they overlap, and each group is
+    resolved when the walk leaves it: an old prefix replaced by new
+    prefixes that cover exactly its addresses is a 'split', a new prefix
+    that covers exactly several old ones that were removed is a 'merged',
+    and the rest are 'added' or 'removed'. The changes come out ordered by
+    IP type (IPv4 first) and address, except that a group is reported
+    after the 'changed' prefixes inside it.
+
+    Ex:
+        list(diff({'10.0.0.0/23': 'a', '10.1.0.0/24': 'b', '10.2.0.0/24': 'c'},
+                  {'10.0.0.0/24': 'a', '10.0.1.0/24': 'a', '10.1.0.0/24': 'x'}))
+        == [Change('split', subnet.Ipv4('10.0.0.0/23'), (subnet.Ipv4('10.0.0.0/24'), subnet.Ipv4('10.0.1.0/24')),
+                   'a', ('a', 'a')),
+            Change('changed', subnet.Ipv4('10.1.0.0/24'), subnet.Ipv4('10.1.0.0/24'), 'b', 'x'),
+            Change('removed', subnet.Ipv4('10.2.0.0/24'), None, 'c', None)]
+
+    :param old: Prefixes before the change: subnet objects or 'IP/mask' strings, (prefix, value) pairs,
+                or a mapping of prefixes to values (a dict, table.PrefixTable...). A prefixfile.PrefixFile
+                is read from its arrays
+    :param new: Prefixes after the change, in any of the same forms
+    """
+    old, new = _entries(old), _entries(new)
+    i = j = 0
+    cluster = []
+    cluster_end = None
+
+    while i < len(old) or j < len(new):
+        if i < len(old) and j < len(new) and old[i][:3] == new[j][:3]:
+            # The group before the prefix is reported first, to keep the order
+            if cluster and (old[i][0] != cluster[0][0] or old[i][1] > cluster_end):
+                yield from _resolve(cluster)
+                cluster = []
+
+            if old[i][4] != new[j][4]:
+                yield Change('changed', _prefix(old[i]), _prefix(new[j]), old[i][4], new[j][4])
+
+            i += 1
+            j += 1
+            continue
+
+        if j == len(new) or (i < len(old) and old[i][:3] < new[j][:3]):
+            entry = old[i] + (OLD,)
+            i += 1
+        else:
+            entry = new[j] + (NEW,)
+            j += 1
+
+        if cluster and (entry[0] != cluster[0][0] or entry[1] > cluster_end):
+            yield from _resolve(cluster)
+            cluster = []
+
+        if not cluster or entry[3] > cluster_end:
+            cluster_end = entry[3]
+
+        cluster.append(entry)
+
+    yield from _resolve(cluster)
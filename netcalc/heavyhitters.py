@@ -0,0 +1,339 @@
+from collections import Counter
+from heapq import heapify, heappush, heapreplace, nlargest
+import math
+from operator import itemgetter
+
+from .nettypes import *
+from . import calc
+from . import subnet
+from . import Ip
+
+# Prefix lengths counted by default
+IPV4_MASKS = tuple(range(8, 33))
+IPV6_MASKS = tuple(range(16, 129, 4))
+
+class SpaceSaving:
+    """
+    Space-Saving summary of the most frequent keys of a stream, with at
+    most 'capacity' counters. When a new key arrives and every counter
+    is in use, the key with the smallest count is replaced and the new
+    one inherits its count (kept as the error of the new key). Counts
+    are never under estimated, and over estimated by at most
+    total / capacity, so every key seen more often than that is kept.
+
+    The smallest counter is found with a heap that is only fixed lazily,
+    when its top turns out to be out of date.
+
+    Ex:
+        summary = SpaceSaving(2)
+        for key in 'abacad':
+            summary.add(key)
+        summary.top(1) == [('a', 3, 0)]
+    """
+
+    __slots__ = ('capacity', 'total', 'counts', 'errors', '_heap')
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("The capacity of the summary must be at least 1, not {}".format(capacity))
+
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        # (count, key) of every key in counts. The count in the heap can be
+        # lower than the current one, never higher.
+        self._heap = []
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, key, count: int = 1):
+        counts = self.counts
+        self.total += count
+
+        if key in counts:
+            counts[key] += count
+            return
+
+        if len(counts) < self.capacity:
+            counts[key] = count
+            self.errors[key] = 0
+            heappush(self._heap, (count, key))
+            return
+
+        heap = self._heap
+        while True:
+            smallest, other = heap[0]
+            current = counts[other]
+            if smallest == current:
+                break
+
+            heapreplace(heap, (current, other))
+
+        del counts[other]
+        del self.errors[other]
+
+        counts[key] = smallest + count
+        self.errors[key] = smallest
+        heapreplace(heap, (smallest + count, key))
+
+    def update(self, counts: dict):
+        """
+        Adds the exact counts of a batch of keys at once. Keys not in the
+        summary start from its smallest count, as in add, and then only the
+        'capacity' highest counters are kept. The error bound is the same
+        as when the keys are added one by one, at the cost of one sort per
+        batch instead of one eviction per key.
+
+        :param counts (dict): Count of every key of the batch
+        """
+        current, errors = self.counts, self.errors
+        smallest = min(current.values()) if len(current) == self.capacity else 0
+        self.total += sum(counts.values())
+
+        for key, count in counts.items():
+            if key in current:
+                current[key] += count
+            else:
+                current[key] = smallest + count
+                errors[key] = smallest
+
+        if len(current) > self.capacity:
+            kept = sorted(current.items(), key=itemgetter(1), reverse=True)[:self.capacity]
+            self.counts = dict(kept)
+            self.errors = {key: errors[key] for key, count in kept}
+
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapify(self._heap)
+
+    def items(self):
+        """
+        Generator of the (key, count, error) of every counter. The real
+        count of the key is between count - error and count.
+        """
+        errors = self.errors
+        for key, count in self.counts.items():
+            yield (key, count, errors[key])
+
+    def top(self, k: int) -> [(any, int, int)]:
+        """
+        The k (key, count, error) with the highest counts.
+        """
+        return nlargest(k, self.items(), key=lambda item: item[1])
+
+class HeavyHitters:
+    """
+    Bounded memory aggregation of a stream of addresses into the prefixes
+    that hold them, at every prefix length in 'masks4' (IPv4) and
+    'masks6' (IPv6). Each prefix length has its own SpaceSaving summary
+    of ceil(1 / epsilon) counters, so the count of a prefix is over
+    estimated by at most epsilon times the addresses of its type, and
+    every prefix with more than that is kept.
+
+    Addresses are counted in batches: the batch is counted exactly at
+    the longest prefix length first and then rolled up, one length after
+    another, and each summary takes the counts of the whole batch at once
+    (SpaceSaving.update) instead of one address at a time.
+
+    Ex:
+        hitters = HeavyHitters(epsilon=0.001)
+        hitters.update(addresses)               # strings, integers or Ip objects
+        hitters.top(10, 24)                     # the 10 busiest /24
+        hitters.heavy(0.05)                     # every prefix with 5% of the addresses or more
+        hitters.heavy(0.05, hierarchical=True)  # ... not counting the heavy prefixes inside it
+
+    :param epsilon (float): Error bound of the counts, as a fraction of the addresses of each type
+    :param masks4 ([int]): IPv4 prefix lengths to count
+    :param masks6 ([int]): IPv6 prefix lengths to count
+    :param batch_size (int): Addresses counted together by update
+    """
+
+    def __init__(self, epsilon: float = 0.001, masks4: [MaskType] = IPV4_MASKS, masks6: [MaskType] = IPV6_MASKS,
+                 batch_size: int = 8192):
+        if not 0 < epsilon < 1:
+            raise ValueError("The error bound must be between 0 and 1, not {}".format(epsilon))
+
+        self.epsilon = epsilon
+        self.capacity = math.ceil(1 / epsilon)
+        self.batch_size = batch_size
+        self.total = {Ip.Ipv4.type: 0, Ip.Ipv6.type: 0}
+        self._levels = {}
+
+        for IP, masks in ((Ip.Ipv4, masks4), (Ip.Ipv6, masks6)):
+            masks = sorted(set([calc.mask_result(mask, IP.type) for mask in masks]), reverse=True)
+            self._levels[IP.type] = [(mask, calc.net_bits(mask, IP), SpaceSaving(self.capacity)) for mask in masks]
+
+    def masks(self, IP: IPType = Ip.Ipv4) -> [MaskType]:
+        return sorted([mask for mask, bits, summary in self._levels[IP.type]])
+
+    def add(self, IP: GenericIpType | int, count: int = 1, IP_class: IPType = Ip.Ipv4):
+        """
+        Counts one address (count times).
+
+        :param IP (str, int, Ip.Ipv4, Ip.Ipv6): Address
+        :param count (int): Times the address is counted
+        :param IP_class (Ip.Ipv4, Ip.Ipv6): Type of the address when it is passed as an integer
+        """
+        IP_type, value = self._value(IP, IP_class)
+        self.total[IP_type] += count
+
+        for mask, bits, summary in self._levels[IP_type]:
+            summary.add(value & bits, count)
+
+    def update(self, addresses, IP_class: IPType = Ip.Ipv4):
+        """
+        Counts every address of an iterable (a generator, for example),
+        in batches of batch_size addresses.
+
+        :param addresses: Addresses as strings, integers or Ip objects
+        :param IP_class (Ip.Ipv4, Ip.Ipv6): Type of the addresses passed as integers
+        """
+        batch = {Ip.Ipv4.type: Counter(), Ip.Ipv6.type: Counter()}
+        pending = 0
+
+        for IP in addresses:
+            if isinstance(IP, str):
+                IP_type, value = Ip.parse(IP)
+            elif isinstance(IP, (Ip.Ipv4, Ip.Ipv6)):
+                IP_type, value = IP.type, int(IP)
+            else:
+                IP_type, value = IP_class.type, int(IP)
+
+            batch[IP_type][value] += 1
+            pending += 1
+
+            if pending == self.batch_size:
+                self._flush(batch)
+                pending = 0
+
+        self._flush(batch)
+
+    def _flush(self, batch: dict):
+        for IP_type, counts in batch.items():
+            if not counts:
+                continue
+
+            IP = Ip.Ipv4 if IP_type == Ip.Ipv4.type else Ip.Ipv6
+            if min(counts) < 0 or max(counts) >= IP.thosts:
+                IP.from_int(min(counts) if min(counts) < 0 else max(counts))
+
+            self.total[IP_type] += sum(counts.values())
+
+            # Every length is rolled up from the previous (longer) one
+            for mask, bits, summary in self._levels[IP_type]:
+                rolled = {}
+                for value, count in counts.items():
+                    value &= bits
+                    rolled[value] = rolled.get(value, 0) + count
+
+                summary.update(rolled)
+                counts = rolled
+
+            batch[IP_type] = Counter()
+
+    @staticmethod
+    def _value(IP: GenericIpType | int, IP_class: IPType) -> (str, int):
+        if isinstance(IP, str):
+            return Ip.parse(IP)
+
+        if isinstance(IP, (Ip.Ipv4, Ip.Ipv6)):
+            return (IP.type, int(IP))
+
+        return (IP_class.type, IP_class.from_int(int(IP)).value)
+
+    def _summary(self, mask: MaskType, IP: IPType) -> SpaceSaving:
+        for level, bits, summary in self._levels[IP.type]:
+            if level == mask:
+                return summary
+
+        raise ValueError("The /{} {} prefixes are not counted".format(mask, IP.type))
+
+    @staticmethod
+    def _subnet(IP: IPType, net: int, mask: MaskType) -> IPType:
+        if IP.type == Ip.Ipv4.type:
+            return subnet.Ipv4.from_int(net, mask)
+
+        return subnet.Ipv6.from_int(net, mask)
+
+    def count(self, prefix: GenericIpType) -> (int, int):
+        """
+        Returns the (count, error) of a prefix. Prefixes that are not in
+        the summary of their length get its smallest possible error bound.
+
+        :param prefix (str, subnet.Ipv4, subnet.Ipv6): Prefix of one of the counted lengths
+        """
+        IP, net, mask = subnet.prefix_value(prefix)
+        summary = self._summary(mask, IP)
+
+        if net in summary.counts:
+            return (summary.counts[net], summary.errors[net])
+
+        # Anything that is not kept has at most the smallest count
+        smallest = min(summary.counts.values()) if len(summary) == summary.capacity else 0
+        return (smallest, smallest)
+
+    def top(self, k: int = 10, mask: MaskType = None, IP: IPType = Ip.Ipv4) -> [(IPType, int, int)]:
+        """
+        The k prefixes with the highest counts, as (prefix, count, error)
+        tuples. The real count of a prefix is between count - error and count.
+
+        :param k (int): Number of prefixes
+        :param mask (int): Prefix length. If not passed, the k highest of every counted length
+        :param IP (Ip.Ipv4, Ip.Ipv6): Type of the prefixes
+        """
+        levels = [(level, summary) for level, bits, summary in self._levels[IP.type] if mask in (None, level)]
+        if not levels:
+            raise ValueError("The /{} {} prefixes are not counted".format(mask, IP.type))
+
+        candidates = [(net, level, count, error) for level, summary in levels
+                      for net, count, error in summary.top(k)]
+        best = nlargest(k, candidates, key=lambda item: (item[2], item[1]))
+
+        return [(self._subnet(IP, net, level), count, error) for net, level, count, error in best]
+
+    def heavy(self, threshold: float, IP: IPType = Ip.Ipv4, hierarchical: bool = False) -> [(IPType, int, int)]:
+        """
+        Every prefix whose count reaches the threshold, as (prefix, count,
+        error) tuples ordered by address and length. Since the counts are
+        never under estimated, no prefix that really reaches the threshold
+        is missed, as long as the threshold is above epsilon.
+
+        With 'hierarchical', the heavy prefixes found inside a prefix are
+        not counted in it (hierarchical heavy hitters): a prefix is only
+        reported if, without them, it still reaches the threshold. The
+        count returned is then the discounted one.
+
+        :param threshold (float): Minimum count, or minimum fraction of the addresses of the type if below 1
+        :param IP (Ip.Ipv4, Ip.Ipv6): Type of the prefixes
+        :param hierarchical (bool): Discount the heavy prefixes inside each prefix
+        """
+        if threshold < 1:
+            threshold *= self.total[IP.type]
+
+        found = []
+        # The reported prefixes not inside another reported one, as (net, last address, count)
+        frontier = []
+
+        for mask, bits, summary in self._levels[IP.type]:
+            level = []
+            host_bits = calc.host_bits(mask, IP)
+
+            for net, count, error in summary.items():
+                if count < threshold:
+                    continue
+
+                if hierarchical:
+                    inside = [item for item in frontier if net <= item[0] and item[1] <= net | host_bits]
+                    count -= sum([item[2] for item in inside])
+                    if count < threshold:
+                        continue
+
+                    frontier = [item for item in frontier if not (net <= item[0] and item[1] <= net | host_bits)]
+                    level.append((net, net | host_bits, count + sum([item[2] for item in inside])))
+
+                found.append((net, mask, count, error))
+
+            frontier.extend(level)
+
+        return [(self._subnet(IP, net, mask), count, error) for net, mask, count, error in sorted(found)]
@@ -0,0 +1,277 @@
+from collections import deque
+import threading
+import tracemalloc
+import json
+import time
+import os
+import sys
+
+from .util import convert
+from . import calc
+from . import Ip
+
+# Functions timed by enable(), by module
+TARGETS = {
+    calc: ['ipv4_mask', 'ipv6_mask', 'mask_result', 'is_supported', 'join_ip', 'mask_info', 'host_bits',
+           'net_bits', 'net_address', 'ip_usable_range', 'broadcast', 'subnet_mask', 'ip_range',
+           'wildcard_mask', 'ip_class', 'host_count', 'calc', 'calc_many'],
+    Ip: ['Ip', 'parse', 'parse_many', 'is_ipv4', 'is_ipv6', 'ip_from_int'],
+    convert: ['bd', 'db', 'bh', 'hb', 'hd', 'dh'],
+}
+
+class InstrumentException(Exception):
+    def __init__(self, message=None):
+        if message:
+            self.message = message
+        else:
+            self.message = "The instrumentation is already enabled"
+
+        super().__init__(self.message)
+
+class Stat:
+    """
+    Measures of one stage: calls, errors, total time, the latencies
+    of the last calls (for the percentiles) and, when memory is traced,
+    the memory allocated by the sampled calls.
+    """
+
+    __slots__ = ('calls', 'errors', 'total', 'latencies', 'samples', 'allocated', 'retained')
+
+    def __init__(self, size: int):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0
+        self.latencies = deque(maxlen=size)
+        self.samples = 0
+        self.allocated = 0
+        self.retained = 0
+
+    def add(self, elapsed: int, failed: bool = False):
+        self.calls += 1
+        self.total += elapsed
+        self.latencies.append(elapsed)
+
+        if failed:
+            self.errors += 1
+
+    def to_dict(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(rank: float) -> float:
+            if not latencies:
+                return 0.0
+
+            return latencies[min(len(latencies) - 1, max(0, int(round(rank / 100 * len(latencies))) - 1))] / 1e3
+
+        result = {}
+        result.update({ 'calls': self.calls, 'errors': self.errors })
+        result.update({ 'total_ms': self.total / 1e6, 'mean_us': self.total / max(1, self.calls) / 1e3 })
+        result.update({ 'p50_us': percentile(50), 'p90_us': percentile(90), 'p99_us': percentile(99),
+                        'max_us': latencies[-1] / 1e3 if latencies else 0.0 })
+
+        if self.samples:
+            result.update({ 'memory_samples': self.samples,
+                            'allocated_bytes': self.allocated / self.samples,
+                            'retained_bytes': self.retained / self.samples })
+
+        return result
+
+_state = {'stats': {}, 'originals': [], 'size': 10000, 'memory_every': 0}
+_local = threading.local()
+_dumper = {'thread': None, 'stop': None}
+
+def _stat(name: str) -> Stat:
+    stats = _state['stats']
+    if name not in stats:
+        stats[name] = Stat(_state['size'])
+
+    return stats[name]
+
+def _timed(f, name: str, decorator: str = None):
+    """
+    Returns f wrapped to record its calls in the stage 'name'. For the
+    functions of the calc decorators, the time the decorator spends on
+    its own checks (the whole call minus the timed calls done inside it,
+    like Ip.Ip and the decorated function) is recorded in the stage of
+    the decorator too.
+    """
+    stat = _stat(name)
+    checks = _stat('calc.' + decorator) if decorator else None
+    memory_every = _state['memory_every']
+    clock = time.perf_counter_ns
+
+    def timed(*args, **kwargs):
+        traced = memory_every and stat.calls % memory_every == 0
+        if traced:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+        outer = getattr(_local, 'inner', 0)
+        _local.inner = 0
+        failed = True
+        start = clock()
+
+        try:
+            result = f(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = clock() - start
+            stat.add(elapsed, failed)
+
+            if checks is not None:
+                checks.add(elapsed - _local.inner, failed)
+
+            # Lets the caller know how long its timed calls took
+            _local.inner = outer + elapsed
+
+            if traced:
+                current, peak = tracemalloc.get_traced_memory()
+                stat.samples += 1
+                stat.allocated += peak - before
+                stat.retained += current - before
+
+    return timed
+
+def _module_name(module) -> str:
+    return module.__name__.rpartition('.')[2]
+
+def enabled() -> bool:
+    return bool(_state['originals'])
+
+def enable(memory_every: int = 0, size: int = 10000):
+    """
+    Starts recording the calls to the functions in TARGETS. The functions
+    are replaced in their modules while it is enabled, so when it is not
+    they are called directly and there is nothing to pay.
+
+    :param memory_every (int): Traces the memory of one call every 'memory_every' calls of
+                               each stage, using tracemalloc (0, the default, does not trace it)
+    :param size (int): Number of latencies kept per stage for the percentiles
+    """
+    if enabled():
+        raise InstrumentException()
+
+    _state['size'] = size
+    _state['memory_every'] = memory_every
+
+    if memory_every and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _state['tracemalloc'] = True
+
+    swaps = []
+    try:
+        for module, names in TARGETS.items():
+            for name in names:
+                f = getattr(module, name)
+                stage = '{}.{}'.format(_module_name(module), name)
+                swaps.append((module, name, f))
+
+                decorator = getattr(f, 'decorator', None)
+                if decorator:
+                    # The decorated function itself is timed in the stage '<name>:body'. The
+                    # decorator calls it from its closure, which is swapped so that nothing
+                    # is added to the calls when the instrumentation is disabled.
+                    cell = f.__closure__[f.__code__.co_freevars.index('f')]
+                    swaps.append((cell, 'cell_contents', cell.cell_contents))
+                    cell.cell_contents = _timed(cell.cell_contents, stage + ':body')
+
+                setattr(module, name, _timed(f, stage, decorator))
+    except Exception:
+        # Nothing is left half instrumented
+        while swaps:
+            owner, name, f = swaps.pop()
+            setattr(owner, name, f)
+
+        if _state.pop('tracemalloc', False):
+            tracemalloc.stop()
+
+        raise
+
+    _state['originals'].extend(swaps)
+
+def disable():
+    """
+    Puts the original functions back. The recorded stats are kept.
+    """
+    while _state['originals']:
+        owner, name, f = _state['originals'].pop()
+        setattr(owner, name, f)
+
+    if _state.pop('tracemalloc', False):
+        tracemalloc.stop()
+
+def reset():
+    # The stats are cleared in place, the timed functions keep using them
+    for stat in _state['stats'].values():
+        stat.__init__(_state['size'])
+
+def snapshot() -> dict:
+    """
+    Stats of every stage called since it was enabled (or reset), by name.
+
+    Ex:
+        enable()
+        calc.calc('10.0.4.1', 24)
+        snapshot()['calc.calc'] == {'calls': 1, 'errors': 0, 'total_ms': 0.02, 'mean_us': 20.1, ...}
+    """
+    return {name: stat.to_dict() for name, stat in list(_state['stats'].items()) if stat.calls}
+
+def report(out = sys.stdout):
+    """
+    Writes the stats as a table, the slowest stages (by total time) first.
+    """
+    stats = sorted(snapshot().items(), key=lambda item: item[1]['total_ms'], reverse=True)
+
+    out.write('{:<28} {:>10} {:>12} {:>10} {:>10} {:>10}\n'.format('stage', 'calls', 'total ms', 'mean us',
+                                                                   'p99 us', 'alloc B'))
+    for name, stat in stats:
+        out.write('{:<28} {:>10,} {:>12,.1f} {:>10,.1f} {:>10,.1f} {:>10}\n'.format(
+            name, stat['calls'], stat['total_ms'], stat['mean_us'], stat['p99_us'],
+            '{:,.0f}'.format(stat['allocated_bytes']) if 'allocated_bytes' in stat else ''))
+
+def start_dump(path: str, interval: float = 10.0):
+    """
+    Appends a snapshot to the file every 'interval' seconds, as a JSON
+    line with the time, from a background thread.
+
+    :param path: File to append the snapshots to
+    :param interval (float): Seconds between snapshots
+    """
+    if _dumper['thread'] is not None:
+        raise InstrumentException("The stats are already being dumped")
+
+    stop = threading.Event()
+
+    def dump():
+        while not stop.wait(interval):
+            write_dump(path)
+
+        write_dump(path)
+
+    _dumper['stop'] = stop
+    _dumper['thread'] = threading.Thread(target=dump, name='netcalc-instrument', daemon=True)
+    _dumper['thread'].start()
+
+def stop_dump():
+    """
+    Stops the periodic dump, after writing a last snapshot.
+    """
+    if _dumper['thread'] is None:
+        return
+
+    _dumper['stop'].set()
+    _dumper['thread'].join()
+    _dumper['thread'] = _dumper['stop'] = None
+
+def write_dump(path: str):
+    with open(path, 'a') as f:
+        f.write(json.dumps({'time': time.time(), 'stats': snapshot()}))
+        f.write('\n')
+
+def _enable_from_environ():
+    # Called by the package when NETCALC_INSTRUMENT is set
+    enable()
+
+    if os.environ.get('NETCALC_INSTRUMENT_DUMP'):
+        start_dump(os.environ['NETCALC_INSTRUMENT_DUMP'])
@@ -0,0 +1,245 @@
+from bisect import bisect_right
+from heapq import merge
+
+from .nettypes import *
+from . import calc
+from . import subnet
+from . import Ip
+
+def _interval(item) -> (IPType, int, int):
+    """
+    Returns the IP class and the first and last addresses (as integers)
+    of an address, prefix or range.
+    """
+    if isinstance(item, (tuple, list)):
+        if len(item) != 2:
+            raise ValueError("The range {} does not have a first and a last address!".format(item))
+
+        first, last = Ip.Ip(item[0]), Ip.Ip(item[1])
+        if first.type != last.type:
+            raise ValueError("The range '{} - {}' mixes IP types!".format(first.IP, last.IP))
+
+        if int(first) > int(last):
+            raise ValueError("The range '{} - {}' ends before it starts!".format(first.IP, last.IP))
+
+        IP = Ip.Ipv4 if first.type == Ip.Ipv4.type else Ip.Ipv6
+        return (IP, int(first), int(last))
+
+    if isinstance(item, str):
+        if '-' in item:
+            parts = item.split('-')
+            if len(parts) != 2:
+                raise ValueError("The value '{}' is not in the 'first-last' form!".format(item))
+
+            return _interval(tuple([part.strip() for part in parts]))
+
+        item = subnet.Subnet(item) if '/' in item else Ip.Ip(item)
+
+    IP = Ip.Ipv4 if item.type == Ip.Ipv4.type else Ip.Ipv6
+    mask = getattr(item, 'mask', IP.tbits)
+    net = int(item) & calc.net_bits(mask, IP)
+
+    return (IP, net, net | calc.host_bits(mask, IP))
+
+def _merge(intervals: [(int, int)]) -> ([int], [int]):
+    """
+    Sorts and merges overlapping or adjacent intervals.
+    """
+    return _coalesce(sorted(intervals))
+
+def _coalesce(intervals) -> ([int], [int]):
+    """
+    Merges overlapping or adjacent intervals that are already sorted.
+    """
+    starts, ends = [], []
+
+    for start, end in intervals:
+        if ends and start <= ends[-1] + 1:
+            if end > ends[-1]:
+                ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+
+    return (starts, ends)
+
+class IPSet:
+    """
+    Set of IPv4 and IPv6 addresses, stored as sorted and merged
+    intervals of integers (one list per IP type).
+
+    It can be built from addresses, prefixes (subnet objects or 'IP/mask'
+    strings) and ranges ((first, last) tuples or 'first-last' strings).
+
+    Ex:
+        allowed = IPSet(['10.0.0.0/8', '192.168.1.10-192.168.1.20'])
+        denied = IPSet(['10.1.0.0/16'])
+        '10.2.0.1' in (allowed - denied) == True
+        list((allowed - denied).cidrs())
+    """
+
+    __slots__ = ('_starts', '_ends', '_size')
+
+    def __init__(self, items = None):
+        intervals = {Ip.Ipv4.type: [], Ip.Ipv6.type: []}
+
+        for item in items or []:
+            if isinstance(item, IPSet):
+                for IP_type in intervals:
+                    intervals[IP_type].extend(zip(item._starts[IP_type], item._ends[IP_type]))
+                continue
+
+            IP, start, end = _interval(item)
+            intervals[IP.type].append((start, end))
+
+        starts, ends = {}, {}
+        for IP_type, values in intervals.items():
+            starts[IP_type], ends[IP_type] = _merge(values)
+
+        self._set(starts, ends)
+
+    def _set(self, starts: dict, ends: dict):
+        self._starts = starts
+        self._ends = ends
+        # The lists are never changed afterwards, so the size is only counted once
+        self._size = sum([end - start + 1 for IP_type in starts for start, end in zip(starts[IP_type], ends[IP_type])])
+
+    @classmethod
+    def _from_lists(cls, starts: dict, ends: dict):
+        ip_set = object.__new__(cls)
+        ip_set._set(starts, ends)
+
+        return ip_set
+
+    def __contains__(self, item) -> bool:
+        IP, start, end = _interval(item)
+        starts = self._starts[IP.type]
+
+        i = bisect_right(starts, start) - 1
+
+        return i >= 0 and end <= self._ends[IP.type][i]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IPSet):
+            return NotImplemented
+
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __bool__(self) -> bool:
+        return any(self._starts.values())
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        return self.difference(other)
+
+    def __xor__(self, other):
+        return self.symmetric_difference(other)
+
+    @property
+    def size(self) -> int:
+        """
+        Number of addresses in the set.
+        """
+        return self._size
+
+    def union(self, other):
+        other = other if isinstance(other, IPSet) else IPSet(other)
+        starts, ends = {}, {}
+
+        for IP_type in self._starts:
+            mine = zip(self._starts[IP_type], self._ends[IP_type])
+            theirs = zip(other._starts[IP_type], other._ends[IP_type])
+            # Both lists are sorted already
+            starts[IP_type], ends[IP_type] = _coalesce(merge(mine, theirs))
+
+        return IPSet._from_lists(starts, ends)
+
+    def intersection(self, other):
+        other = other if isinstance(other, IPSet) else IPSet(other)
+        starts, ends = {}, {}
+
+        for IP_type in self._starts:
+            a_starts, a_ends = self._starts[IP_type], self._ends[IP_type]
+            b_starts, b_ends = other._starts[IP_type], other._ends[IP_type]
+            starts[IP_type], ends[IP_type] = [], []
+            i = j = 0
+
+            while i < len(a_starts) and j < len(b_starts):
+                start = max(a_starts[i], b_starts[j])
+                end = min(a_ends[i], b_ends[j])
+
+                if start <= end:
+                    starts[IP_type].append(start)
+                    ends[IP_type].append(end)
+
+                if a_ends[i] < b_ends[j]:
+                    i += 1
+                else:
+                    j += 1
+
+        return IPSet._from_lists(starts, ends)
+
+    def difference(self, other):
+        other = other if isinstance(other, IPSet) else IPSet(other)
+        starts, ends = {}, {}
+
+        for IP_type in self._starts:
+            b_starts, b_ends = other._starts[IP_type], other._ends[IP_type]
+            starts[IP_type], ends[IP_type] = [], []
+            j = 0
+
+            for start, end in zip(self._starts[IP_type], self._ends[IP_type]):
+                while j < len(b_starts) and b_ends[j] < start:
+                    j += 1
+
+                k = j
+                while k < len(b_starts) and b_starts[k] <= end:
+                    if b_starts[k] > start:
+                        starts[IP_type].append(start)
+                        ends[IP_type].append(b_starts[k] - 1)
+
+                    start = b_ends[k] + 1
+                    if b_ends[k] >= end:
+                        break
+
+                    k += 1
+
+                if start <= end:
+                    starts[IP_type].append(start)
+                    ends[IP_type].append(end)
+
+        return IPSet._from_lists(starts, ends)
+
+    def symmetric_difference(self, other):
+        other = other if isinstance(other, IPSet) else IPSet(other)
+
+        return self.difference(other).union(other.difference(self))
+
+    def isdisjoint(self, other) -> bool:
+        return not self.intersection(other)
+
+    def issubset(self, other) -> bool:
+        return not self.difference(other)
+
+    def ranges(self):
+        """
+        Generator of the (first, last) address pairs of the set, IPv4 first.
+        """
+        for IP in (Ip.Ipv4, Ip.Ipv6):
+            for start, end in zip(self._starts[IP.type], self._ends[IP.type]):
+                yield (IP.from_int(start), IP.from_int(end))
+
+    def cidrs(self):
+        """
+        Generator of the minimal list of prefixes (subnet.Ipv4 and
+        subnet.Ipv6) that covers exactly the addresses of the set.
+        """
+        for IP, subnet_class in ((Ip.Ipv4, subnet.Ipv4), (Ip.Ipv6, subnet.Ipv6)):
+            for start, end in zip(self._starts[IP.type], self._ends[IP.type]):
+                for net, mask in calc.range_cidr_values(start, end, IP.tbits):
+                    yield subnet_class.from_int(net, mask)
@@ -1,4 +1,4 @@
-import Ip
+from . import Ip
 
 GenericIpType = str | Ip.Ipv4 | Ip.Ipv6
 IPType = Ip.Ipv4 | Ip.Ipv6
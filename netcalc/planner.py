@@ -0,0 +1,125 @@
+from .nettypes import *
+from . import calc
+from . import subnet
+from . import Ip
+
+class PlanException(Exception):
+    def __init__(self, parent, message=None):
+        if message:
+            self.message = message
+        else:
+            self.message = "The subnet '{}/{}' does not have enough space".format(parent.IP, parent.mask)
+
+        super().__init__(self.message)
+
+def _parent(parent: GenericIpType) -> (IPType, IPType, int, int):
+    """
+    Returns the parent as subnet, its subnet class and its network
+    and broadcast addresses (as integers).
+    """
+    parent = subnet.Subnet(parent)
+    info = calc.MASK_TABLES[parent.type][parent.mask]
+    net = int(parent) & info.net_bits
+    subnet_class = subnet.Ipv4 if parent.type == Ip.Ipv4.type else subnet.Ipv6
+
+    return (parent, subnet_class, net, net | info.host_bits)
+
+def _free(subnet_class: IPType, start: int, end: int) -> [IPType]:
+    return [subnet_class.from_int(net, mask) for net, mask in calc.range_cidr_values(start, end, subnet_class.tbits)]
+
+def mask_for_hosts(hosts: int, IP: IPType = Ip.Ipv4) -> MaskType:
+    """
+    Longest mask whose subnets have at least 'hosts' usable addresses.
+
+    :param hosts: Number of usable addresses needed
+    :param IP (Ip.Ipv4, Ip.Ipv6): IP class the mask refers to
+    """
+    if hosts < 1:
+        raise ValueError("The number of hosts must be positive, not {}".format(hosts))
+
+    # Usable addresses exclude the network and broadcast addresses
+    bits = (hosts + 1).bit_length()
+    if bits > IP.tbits:
+        raise calc.MaskException(IP.tbits - bits, "There is no {} mask with {} usable hosts".format(IP.type, hosts))
+
+    return IP.tbits - bits
+
+def subnets(parent: GenericIpType, mask: MaskType):
+    """
+    Generator of every child subnet of the parent with the given mask.
+
+    Ex:
+        list(subnets('10.0.0.0/24', 26)) == [subnet.Ipv4('10.0.0.0', 26), ..., subnet.Ipv4('10.0.0.192', 26)]
+
+    :param parent (str, subnet.Ipv4, subnet.Ipv6): Parent prefix
+    :param mask (int): Mask of the children
+    """
+    parent, subnet_class, net, last = _parent(parent)
+    calc.mask_result(mask, parent.type)
+
+    if mask < parent.mask:
+        raise calc.MaskException(mask, "The mask {} is shorter than the one of the parent".format(mask))
+
+    step = calc.MASK_TABLES[parent.type][mask].hosts
+    for child in range(net, last + 1, step):
+        yield subnet_class.from_int(child, mask)
+
+def split(parent: GenericIpType, mask: MaskType, count: int) -> ([IPType], [IPType]):
+    """
+    Takes the first 'count' child subnets of the parent with the given mask.
+    Returns them together with the free blocks left in the parent.
+
+    :param parent (str, subnet.Ipv4, subnet.Ipv6): Parent prefix
+    :param mask (int): Mask of the children
+    :param count (int): Number of children to take
+    """
+    parent, subnet_class, net, last = _parent(parent)
+    calc.mask_result(mask, parent.type)
+
+    if mask < parent.mask:
+        raise calc.MaskException(mask, "The mask {} is shorter than the one of the parent".format(mask))
+
+    if count < 0:
+        raise ValueError("The number of subnets can not be negative, not {}".format(count))
+
+    step = calc.MASK_TABLES[parent.type][mask].hosts
+    if count * step > last - net + 1:
+        raise PlanException(parent)
+
+    children = [subnet_class.from_int(child, mask) for child in range(net, net + count * step, step)]
+
+    return (children, _free(subnet_class, net + count * step, last))
+
+def plan(parent: GenericIpType, hosts: [int]) -> ([(int, IPType)], [IPType]):
+    """
+    Allocates one subnet per host requirement inside the parent (VLSM).
+    Each requirement gets the smallest subnet with enough usable addresses,
+    and the subnets are packed from the start of the parent, largest first,
+    so every one of them stays aligned.
+
+    Returns the (hosts, subnet) pairs, in the same order as the requirements,
+    and the free blocks left in the parent.
+
+    Ex:
+        allocated, free = plan('192.168.0.0/24', [100, 50, 10])
+        allocated == [(100, subnet.Ipv4('192.168.0.0', 25)), (50, subnet.Ipv4('192.168.0.128', 26)),
+                      (10, subnet.Ipv4('192.168.0.192', 28))]
+        free == [subnet.Ipv4('192.168.0.208', 28), subnet.Ipv4('192.168.0.224', 27)]
+
+    :param parent (str, subnet.Ipv4, subnet.Ipv6): Parent prefix
+    :param hosts ([int]): Number of usable addresses needed by each subnet
+    """
+    parent, subnet_class, net, last = _parent(parent)
+    masks = [mask_for_hosts(count, subnet_class) for count in hosts]
+
+    allocated = [None] * len(hosts)
+    start = net
+
+    for i in sorted(range(0, len(hosts)), key=lambda i: masks[i]):
+        if masks[i] < parent.mask or start + calc.MASK_TABLES[parent.type][masks[i]].hosts - 1 > last:
+            raise PlanException(parent)
+
+        allocated[i] = (hosts[i], subnet_class.from_int(start, masks[i]))
+        start += calc.MASK_TABLES[parent.type][masks[i]].hosts
+
+    return (allocated, _free(subnet_class, start, last))
@@ -0,0 +1,370 @@
+import struct
+import mmap
+
+from .nettypes import *
+from . import calc
+from . import subnet
+from . import Ip
+
+MAGIC = b'NCPREFIX'
+VERSION = 1
+
+# magic, version, IP version (4 or 6), flags, reserved, count, value dtype
+HEADER = struct.Struct('<8sHBBIQ16s')
+HEADER_SIZE = 64
+ALIGNMENT = 8
+
+FLAG_VALUES = 1
+
+class PrefixFileException(Exception):
+    def __init__(self, path, message=None):
+        if message:
+            self.message = message
+        else:
+            self.message = "The file '{}' is not a valid prefix file!".format(path)
+
+        super().__init__(self.message)
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) & ~(ALIGNMENT - 1)
+
+def _address_dtype(np, IP: IPType):
+    if IP.type == Ip.Ipv4.type:
+        return np.dtype('<u4')
+
+    return np.dtype([('hi', '<u8'), ('lo', '<u8')])
+
+def _layout(np, IP: IPType, count: int, value_dtype) -> dict:
+    """
+    Offsets of the columns in the file. Every column starts aligned to
+    8 bytes, so the mapped arrays can be used without copying.
+    """
+    addresses = HEADER_SIZE
+    masks = _aligned(addresses + count * _address_dtype(np, IP).itemsize)
+    values = _aligned(masks + count)
+    end = values + (count * value_dtype.itemsize if value_dtype is not None else 0)
+
+    return {'addresses': addresses, 'masks': masks, 'values': values, 'end': end}
+
+def _lanes(np, IPs):
+    """
+    Returns the high and low 64 bits of IPv6 addresses given in any
+    of the layouts accepted by calc.calc_many.
+    """
+    if IPs.dtype.names:
+        return (IPs['hi'].astype(np.uint64), IPs['lo'].astype(np.uint64))
+
+    return (IPs[:, 0].astype(np.uint64), IPs[:, 1].astype(np.uint64))
+
+def write_arrays(path: str, IPs, masks, values = None, value_dtype = None, IP_type: str = None) -> int:
+    """
+    Writes arrays of addresses and masks (in the layouts accepted by
+    calc.calc_many) to a prefix file. The host bits of the addresses are
+    cleared and the prefixes are sorted by network address and then by
+    mask. A prefix that is repeated is written once, with the value of
+    the last one. Returns the number of prefixes written.
+
+    :param path: File to write
+    :param IPs: Array of addresses
+    :param masks (int, [int]): Array of masks, or a single mask for every address
+    :param values: Optional array with one value per prefix
+    :param value_dtype: NumPy dtype of the values (default: the one of the values array)
+    :param IP_type (str): 'ipv4' or 'ipv6'. If not passed, it is taken from the layout of IPs
+    """
+    import numpy as np
+
+    result = calc.calc_many(IPs, masks, IP_type)
+    IP = Ip.Ipv4 if 'class' in result else Ip.Ipv6
+    nets, masks = result['net_address'], result['ip'][1].astype(np.uint8)
+
+    if IP.type == Ip.Ipv4.type:
+        order = np.lexsort((masks, nets))
+        keys = (nets[order],)
+    else:
+        hi, lo = _lanes(np, nets)
+        order = np.lexsort((masks, lo, hi))
+        keys = (hi[order], lo[order])
+
+    if values is not None and len(values) != len(order):
+        raise ValueError("There are {} values for {} prefixes!".format(len(values), len(order)))
+
+    # Repeated prefixes are written once. The sort is stable, so the last of
+    # each run of equal prefixes is the last one passed, and its value is kept
+    repeated = np.ones(max(len(order) - 1, 0), dtype=bool)
+    for key in keys + (masks[order],):
+        repeated &= key[1:] == key[:-1]
+
+    keep = np.ones(len(order), dtype=bool)
+    keep[:-1] = ~repeated
+    order = order[keep]
+
+    if IP.type == Ip.Ipv4.type:
+        addresses = nets[order].astype('<u4')
+    else:
+        addresses = np.empty(len(order), dtype=_address_dtype(np, IP))
+        addresses['hi'], addresses['lo'] = hi[order], lo[order]
+
+    masks = masks[order]
+
+    if values is not None:
+        values = np.asarray(values, dtype=value_dtype)[order]
+        value_dtype = values.dtype.newbyteorder('<') if values.dtype.byteorder == '>' else values.dtype
+        if value_dtype.hasobject:
+            raise ValueError("The values must have a fixed size dtype, not '{}'".format(value_dtype))
+
+        values = values.astype(value_dtype)
+        dtype_name = value_dtype.str.encode()
+    else:
+        value_dtype = None
+        dtype_name = b''
+
+    layout = _layout(np, IP, len(masks), value_dtype)
+    header = HEADER.pack(MAGIC, VERSION, 4 if IP.type == Ip.Ipv4.type else 6,
+                         FLAG_VALUES if values is not None else 0, 0, len(masks), dtype_name)
+
+    with open(path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(addresses.tobytes().ljust(layout['masks'] - layout['addresses'], b'\0'))
+        f.write(masks.tobytes().ljust(layout['values'] - layout['masks'], b'\0'))
+
+        if values is not None:
+            f.write(values.tobytes())
+
+    return len(masks)
+
+def write(path: str, prefixes: [GenericIpType], values = None, value_dtype = None) -> int:
+    """
+    Writes prefixes (subnet objects, 'IP/mask' strings or addresses, taken
+    as /32 or /128) to a prefix file. Every prefix must be of the same IP
+    type. Returns the number of prefixes written.
+
+    Ex:
+        write('routes.ncp', ['10.0.0.0/8', '10.1.0.0/16'], values=[1, 2], value_dtype='u4')
+
+    :param path: File to write
+    :param prefixes ([str, subnet.Ipv4, subnet.Ipv6]): Prefixes to write
+    :param values: Optional list with one value per prefix
+    :param value_dtype: NumPy dtype of the values
+    """
+    import numpy as np
+
+    IP_type = None
+    nets, masks = [], []
+
+    for prefix in prefixes:
+        IP, net, mask = subnet.prefix_value(prefix)
+        if IP_type is None:
+            IP_type = IP.type
+        elif IP.type != IP_type:
+            raise ValueError("A prefix file can not mix IP types!")
+
+        nets.append(net)
+        masks.append(mask)
+
+    IP_type = IP_type or Ip.Ipv4.type
+    if IP_type == Ip.Ipv4.type:
+        IPs = np.array(nets, dtype=np.uint32)
+    else:
+        lane = (1 << 64) - 1
+        IPs = np.array([(net >> 64, net & lane) for net in nets], dtype=np.uint64).reshape(-1, 2)
+
+    return write_arrays(path, IPs, np.array(masks, dtype=np.uint8), values, value_dtype, IP_type)
+
+class PrefixFile:
+    """
+    Prefix file opened through mmap. The addresses, masks and values are
+    NumPy arrays over the mapped pages, so opening a file does not read
+    or copy it, and processes that open the same file share its pages.
+
+    IPv4 addresses are uint32, IPv6 addresses are structured with the
+    uint64 fields 'hi' and 'lo' (calc.IPV6_LANES_DTYPE). Both layouts
+    can be passed to calc.calc_many.
+
+    Ex:
+        with PrefixFile('routes.ncp') as prefixes:
+            prefixes.lookup('10.1.2.3') == (subnet.Ipv4('10.1.0.0', 16), 2)
+    """
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        self.path = path
+
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._load(np)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def _load(self, np):
+        if len(self._mmap) < HEADER_SIZE:
+            raise PrefixFileException(self.path)
+
+        magic, version, family, flags, reserved, count, dtype_name = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or family not in (4, 6):
+            raise PrefixFileException(self.path)
+
+        if version != VERSION:
+            raise PrefixFileException(self.path, "The version {} of '{}' is not supported".format(version, self.path))
+
+        self.IP = Ip.Ipv4 if family == 4 else Ip.Ipv6
+        value_dtype = np.dtype(dtype_name.rstrip(b'\0').decode()) if flags & FLAG_VALUES else None
+        layout = _layout(np, self.IP, count, value_dtype)
+
+        if len(self._mmap) < layout['end']:
+            raise PrefixFileException(self.path, "The file '{}' is truncated".format(self.path))
+
+        self.addresses = np.frombuffer(self._mmap, _address_dtype(np, self.IP), count, layout['addresses'])
+        self.masks = np.frombuffer(self._mmap, np.uint8, count, layout['masks'])
+        self.values = None
+        if value_dtype is not None:
+            self.values = np.frombuffer(self._mmap, value_dtype, count, layout['values'])
+
+        self._lookup_masks = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.masks)
+
+    def __iter__(self):
+        for prefix, value in self.items():
+            yield prefix
+
+    @property
+    def type(self) -> str:
+        return self.IP.type
+
+    def close(self):
+        """
+        Unmaps the file. If arrays taken from it are still alive, the
+        mapping is released when the last of them is garbage collected.
+        """
+        self.addresses = self.masks = self.values = None
+
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def prefix(self, i: int) -> IPType:
+        """
+        Returns the i-th prefix of the file as subnet object.
+        """
+        if self.IP.type == Ip.Ipv4.type:
+            return subnet.Ipv4.from_int(int(self.addresses[i]), int(self.masks[i]))
+
+        address = self.addresses[i]
+        return subnet.Ipv6.from_int((int(address['hi']) << 64) | int(address['lo']), int(self.masks[i]))
+
+    def items(self):
+        """
+        Generator of (prefix, value) pairs, ordered by network address and
+        then by mask. The value is None in files written without values.
+        """
+        for i in range(0, len(self)):
+            yield (self.prefix(i), self.values[i] if self.values is not None else None)
+
+    def calc(self) -> dict:
+        """
+        Runs calc.calc_many over every prefix of the file.
+        """
+        return calc.calc_many(self.addresses, self.masks, self.IP.type)
+
+    def lookup_many(self, IPs, mask: MaskType = None):
+        """
+        Longest prefix match of whole arrays of addresses (in the layouts
+        accepted by calc.calc_many), done with binary searches over the
+        mapped columns. Returns the index of the matching prefix of each
+        address, or -1 where no prefix covers it.
+
+        :param IPs: Array of addresses
+        :param mask (int): Only match prefixes of at most 'mask' bits, which cover the whole /mask of the address
+        """
+        import numpy as np
+
+        IPs = np.asarray(IPs)
+        found = np.full(len(IPs), -1, dtype=np.intp)
+        if not len(self):
+            return found
+
+        if self._lookup_masks is None:
+            self._lookup_masks = np.unique(self.masks)[::-1]
+
+        tables = calc._calc_many_tables(np, self.IP.type)
+        if self.IP.type == Ip.Ipv4.type:
+            IPs = IPs.astype(np.uint32)
+        else:
+            hi, lo = _lanes(np, IPs)
+
+        # Masking keeps the order of the addresses, so once they are sorted
+        # every binary search walks the columns forward and stays in cache.
+        if self.IP.type == Ip.Ipv4.type:
+            pending = np.argsort(IPs, kind='stable')
+        else:
+            pending = np.lexsort((lo, hi))
+
+        masks = self._lookup_masks if mask is None else self._lookup_masks[self._lookup_masks <= mask]
+        for mask in masks:
+            if self.IP.type == Ip.Ipv4.type:
+                keys = IPs[pending] & tables['net'][mask]
+            else:
+                keys = np.empty(len(pending), dtype=self.addresses.dtype)
+                keys['hi'] = hi[pending] & tables['net'][mask][0]
+                keys['lo'] = lo[pending] & tables['net'][mask][1]
+
+            first = np.searchsorted(self.addresses, keys, 'left')
+            last = np.searchsorted(self.addresses, keys, 'right')
+
+            # Prefixes with the same network address are sorted by mask,
+            # so the mask is also found by binary search between them.
+            pos, end = first, last.copy()
+            searching = pos < end
+            while searching.any():
+                middle = (pos + end) // 2
+                shorter = self.masks[np.minimum(middle, len(self) - 1)] < mask
+                pos = np.where(searching & shorter, middle + 1, pos)
+                end = np.where(searching & ~shorter, middle, end)
+                searching = pos < end
+
+            match = pos < last
+            match[match] = self.masks[pos[match]] == mask
+            found[pending[match]] = pos[match]
+
+            pending = pending[~match]
+            if not len(pending):
+                break
+
+        return found
+
+    def lookup(self, IP: GenericIpType) -> (IPType, any):
+        """
+        Returns the (prefix, value) pair of the longest prefix of the file
+        that covers the address or, like PrefixTable.longest_match, the
+        whole prefix passed, or None if there is none.
+
+        :param IP (str, Ip.Ipv4, Ip.Ipv6, subnet.Ipv4, subnet.Ipv6): Address or prefix to search
+        """
+        import numpy as np
+
+        IP_class, value, mask = subnet.prefix_value(IP)
+        if IP_class.type != self.IP.type:
+            raise ValueError("The file '{}' holds {} prefixes, not {}".format(self.path, self.IP.type, IP_class.type))
+
+        if IP_class.type == Ip.Ipv4.type:
+            IPs = np.array([value], dtype=np.uint32)
+        else:
+            IPs = np.array([(value >> 64, value & ((1 << 64) - 1))], dtype=np.uint64)
+
+        i = int(self.lookup_many(IPs, mask)[0])
+        if i < 0:
+            return None
+
+        return (self.prefix(i), self.values[i] if self.values is not None else None)
@@ -0,0 +1,297 @@
+from bisect import bisect_right
+import random
+import secrets
+
+from .nettypes import *
+from . import calc
+from . import subnet
+from . import ipset
+from . import Ip
+
+# Odd multipliers of the permutation rounds, cut to the bits of the prefix
+PERMUTATION_MULTIPLIERS = (0x9e3779b97f4a7c15f39cc0605cedc835, 0xbf58476d1ce4e5b94d2f8f7f9a3b5c2d,
+                           0x94d049bb133111eb2545f4914f6cdd1d, 0xd6e8feb86659fd93a5b7c1d3e9f0a2b5)
+
+class SampleException(Exception):
+    def __init__(self, prefix, message=None):
+        if message:
+            self.message = message
+        else:
+            self.message = "There are no addresses to sample in '{}'".format(prefix)
+
+        super().__init__(self.message)
+
+class Permutation:
+    """
+    Iterator over every allowed address of a Sampler exactly once, in a
+    pseudo-random order. A counter over the host bits of the prefix goes
+    through a keyed bijection of those bits (xor with a key, multiply by
+    an odd number and xor-shift, a few rounds), and the values that are
+    not allowed are skipped. The only state is the counter ('position'),
+    so a permutation can be resumed from it.
+    """
+
+    __slots__ = ('_sampler', '_bits', '_keys', 'position')
+
+    def __init__(self, sampler, keys: [int], position: int = 0):
+        self._sampler = sampler
+        self._bits = sampler.IP.tbits - sampler.mask
+        self._keys = keys
+        self.position = position
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> IPType:
+        sampler = self._sampler
+        total = 1 << self._bits
+
+        while self.position < total:
+            value = sampler.net | self._permute(self.position)
+            self.position += 1
+
+            if sampler._allowed(value):
+                return sampler.IP.from_int(value)
+
+        raise StopIteration
+
+    def _permute(self, value: int) -> int:
+        bits = self._bits
+        mask = (1 << bits) - 1
+        shift = (bits + 1) // 2
+
+        for key, multiplier in zip(self._keys, PERMUTATION_MULTIPLIERS):
+            value = ((value ^ key) * (multiplier & mask | 1)) & mask
+            value ^= value >> shift
+
+        return value
+
+class Sampler:
+    """
+    Uniform random addresses and child subnets of a prefix, drawn in
+    integer space. The allowed addresses are kept as a few sorted
+    intervals (the prefix minus the excluded prefixes), so a draw is one
+    random number and one binary search, whatever the size of the prefix.
+
+    Ex:
+        sampler = Sampler('10.0.0.0/8', exclude=['10.1.0.0/16'], usable=True, seed=7)
+        sampler.address()              # Ip.Ipv4
+        sampler.addresses(1000)        # [Ip.Ipv4, ...]
+        sampler.subnets(24, 10)        # 10 random /24 with no excluded address
+        sampler.addresses_many(10**6)  # NumPy array, as in calc.calc_many
+        for IP in sampler.permutation():
+            ...                        # every allowed address once
+
+    :param prefix (str, subnet.Ipv4, subnet.Ipv6): Prefix to sample
+    :param exclude: Addresses, prefixes or ranges that are never drawn (anything IPSet takes)
+    :param usable (bool): Do not draw the network and broadcast addresses (as in subnet.hosts)
+    :param seed (int): Seed of the draws, for reproducible samples
+    """
+
+    def __init__(self, prefix: GenericIpType, exclude = None, usable: bool = False, seed: int = None):
+        self.IP, self.net, self.mask = subnet.prefix_value(prefix)
+        self.seed = seed
+        self._random = random.Random(seed)
+        # Without a seed, the permutations are random too (but the same for every call,
+        # so that they can be resumed)
+        self._permutation_seed = seed if seed is not None else secrets.randbits(64)
+        self._generator = None
+
+        last = self.net | calc.host_bits(self.mask, self.IP)
+        starts = {Ip.Ipv4.type: [], Ip.Ipv6.type: []}
+        ends = {Ip.Ipv4.type: [], Ip.Ipv6.type: []}
+        starts[self.IP.type].append(self.net)
+        ends[self.IP.type].append(last)
+
+        # Child subnets are taken from the prefix without the excluded addresses, and
+        # addresses also without the network and broadcast ones if they are not usable
+        allowed = ipset.IPSet._from_lists(starts, ends) - ipset.IPSet(exclude)
+        self._block_starts = allowed._starts[self.IP.type]
+        self._block_ends = allowed._ends[self.IP.type]
+
+        if usable:
+            # The same addresses as subnet.hosts
+            hosts = calc.MASK_TABLES[self.IP.type][self.mask].usable_hosts
+            usable_range = [(self.IP.from_int(self.net + 1), self.IP.from_int(self.net + hosts))] if hosts else []
+            allowed = allowed & ipset.IPSet(usable_range)
+
+        self._starts = allowed._starts[self.IP.type]
+        self._ends = allowed._ends[self.IP.type]
+
+        # Allowed addresses before each interval, to map a draw to its interval
+        self._offsets = []
+        self.size = 0
+        for start, end in zip(self._starts, self._ends):
+            self._offsets.append(self.size)
+            self.size += end - start + 1
+
+    def _prefix(self) -> str:
+        return '{}/{}'.format(self.IP.to_str(self.net), self.mask)
+
+    def _allowed(self, value: int) -> bool:
+        i = bisect_right(self._starts, value) - 1
+
+        return i >= 0 and value <= self._ends[i]
+
+    def _blocks(self, mask: MaskType) -> ([int], [int], [int], int):
+        """
+        Intervals of the indexes of the child prefixes of length 'mask'
+        that only hold allowed addresses, with the number of blocks
+        before each interval and in total.
+        """
+        calc.mask_result(mask, self.IP.type)
+        if mask < self.mask:
+            raise ValueError("The /{} subnets do not fit in '{}'".format(mask, self._prefix()))
+
+        shift = self.IP.tbits - mask
+        starts, ends, offsets, size = [], [], [], 0
+
+        for start, end in zip(self._block_starts, self._block_ends):
+            first, last = (start + (1 << shift) - 1) >> shift, ((end + 1) >> shift) - 1
+            if first <= last:
+                starts.append(first)
+                ends.append(last)
+                offsets.append(size)
+                size += last - first + 1
+
+        return (starts, ends, offsets, size)
+
+    def _draw(self, starts: [int], offsets: [int], size: int, count: int) -> [int]:
+        if not size:
+            raise SampleException(self._prefix())
+
+        randrange = self._random.randrange
+        draws = []
+
+        for i in range(0, count):
+            draw = randrange(size)
+            interval = bisect_right(offsets, draw) - 1
+            draws.append(starts[interval] + draw - offsets[interval])
+
+        return draws
+
+    def address(self) -> IPType:
+        """
+        One random allowed address.
+        """
+        return self.addresses(1)[0]
+
+    def addresses(self, count: int) -> [IPType]:
+        """
+        'count' random allowed addresses, drawn independently (with repetition).
+        """
+        return [self.IP.from_int(value) for value in self._draw(self._starts, self._offsets, self.size, count)]
+
+    def subnet(self, mask: MaskType) -> IPType:
+        """
+        One random child prefix of length 'mask' with no excluded address.
+        """
+        return self.subnets(mask, 1)[0]
+
+    def subnets(self, mask: MaskType, count: int) -> [IPType]:
+        """
+        'count' random child prefixes of length 'mask' with no excluded
+        address, drawn independently (with repetition).
+        """
+        starts, ends, offsets, size = self._blocks(mask)
+        shift = self.IP.tbits - mask
+        subnet_class = subnet.Ipv4 if self.IP.type == Ip.Ipv4.type else subnet.Ipv6
+
+        return [subnet_class.from_int(block << shift, mask) for block in self._draw(starts, offsets, size, count)]
+
+    def addresses_many(self, count: int):
+        """
+        'count' random allowed addresses as a NumPy array, in the layout of
+        calc.calc_many: uint32 for IPv4 and (n, 2) uint64 lanes for IPv6.
+        """
+        return self._draw_many(self._starts, self._ends, self._offsets, self.size, count, 0)
+
+    def subnets_many(self, mask: MaskType, count: int):
+        """
+        Network addresses of 'count' random child prefixes of length
+        'mask', as a NumPy array (see addresses_many).
+        """
+        starts, ends, offsets, size = self._blocks(mask)
+
+        return self._draw_many(starts, ends, offsets, size, count, self.IP.tbits - mask)
+
+    def _draw_many(self, starts: [int], ends: [int], offsets: [int], size: int, count: int, shift: int):
+        """
+        Vectorized draws of the values in the intervals, shifted left
+        'shift' bits. When the values fit in 64 bits counted from the
+        start of the prefix, random ranks are mapped to the intervals
+        exactly like in _draw. Wider spaces (IPv6 prefixes shorter than
+        /64) are drawn as random bits and the values out of the intervals
+        are drawn again, unless most of them would be: then the draws are
+        done with Python integers instead.
+        """
+        import numpy as np
+
+        if not size:
+            raise SampleException(self._prefix())
+
+        if self._generator is None:
+            self._generator = np.random.default_rng(self.seed)
+
+        rng = self._generator
+        lane = (1 << 64) - 1
+        base = self.net >> shift
+        bits = self.IP.tbits - self.mask - shift
+
+        if bits <= 64:
+            draws = rng.integers(0, size, count, dtype=np.uint64)
+            relative_offsets = np.array(offsets, dtype=np.uint64)
+            interval = np.searchsorted(relative_offsets, draws, 'right') - 1
+            relative_starts = np.array([start - base for start in starts], dtype=np.uint64)
+
+            low = relative_starts[interval] + (draws - relative_offsets[interval]) + np.uint64(base & lane)
+            high = np.full(count, base >> 64, dtype=np.uint64)
+            # Carry of the low lane (the values do not wrap inside the prefix)
+            high += (low < np.uint64(base & lane)).astype(np.uint64)
+        elif size * 4 >= 1 << bits:
+            lanes = np.dtype([('hi', 'u8'), ('lo', 'u8')])
+            lane_starts = np.array([(start >> 64, start & lane) for start in starts], dtype=lanes)
+            lane_ends = np.array([(end >> 64, end & lane) for end in ends], dtype=lanes)
+            high, low = np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint64)
+
+            while len(low) < count:
+                wanted = 2 * (count - len(low)) + 16
+                keys = np.empty(wanted, dtype=lanes)
+                keys['hi'] = rng.integers(0, 1 << (bits - 64), wanted, dtype=np.uint64) | np.uint64(base >> 64)
+                keys['lo'] = rng.integers(0, 1 << 64, wanted, dtype=np.uint64)
+
+                interval = np.searchsorted(lane_starts, keys, 'right') - 1
+                inside = interval >= 0
+                end = lane_ends[np.maximum(interval, 0)]
+                inside &= (end['hi'] > keys['hi']) | ((end['hi'] == keys['hi']) & (end['lo'] >= keys['lo']))
+
+                high = np.concatenate([high, keys['hi'][inside]])[:count]
+                low = np.concatenate([low, keys['lo'][inside]])[:count]
+        else:
+            values = self._draw(starts, offsets, size, count)
+            high = np.array([value >> 64 for value in values], dtype=np.uint64)
+            low = np.array([value & lane for value in values], dtype=np.uint64)
+
+        if shift >= 64:
+            high, low = low << np.uint64(shift - 64), np.zeros(count, dtype=np.uint64)
+        elif shift:
+            high, low = (high << np.uint64(shift)) | (low >> np.uint64(64 - shift)), low << np.uint64(shift)
+
+        if self.IP.type == Ip.Ipv4.type:
+            return low.astype(np.uint32)
+
+        return np.stack([high, low], axis=1)
+
+    def permutation(self, position: int = 0) -> Permutation:
+        """
+        Every allowed address once, in a pseudo-random order given by the
+        seed (a random one for every Sampler without seed). The returned
+        iterator can be resumed with its 'position'.
+
+        :param position (int): Position to start from (the 'position' of a previous permutation)
+        """
+        bits = self.IP.tbits - self.mask
+        keys = [random.Random('{}/{}'.format(self._permutation_seed, i)).getrandbits(bits) if bits else 0
+                for i in range(0, len(PERMUTATION_MULTIPLIERS))]
+
+        return Permutation(self, keys, position)
@@ -0,0 +1,410 @@
+from collections import deque
+import asyncio
+import json
+import time
+
+from .nettypes import *
+from . import calc
+from . import Ip
+
+class ServerException(Exception):
+    def __init__(self, message):
+        self.message = message
+
+        super().__init__(self.message)
+
+def percentile(values: [float], rank: float) -> float:
+    """
+    Nearest rank percentile of an already sorted list.
+    """
+    if not values:
+        return 0.0
+
+    return values[min(len(values) - 1, max(0, int(round(rank / 100 * len(values))) - 1))]
+
+def _request_mask(mask: any) -> int:
+    """
+    Mask of a request: an integer or a string of digits. Anything else is
+    rejected instead of going through int(), which would take 24.5 as a
+    /24 and true as a /1.
+    """
+    if isinstance(mask, int) and not isinstance(mask, bool):
+        return mask
+
+    if isinstance(mask, str) and mask.strip().isascii() and mask.strip().isdigit():
+        return int(mask)
+
+    raise calc.MaskException(mask)
+
+def parse_request(message: dict) -> (IPType, MaskType):
+    """
+    Checks a request in the {"ip": ..., "mask": ...} or {"prefix": "IP/mask"}
+    form and returns its address object and mask, raising the same
+    exceptions as calc.calc.
+    """
+    if 'prefix' in message:
+        IP, sep, mask = str(message['prefix']).partition('/')
+        if not sep:
+            raise ValueError("The value '{}' is not in the 'IP/mask' form!".format(message['prefix']))
+
+        IP = IP.strip()
+    elif 'ip' in message and 'mask' in message:
+        IP, mask = message['ip'], message['mask']
+    else:
+        raise ValueError("The request needs 'ip' and 'mask', or 'prefix'")
+
+    mask = _request_mask(mask)
+    IP = Ip.Ip(IP)
+    if not calc.is_supported(IP, [Ip.Ipv4, Ip.Ipv6]):
+        raise ValueError("Type value passed as argument to IP is not supported!")
+
+    int(IP)
+    return (IP, calc.mask_result(mask, IP.type))
+
+def calc_request(message: dict) -> dict:
+    """
+    Runs calc.calc for a request (see parse_request).
+    """
+    return calc.SubnetInfo._checked(*parse_request(message)).to_dict()
+
+def _calc_rows(IP_type: str, requests: [(IPType, MaskType)]) -> [dict]:
+    """
+    Results of calc for requests of one IP type, calculated together by
+    calc.calc_many. Without NumPy, they are calculated one by one.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return [calc.SubnetInfo._checked(IP, mask).to_dict() for IP, mask in requests]
+
+    masks = [mask for IP, mask in requests]
+    if IP_type == Ip.Ipv4.type:
+        IPs = np.array([int(IP) for IP, mask in requests], dtype=np.uint32)
+    else:
+        lane = (1 << 64) - 1
+        IPs = np.array([(int(IP) >> 64, int(IP) & lane) for IP, mask in requests], dtype=np.uint64)
+
+    rows = list(calc.calc_many_rows(calc.calc_many(IPs, masks, IP_type)))
+
+    # The address is returned as it was written, like calc does
+    for row, (IP, mask) in zip(rows, requests):
+        row['ip'] = '{}/{}'.format(IP.IP, mask)
+
+    return rows
+
+def calc_batch(messages: [dict]) -> [(str, any)]:
+    """
+    Answers a batch of requests with one calc.calc_many call per IP type.
+    Returns ('result', dict) or ('error', message) for every request, in
+    the same order.
+    """
+    answers = [None] * len(messages)
+    groups = {Ip.Ipv4.type: [], Ip.Ipv6.type: []}
+
+    for i, message in enumerate(messages):
+        try:
+            IP, mask = parse_request(message)
+        except Exception as e:
+            answers[i] = ('error', str(e))
+            continue
+
+        groups[IP.type].append((i, IP, mask))
+
+    for IP_type, group in groups.items():
+        if not group:
+            continue
+
+        rows = _calc_rows(IP_type, [(IP, mask) for i, IP, mask in group])
+        for (i, IP, mask), row in zip(group, rows):
+            answers[i] = ('result', row)
+
+    return answers
+
+class Server:
+    """
+    Asyncio calculation service speaking newline delimited JSON, over a
+    UNIX socket or TCP.
+
+    Every line is a request like {"id": 1, "ip": "10.0.4.1", "mask": 24}
+    (or {"id": 1, "prefix": "10.0.4.1/24"}) answered with
+    {"id": 1, "result": {...}} or {"id": 1, "error": "..."}, in the order
+    of the requests of the connection. {"op": "stats"} returns the stats.
+
+    Requests of every connection go through a single bounded queue and
+    are calculated in batches: the batch task takes everything queued
+    (up to batch_size) each time it runs, and the distinct requests of
+    the batch are calculated together (calc_batch). When the queue is full, or a
+    connection has max_pending requests without answer, the server stops
+    reading from the connections until there is room again.
+
+    Ex:
+        server = Server()
+        await server.start(path='/tmp/netcalc.sock')
+        await server.serve_forever()
+    """
+
+    def __init__(self, batch_size: int = 256, batch_delay: float = 0.0, max_queue: int = 8192,
+                 max_pending: int = 256, stats_size: int = 100000):
+        """
+        :param batch_size (int): Maximum number of requests per batch
+        :param batch_delay (float): Seconds to wait for more requests before running a partial batch
+        :param max_queue (int): Maximum number of requests waiting for a batch
+        :param max_pending (int): Maximum number of requests without answer per connection
+        :param stats_size (int): Number of latencies kept for the percentiles
+        """
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_queue = max_queue
+        self.max_pending = max_pending
+
+        self._server = None
+        self._queue = None
+        self._batcher = None
+        self._connections = set()
+        self._latencies = deque(maxlen=stats_size)
+        self._counters = {'requests': 0, 'errors': 0, 'batches': 0, 'connections': 0}
+
+    async def start(self, path: str = None, host: str = '127.0.0.1', port: int = 0):
+        """
+        Starts listening on the UNIX socket 'path' or, if it is not
+        passed, on host:port (port 0 picks a free one).
+        """
+        self._queue = asyncio.Queue(self.max_queue)
+        self._batcher = asyncio.get_running_loop().create_task(self._batches())
+
+        if path:
+            self._server = await asyncio.start_unix_server(self._connection, path)
+        else:
+            self._server = await asyncio.start_server(self._connection, host, port)
+
+        return self
+
+    @property
+    def address(self):
+        """
+        Path of the UNIX socket, or (host, port) of the TCP socket.
+        """
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+
+        for task in self._connections:
+            task.cancel()
+
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._batcher.cancel()
+
+    def stats(self) -> dict:
+        """
+        Counters and latency percentiles (in microseconds, from reading
+        the request to writing its answer) of the last requests.
+        """
+        latencies = sorted(self._latencies)
+        result = dict(self._counters)
+
+        result.update({ 'mean_batch': self._counters['requests'] / max(1, self._counters['batches']) })
+        result.update({ 'latency_us': {'p50': percentile(latencies, 50), 'p90': percentile(latencies, 90),
+                                       'p99': percentile(latencies, 99),
+                                       'max': latencies[-1] if latencies else 0.0} })
+
+        return result
+
+    async def _batches(self):
+        queue = self._queue
+
+        while True:
+            batch = [await queue.get()]
+
+            # Let the connections that are ready queue their requests too
+            await asyncio.sleep(self.batch_delay)
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            self._counters['batches'] += 1
+
+            # Identical requests are only calculated once
+            messages = {}
+            for future, key, message in batch:
+                messages.setdefault(key, message)
+
+            # A failure of the batch is the answer of all of its requests, the task keeps running
+            try:
+                results = dict(zip(messages, calc_batch(list(messages.values()))))
+            except Exception as e:
+                results = dict.fromkeys(messages, ('error', str(e)))
+
+            for future, key, message in batch:
+                if not future.cancelled():
+                    future.set_result(results[key])
+
+    async def _connection(self, reader, writer):
+        self._counters['connections'] += 1
+        pending = asyncio.Queue(self.max_pending)
+        responder = asyncio.get_running_loop().create_task(self._respond(pending, writer))
+
+        task = asyncio.current_task()
+        self._connections.add(task)
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                if not line.strip():
+                    continue
+
+                await pending.put(await self._request(line))
+
+            await pending.put(None)
+            await responder
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            # Broken connection, line over the stream limit or server closed.
+            # The cancellation is not raised again: asyncio streams would log
+            # it as an error on Python 3.11.
+            responder.cancel()
+            writer.close()
+        finally:
+            self._connections.discard(task)
+
+    async def _request(self, line: bytes) -> (float, any, asyncio.Future):
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+
+        try:
+            message = json.loads(line)
+            if not isinstance(message, dict):
+                raise ValueError('The request must be a JSON object')
+        except ValueError as e:
+            future.set_result(('error', 'Invalid request: {}'.format(e)))
+            return (start, None, future)
+
+        if message.get('op') == 'stats':
+            future.set_result(('result', self.stats()))
+        else:
+            key = repr((message.get('prefix'), message.get('ip'), message.get('mask')))
+            await self._queue.put((future, key, message))
+
+        return (start, message.get('id'), future)
+
+    async def _respond(self, pending: asyncio.Queue, writer):
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+
+            start, request_id, future = item
+            kind, value = await future
+
+            self._counters['requests'] += 1
+            if kind == 'error':
+                self._counters['errors'] += 1
+
+            # The queue is still emptied when the client is gone, so its reader is never blocked
+            if writer.is_closing():
+                continue
+
+            writer.write(json.dumps({'id': request_id, kind: value}).encode() + b'\n')
+            self._latencies.append((time.perf_counter() - start) * 1e6)
+
+            # Answers are flushed together once nothing else is ready
+            if pending.empty():
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    writer.close()
+
+        writer.close()
+
+class Client:
+    """
+    Client of the calculation service. Requests can be sent concurrently
+    over the same connection, the answers are matched by id.
+
+    Ex:
+        client = await Client.connect(path='/tmp/netcalc.sock')
+        result = await client.calc('10.0.4.1', 24)
+        await client.close()
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._waiting = {}
+        self._next_id = 0
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    @classmethod
+    async def connect(cls, path: str = None, host: str = '127.0.0.1', port: int = None):
+        if path:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+
+        return cls(reader, writer)
+
+    async def request(self, message: dict) -> dict:
+        """
+        Sends a request and returns the whole answer.
+        """
+        self._next_id += 1
+        message = dict(message, id=self._next_id)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+
+        self._writer.write(json.dumps(message).encode() + b'\n')
+        await self._writer.drain()
+
+        return await future
+
+    async def calc(self, IP: str, mask: int) -> dict:
+        """
+        Returns the result of calc.calc from the server (with lists
+        instead of tuples). ServerException is raised on errors.
+        """
+        answer = await self.request({'ip': IP, 'mask': mask})
+        if 'error' in answer:
+            raise ServerException(answer['error'])
+
+        return answer['result']
+
+    async def stats(self) -> dict:
+        return (await self.request({'op': 'stats'}))['result']
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._dispatcher.cancel()
+
+    async def _dispatch(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+
+            answer = json.loads(line)
+            future = self._waiting.pop(answer.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(answer)
+
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ServerException('The connection was closed'))
+
+def serve(path: str = None, host: str = '127.0.0.1', port: int = 0, **options):
+    """
+    Runs the service until it is interrupted.
+    """
+    async def run():
+        server = await Server(**options).start(path, host, port)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
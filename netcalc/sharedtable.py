@@ -0,0 +1,431 @@
+from array import array
+from bisect import bisect_right
+import pickle
+import struct
+import weakref
+
+from .nettypes import *
+from . import calc
+from . import subnet
+from . import Ip
+
+MAGIC = b'NCSHARED'
+VERSION = 1
+
+# magic, version, reserved, IPv4 ranges, IPv6 ranges, size of the pickled values.
+# The table never leaves the host, so everything is in the native byte order.
+HEADER = struct.Struct('=8sHHQQQ')
+HEADER_SIZE = 64
+ALIGNMENT = 8
+
+class SharedTableException(Exception):
+    def __init__(self, message=None):
+        if message:
+            self.message = message
+        else:
+            self.message = "The buffer is not a valid compiled table!"
+
+        super().__init__(self.message)
+
+def _release(views: [memoryview], arrays: dict, shm):
+    """
+    Releases the views of a table and then its shared memory block, in
+    this order, since the block can not be closed while views over it
+    are alive. Called once, by close() or when the table is collected.
+    """
+    arrays.clear()
+
+    for view in views:
+        view.release()
+
+    if shm is not None:
+        shm.close()
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) & ~(ALIGNMENT - 1)
+
+def _layout(count4: int, count6: int, values_size: int) -> dict:
+    """
+    Offsets of the columns in the buffer: the starts, ends and value
+    indices of the IPv4 ranges, the same for IPv6 (whose addresses are
+    pairs of 64 bit halves, high first) and the pickled list of values.
+    Every column starts aligned to 8 bytes.
+    """
+    layout = {'starts4': HEADER_SIZE}
+    layout['ends4'] = _aligned(layout['starts4'] + count4 * 4)
+    layout['indices4'] = _aligned(layout['ends4'] + count4 * 4)
+    layout['starts6'] = _aligned(layout['indices4'] + count4 * 4)
+    layout['ends6'] = layout['starts6'] + count6 * 16
+    layout['indices6'] = layout['ends6'] + count6 * 16
+    layout['values'] = _aligned(layout['indices6'] + count6 * 4)
+    layout['end'] = layout['values'] + values_size
+
+    return layout
+
+def _flatten(prefixes: [(int, int, int)]) -> [[int]]:
+    """
+    Turns (first, last, value index) intervals of prefixes, which can be
+    nested but never partially overlap, into the disjoint [start, end,
+    value index] ranges where each address takes the value of its
+    longest prefix. Contiguous ranges with the same value are joined.
+    """
+    ranges = []
+    stack = []
+    pos = 0
+
+    def emit(start: int, end: int, index: int):
+        if ranges and ranges[-1][2] == index and ranges[-1][1] + 1 == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end, index])
+
+    def pop(limit: int):
+        # Closes the prefixes that end before 'limit', each one giving the
+        # addresses left after its last child
+        nonlocal pos
+        while stack and stack[-1][0] < limit:
+            end, index = stack.pop()
+            if pos <= end:
+                emit(pos, end, index)
+                pos = end + 1
+
+    for start, end, index in sorted(prefixes, key=lambda prefix: (prefix[0], -prefix[1])):
+        pop(start)
+
+        if stack and pos < start:
+            emit(pos, start - 1, stack[-1][1])
+
+        pos = start
+        stack.append((end, index))
+
+    pop(float('inf'))
+
+    return ranges
+
+def _split(values: [int]) -> [int]:
+    lane = (1 << 64) - 1
+
+    return [half for value in values for half in (value >> 64, value & lane)]
+
+def compile_buffer(items) -> bytes:
+    """
+    Compiles prefixes mapped to values into the flat buffer of a
+    CompiledTable. See CompiledTable.compile.
+    """
+    prefixes = {}
+    for prefix, value in (items.items() if hasattr(items, 'items') else items):
+        IP, net, mask = subnet.prefix_value(prefix)
+        prefixes[(IP.type, net, mask)] = value
+
+    values, indices = [], {}
+    intervals = {Ip.Ipv4.type: [], Ip.Ipv6.type: []}
+
+    for (IP_type, net, mask), value in prefixes.items():
+        # Equal values of different types (1, True and 1.0) are kept apart, so each
+        # lookup returns a value of the type that was stored. Unhashable values are
+        # only shared between prefixes when they are the same object
+        try:
+            index = indices.setdefault((type(value), value), len(values))
+        except TypeError:
+            index = indices.setdefault((type(value), id(value)), len(values))
+
+        if index == len(values):
+            values.append(value)
+
+        IP = Ip.Ipv4 if IP_type == Ip.Ipv4.type else Ip.Ipv6
+        intervals[IP_type].append((net, net | calc.host_bits(mask, IP), index))
+
+    ranges4 = _flatten(intervals[Ip.Ipv4.type])
+    ranges6 = _flatten(intervals[Ip.Ipv6.type])
+    pickled = pickle.dumps(values, pickle.HIGHEST_PROTOCOL)
+
+    layout = _layout(len(ranges4), len(ranges6), len(pickled))
+    buffer = bytearray(layout['end'])
+    HEADER.pack_into(buffer, 0, MAGIC, VERSION, 0, len(ranges4), len(ranges6), len(pickled))
+
+    columns = [
+        ('starts4', array('I', [start for start, end, index in ranges4])),
+        ('ends4', array('I', [end for start, end, index in ranges4])),
+        ('indices4', array('I', [index for start, end, index in ranges4])),
+        ('starts6', array('Q', _split([start for start, end, index in ranges6]))),
+        ('ends6', array('Q', _split([end for start, end, index in ranges6]))),
+        ('indices6', array('I', [index for start, end, index in ranges6])),
+    ]
+
+    for name, column in columns:
+        data = column.tobytes()
+        buffer[layout[name]:layout[name] + len(data)] = data
+
+    buffer[layout['values']:layout['end']] = pickled
+
+    return bytes(buffer)
+
+class CompiledTable:
+    """
+    Immutable prefix -> value table flattened into sorted arrays: the
+    first and last address of the disjoint ranges that the prefixes
+    leave, and the index of the value of each range. An address takes
+    the value of its longest prefix, found with one binary search.
+
+    The whole table is a single flat buffer, so it can be published once
+    in shared memory and attached by any number of processes without
+    copying it. Only the list of distinct values is unpickled by each of
+    them. A published table is pickled as its name, which makes it cheap
+    to pass to the workers of a process pool.
+
+    Ex:
+        routes = CompiledTable.compile({'10.0.0.0/8': 'core', '10.1.0.0/16': 'dc1'})
+        routes.lookup('10.1.2.3') == 'dc1'
+
+        shared = routes.publish()
+        with ProcessPoolExecutor() as pool:
+            pool.map(enrich, [shared] * jobs)   # the workers attach to it
+        shared.unlink()
+    """
+
+    def __init__(self, buffer, shm = None):
+        self._shm = shm
+        self._view = memoryview(buffer)
+        # NumPy arrays over the buffer, built by the first lookup_many
+        self._arrays = {}
+
+        try:
+            self._load()
+        except Exception:
+            self._view.release()
+            raise
+
+        # The views must be released before the block is closed, also when the table is
+        # collected or the process exits (SharedMemory.__del__ would fail otherwise)
+        views = [self._starts4, self._ends4, self._indices4, self._starts6, self._ends6, self._indices6, self._view]
+        self._finalizer = weakref.finalize(self, _release, views, self._arrays, shm)
+
+    def _load(self):
+        if len(self._view) < HEADER_SIZE:
+            raise SharedTableException()
+
+        magic, version, reserved, count4, count6, values_size = HEADER.unpack_from(self._view)
+        if magic != MAGIC:
+            raise SharedTableException()
+
+        if version != VERSION:
+            raise SharedTableException("The version {} of the compiled table is not supported".format(version))
+
+        layout = _layout(count4, count6, values_size)
+        if len(self._view) < layout['end']:
+            raise SharedTableException("The compiled table is truncated")
+
+        def column(name: str, size: int, format: str) -> memoryview:
+            return self._view[layout[name]:layout[name] + size].cast(format)
+
+        self._layout = layout
+        self._counts = {Ip.Ipv4.type: count4, Ip.Ipv6.type: count6}
+        self._starts4 = column('starts4', count4 * 4, 'I')
+        self._ends4 = column('ends4', count4 * 4, 'I')
+        self._indices4 = column('indices4', count4 * 4, 'I')
+        self._starts6 = column('starts6', count6 * 16, 'Q')
+        self._ends6 = column('ends6', count6 * 16, 'Q')
+        self._indices6 = column('indices6', count6 * 4, 'I')
+        self.values = pickle.loads(self._view[layout['values']:layout['end']])
+
+    @classmethod
+    def compile(cls, items):
+        """
+        Compiles prefixes mapped to values into a table held in the memory
+        of this process (publish() moves it to shared memory).
+
+        :param items: PrefixTable, dict or (prefix, value) pairs. The prefixes can be subnet objects,
+                      'IP/mask' strings or addresses (host prefixes). The values can be any
+                      picklable object, equal values are stored once
+        """
+        return cls(compile_buffer(items))
+
+    @classmethod
+    def attach(cls, name: str):
+        """
+        Attaches to a table published by another process.
+
+        :param name (str): Name of the shared memory block (the 'name' of the published table)
+        """
+        from multiprocessing import shared_memory
+
+        shm = shared_memory.SharedMemory(name=name)
+
+        try:
+            return cls(shm.buf, shm)
+        except Exception:
+            shm.close()
+            raise
+
+    def publish(self, name: str = None):
+        """
+        Copies the table to a new shared memory block and returns the
+        table over that block. The process that publishes it should
+        unlink() it when no worker needs it anymore.
+
+        :param name (str): Name of the block (by default, a random one)
+        """
+        from multiprocessing import shared_memory
+
+        size = self._layout['end']
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = self._view[:size]
+
+        return type(self)(shm.buf, shm)
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the shared memory block, or None for a private table.
+        """
+        return self._shm.name if self._shm is not None else None
+
+    def __reduce__(self):
+        if self._shm is not None:
+            return (type(self).attach, (self._shm.name,))
+
+        return (type(self), (self._view[:self._layout['end']].tobytes(),))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        """
+        Number of ranges (of both IP types).
+        """
+        return sum(self._counts.values())
+
+    def close(self):
+        """
+        Detaches from the shared memory block, which stays available to
+        the other processes until it is unlinked. The arrays returned by
+        lookup_many are copies, so they can still be used afterwards.
+        """
+        self._finalizer()
+
+    def unlink(self):
+        """
+        Closes the table and removes its shared memory block.
+        """
+        shm = self._shm
+        self.close()
+
+        if shm is not None:
+            shm.unlink()
+
+    def ranges(self):
+        """
+        Generator of the (first address, last address, value) of every
+        range, IPv4 first, ordered by address.
+        """
+        for i in range(0, self._counts[Ip.Ipv4.type]):
+            yield (Ip.Ipv4.from_int(self._starts4[i]), Ip.Ipv4.from_int(self._ends4[i]), self.values[self._indices4[i]])
+
+        for i in range(0, self._counts[Ip.Ipv6.type]):
+            yield (Ip.Ipv6.from_int(self._value6(self._starts6, i)), Ip.Ipv6.from_int(self._value6(self._ends6, i)),
+                   self.values[self._indices6[i]])
+
+    @staticmethod
+    def _value6(column: memoryview, i: int) -> int:
+        return (column[2 * i] << 64) | column[2 * i + 1]
+
+    def index(self, IP: GenericIpType) -> int:
+        """
+        Returns the index in 'values' of the value of the address, or -1
+        if no prefix covers it.
+
+        :param IP (str, Ip.Ipv4, Ip.Ipv6): Address to search
+        """
+        IP_class, value, mask = subnet.prefix_value(IP)
+
+        if IP_class.type == Ip.Ipv4.type:
+            i = bisect_right(self._starts4, value) - 1
+            if i >= 0 and self._ends4[i] >= value:
+                return self._indices4[i]
+
+            return -1
+
+        starts = self._starts6
+        low, high = 0, self._counts[Ip.Ipv6.type]
+        while low < high:
+            middle = (low + high) // 2
+            if self._value6(starts, middle) <= value:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low and self._value6(self._ends6, low - 1) >= value:
+            return self._indices6[low - 1]
+
+        return -1
+
+    def lookup(self, IP: GenericIpType, default = None):
+        """
+        Returns the value of the longest prefix that covers the address,
+        or 'default' if there is none.
+
+        :param IP (str, Ip.Ipv4, Ip.Ipv6): Address to search
+        """
+        i = self.index(IP)
+
+        return self.values[i] if i >= 0 else default
+
+    def lookup_many(self, IPs, IP_type: str = None):
+        """
+        Looks up whole arrays of addresses (in the layouts accepted by
+        calc.calc_many) with one vectorized binary search. Returns the
+        index in 'values' of the value of each address, or -1 where no
+        prefix covers it. NumPy is only needed by this method.
+
+        :param IPs: Array of addresses
+        :param IP_type (str): 'ipv4' or 'ipv6'. If not passed, it is taken from the layout of IPs
+        """
+        import numpy as np
+
+        IPs = np.asarray(IPs)
+        if IP_type is None:
+            IP_type = Ip.Ipv6.type if (IPs.dtype.names or IPs.ndim == 2) else Ip.Ipv4.type
+
+        if not self._arrays:
+            lanes = np.dtype([('hi', '=u8'), ('lo', '=u8')])
+            buffer = self._view
+            layout, count4, count6 = self._layout, self._counts[Ip.Ipv4.type], self._counts[Ip.Ipv6.type]
+
+            self._arrays.update({
+                Ip.Ipv4.type: (np.frombuffer(buffer, '=u4', count4, layout['starts4']),
+                               np.frombuffer(buffer, '=u4', count4, layout['ends4']),
+                               np.frombuffer(buffer, '=u4', count4, layout['indices4'])),
+                Ip.Ipv6.type: (np.frombuffer(buffer, lanes, count6, layout['starts6']),
+                               np.frombuffer(buffer, lanes, count6, layout['ends6']),
+                               np.frombuffer(buffer, '=u4', count6, layout['indices6'])),
+            })
+
+        starts, ends, indices = self._arrays[IP_type]
+
+        if IP_type == Ip.Ipv4.type:
+            keys = IPs.astype(np.uint32)
+        else:
+            keys = np.empty(len(IPs), dtype=starts.dtype)
+            if IPs.dtype.names:
+                keys['hi'], keys['lo'] = IPs['hi'], IPs['lo']
+            else:
+                keys['hi'], keys['lo'] = IPs[:, 0], IPs[:, 1]
+
+        found = np.full(len(keys), -1, dtype=np.intp)
+        if not len(starts):
+            return found
+
+        i = np.searchsorted(starts, keys, 'right') - 1
+        match = i >= 0
+        if IP_type == Ip.Ipv4.type:
+            match[match] = ends[i[match]] >= keys[match]
+        else:
+            end, key = ends[i[match]], keys[match]
+            match[match] = (end['hi'] > key['hi']) | ((end['hi'] == key['hi']) & (end['lo'] >= key['lo']))
+
+        found[match] = indices[i[match]]
+
+        return found
@@ -1,14 +1,282 @@
-from nettypes import *
-import calc
-import Ip
+import sys
+
+from .nettypes import *
+from . import calc
+from . import Ip
+
+class Addresses:
+    """
+    Lazy sequence of addresses. Only the integer range is stored, and each
+    address is built when it is requested, so it can be indexed, sliced and
+    iterated (also in reverse) over any subnet in constant memory.
+
+    Note that len() can not be used for more than sys.maxsize addresses
+    (for example an IPv6 /64), use 'size' instead.
+    """
+
+    __slots__ = ('IP_class', 'values')
+
+    def __init__(self, IP_class: IPType, values: range):
+        self.IP_class = IP_class
+        self.values = values
+
+    def __len__(self):
+        size = self.size
+        if size > sys.maxsize:
+            raise OverflowError("{} addresses do not fit in len(), use 'size' instead".format(size))
+
+        return size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __getitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            return Addresses(self.IP_class, self.values[index])
+
+        return self.IP_class.from_int(self.values[index])
+
+    def __iter__(self):
+        return map(self.IP_class.from_int, self.values)
+
+    def __reversed__(self):
+        return map(self.IP_class.from_int, reversed(self.values))
+
+    @property
+    def size(self) -> int:
+        values = self.values
+        if values.step > 0:
+            return max(0, (values.stop - values.start + values.step - 1) // values.step)
+
+        return max(0, (values.start - values.stop - values.step - 1) // -values.step)
+
+class _Subnet:
+    """
+    Methods shared by Ipv4 and Ipv6 subnets that work directly
+    on the integer value of the address.
+    """
+
+    __slots__ = ()
+
+    @property
+    def mask(self) -> MaskType:
+        return self._mask
+
+    @mask.setter
+    def mask(self, new_mask: MaskType):
+        # Like the address, the mask is part of the hash and can not change once built
+        raise AttributeError("The mask of an {} can not be changed, build a new one".format(type(self).__name__))
+
+    def _key(self) -> (int, int, int):
+        value = self._value
+        if value is None:
+            value = self.value
+
+        return (self.tbits, value, int(self.mask))
+
+    def __hash__(self):
+        value = self._value
+        if value is None:
+            try:
+                value = self.value
+            except (Ip.Ipv4Exception, Ip.Ipv6Exception, ValueError):
+                return hash(self._IP)
+
+        # Host prefixes are equal to the plain address, and so is their hash
+        mask = int(self.mask)
+        return value if mask == self.tbits else hash((value, mask))
+
+    def __bool__(self):
+        return True
+
+    def __contains__(self, IP: GenericIpType) -> bool:
+        """
+        Whether an address, or every address of a subnet, is in the subnet.
+        Addresses and subnets of the other IP type are never in it.
+
+        Ex:
+            '10.0.4.1' in Subnet('10.0.0.0/16')
+            Subnet('10.0.4.0/24') in Subnet('10.0.0.0/16')
+        """
+        if isinstance(IP, str):
+            IP = Subnet(IP) if '/' in IP else Ip.Ip(IP)
+
+        if not isinstance(IP, Ip._Address) or IP.tbits != self.tbits:
+            return False
+
+        mask = int(self.mask)
+        if getattr(IP, 'mask', IP.tbits) < mask:
+            return False
+
+        net_bits = calc.MASK_TABLES[self.type][mask].net_bits
+        return int(IP) & net_bits == int(self) & net_bits
+
+    # Addresses can be added to and subtracted from integers, subnets can not
+    def __add__(self, offset):
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, IP):
+        return NotImplemented
+
+    def _prefix(self, net: int, mask: MaskType) -> str:
+        return '{}/{}'.format(self.to_str(net), mask)
+
+    def _from_net(self, net: int, mask: MaskType):
+        """
+        Subnet of the same class from a network address and a mask that
+        are already known to be valid, skipping the checks of from_int.
+        """
+        IP = object.__new__(type(self))
+        IP._IP = None
+        IP._value = net
+        IP._mask = mask
+
+        return IP
+
+    def supernet(self, mask: MaskType = None):
+        """
+        The subnet of length 'mask' that contains this one (by default,
+        the one that is one bit shorter).
+
+        Ex: Subnet('10.0.4.0/24').supernet(16) == Subnet('10.0.0.0/16')
+
+        :param mask (int): Mask of the supernet, at most the mask of the subnet
+        """
+        own = int(self.mask)
+        if mask is None:
+            mask = own - 1
+
+        if own == 0 and mask < 0:
+            raise ValueError("The subnet '{}' has no supernet".format(self._prefix(0, 0)))
+
+        calc.mask_result(mask, self.type)
+        if mask > own:
+            raise ValueError("A /{} is not a supernet of a /{}".format(mask, own))
+
+        return self._from_net(int(self) & calc.MASK_TABLES[self.type][mask].net_bits, mask)
+
+    def children(self) -> tuple:
+        """
+        The two halves of the subnet, one bit longer.
+
+        Ex: Subnet('10.0.4.0/24').children() == (Subnet('10.0.4.0/25'), Subnet('10.0.4.128/25'))
+        """
+        mask = int(self.mask)
+        info = calc.MASK_TABLES[self.type][mask]
+        net = int(self) & info.net_bits
+
+        if mask == self.tbits:
+            raise ValueError("The subnet '{}' has no children".format(self._prefix(net, mask)))
+
+        half = info.hosts >> 1
+        return (self._from_net(net, mask + 1), self._from_net(net + half, mask + 1))
+
+    def sibling(self):
+        """
+        The other half of the supernet of the subnet.
+
+        Ex: Subnet('10.0.4.0/24').sibling() == Subnet('10.0.5.0/24')
+        """
+        mask = int(self.mask)
+        info = calc.MASK_TABLES[self.type][mask]
+        net = int(self) & info.net_bits
+
+        if mask == 0:
+            raise ValueError("The subnet '{}' has no sibling".format(self._prefix(net, mask)))
+
+        return self._from_net(net ^ info.hosts, mask)
+
+    def next(self, count: int = 1):
+        """
+        The subnet of the same size 'count' subnets after this one.
+
+        Ex: Subnet('10.0.4.0/24').next() == Subnet('10.0.5.0/24')
+
+        :param count (int): Subnets to move, backwards if negative
+        """
+        mask = int(self.mask)
+        info = calc.MASK_TABLES[self.type][mask]
+        net = (int(self) & info.net_bits) + count * info.hosts
+
+        if not 0 <= net < self.thosts:
+            raise ValueError("The /{} subnet {} away from '{}' is out of the address space".format(
+                mask, count, self._prefix(int(self) & info.net_bits, mask)))
+
+        return self._from_net(net, mask)
+
+    def previous(self, count: int = 1):
+        """
+        The subnet of the same size 'count' subnets before this one.
+
+        Ex: Subnet('10.0.4.0/24').previous() == Subnet('10.0.3.0/24')
+        """
+        return self.next(-count)
+
+    def __len__(self):
+        """
+        Number of addresses of the subnet (not the number of octets or
+        hextets of the address, see octets()). Subnets with more than
+        sys.maxsize addresses, like an IPv6 /64, have to use addresses().size.
+        """
+        size = self.addresses().size
+        if size > sys.maxsize:
+            raise OverflowError("The {} addresses of the subnet do not fit in len(), use addresses().size instead"
+                                .format(size))
+
+        return size
+
+    def __getitem__(self, index: int | slice):
+        return self.addresses()[index]
+
+    def __iter__(self):
+        return iter(self.addresses())
+
+    def __reversed__(self):
+        return reversed(self.addresses())
+
+    def addresses(self) -> Addresses:
+        """
+        Every address of the subnet, from the network address to the broadcast.
+        """
+        info = calc.MASK_TABLES[self.type][int(self.mask)]
+        net = int(self) & info.net_bits
+
+        return Addresses(Ip.Ipv4 if self.type == Ip.Ipv4.type else Ip.Ipv6, range(net, net + info.hosts))
+
+    def hosts(self) -> Addresses:
+        """
+        Usable addresses of the subnet, the same ones as in usable_range.
+        Empty for /31 and /32 (/127 and /128 in IPv6).
+        """
+        info = calc.MASK_TABLES[self.type][int(self.mask)]
+        net = int(self) & info.net_bits
+
+        return Addresses(Ip.Ipv4 if self.type == Ip.Ipv4.type else Ip.Ipv6, range(net + 1, net + 1 + info.usable_hosts))
+
+class Ipv4(_Subnet, Ip.Ipv4):
+    __slots__ = ('_mask',)
 
-class Ipv4(Ip.Ipv4):
     def __init__(self, IP:  GenericIpType, mask: IPType):
         super().__init__(IP)
-        self.mask = mask
+        self._mask = mask
 
         self.check()
 
+    @classmethod
+    def from_int(cls, value: int, mask: MaskType):
+        """
+        Builds the subnet directly from the integer value of its address.
+
+        :param value: Integer value of the address
+        :param mask (int): Mask of the subnet
+        """
+        IP = super().from_int(value)
+        IP._mask = calc.ipv4_mask(mask)
+
+        return IP
+
     def net_address(self):
         return calc.net_address(self.IP, self.mask)
 
@@ -36,16 +304,31 @@ class Ipv4(Ip.Ipv4):
 
         return (IP_result, mask_result)
 
-    def calc(self):
-        return calc.calc(self.IP, self.mask)
+    def calc(self) -> calc.SubnetInfo:
+        return calc.SubnetInfo(self, self.mask)
+
+class Ipv6(_Subnet, Ip.Ipv6):
+    __slots__ = ('_mask',)
 
-class Ipv6(Ip.Ipv6):
     def __init__(self, IP:  GenericIpType, mask: IPType):
         super().__init__(IP)
-        self.mask = mask
+        self._mask = mask
 
         self.check()
 
+    @classmethod
+    def from_int(cls, value: int, mask: MaskType):
+        """
+        Builds the subnet directly from the integer value of its address.
+
+        :param value: Integer value of the address
+        :param mask (int): Mask of the subnet
+        """
+        IP = super().from_int(value)
+        IP._mask = calc.ipv6_mask(mask)
+
+        return IP
+
     def net_address(self):
         return calc.net_address(self.IP, self.mask)
 
@@ -64,5 +347,52 @@ class Ipv6(Ip.Ipv6):
 
         return (IP_result, mask_result)
 
-    def calc(self):
-        return calc.calc(self.IP, self.mask)
+    def calc(self) -> calc.SubnetInfo:
+        return calc.SubnetInfo(self, self.mask)
+
+def Subnet(IP: GenericIpType, mask: MaskType = None) -> Ipv4 | Ipv6:
+    """
+    Builds a subnet.Ipv4 or subnet.Ipv6 from an address and a mask, or
+    from a string in the 'IP/mask' form. Subnets are returned as they are.
+
+    Ex:
+        sub = Subnet('10.0.4.1/10')
+        sub = Subnet('2001:db8::', 32)
+    """
+    if isinstance(IP, (Ipv4, Ipv6)):
+        return IP
+
+    if isinstance(IP, (Ip.Ipv4, Ip.Ipv6)):
+        if mask is None:
+            mask = IP.tbits
+
+        IP = IP.IP
+
+    if mask is None:
+        try:
+            IP, mask = IP.split('/')
+            mask = int(mask)
+        except ValueError:
+            raise ValueError("The value '{}' is not in the 'IP/mask' form!".format(IP))
+
+    if Ip.is_ipv4(IP):
+        return Ipv4(IP, mask)
+
+    return Ipv6(IP, mask)
+
+def prefix_value(prefix: GenericIpType) -> (IPType, int, MaskType):
+    """
+    Returns the IP class (Ip.Ipv4 or Ip.Ipv6), the network address as
+    integer and the mask of a prefix passed as subnet, 'IP/mask' string
+    or address (taken as a /32 or /128).
+
+    Ex:
+        prefix_value('10.0.4.1/24') == (Ip.Ipv4, 0x0a000400, 24)
+    """
+    if isinstance(prefix, str):
+        prefix = Subnet(prefix) if '/' in prefix else Ip.Ip(prefix)
+
+    IP = Ip.Ipv4 if prefix.type == Ip.Ipv4.type else Ip.Ipv6
+    mask = getattr(prefix, 'mask', IP.tbits)
+
+    return (IP, int(prefix) & calc.net_bits(mask, IP), mask)
@@ -0,0 +1,305 @@
+from .nettypes import *
+from . import calc
+from . import subnet
+from . import Ip
+
+class _Node:
+    """
+    Node of the radix tree. 'net' is the network address of the node as an
+    integer and 'mask' its length. Glue nodes only exist to join two
+    branches and do not hold a value.
+    """
+
+    __slots__ = ('net', 'mask', 'value', 'glue', 'l', 'r')
+
+    def __init__(self, net: int, mask: MaskType, value = None, glue = False):
+        self.net = net
+        self.mask = mask
+        self.value = value
+        self.glue = glue
+        self.l = None
+        self.r = None
+
+def _bit(net: int, pos: int, tbits: int) -> int:
+    return (net >> (tbits - 1 - pos)) & 1
+
+def _common(a: int, b: int, limit: int, tbits: int) -> int:
+    """
+    Length of the common prefix of a and b, limited to 'limit' bits.
+    """
+    diff = (a ^ b) >> (tbits - limit)
+    if not diff:
+        return limit
+
+    return limit - diff.bit_length()
+
+class PrefixTable:
+    """
+    Table of IPv4 and IPv6 prefixes mapped to arbitrary values, stored
+    in a path compressed radix tree (one per IP type). Every operation
+    walks at most one node per bit of the prefix, whatever the size of
+    the table.
+
+    Prefixes can be passed as subnet.Ipv4, subnet.Ipv6 or 'IP/mask'
+    strings. Addresses (Ip.Ipv4, Ip.Ipv6 or strings without mask) are
+    treated as host prefixes. Keys are returned as subnet objects
+    holding the network address.
+
+    Ex:
+        table = PrefixTable()
+        table['10.0.0.0/8'] = 'core'
+        table['10.1.0.0/16'] = 'dc1'
+        table.longest_match('10.1.2.3') == (subnet.Ipv4('10.1.0.0', 16), 'dc1')
+    """
+
+    def __init__(self, items = None):
+        self._roots = {Ip.Ipv4.type: None, Ip.Ipv6.type: None}
+        self._len = 0
+
+        if items:
+            for prefix, value in (items.items() if hasattr(items, 'items') else items):
+                self.insert(prefix, value)
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, prefix):
+        return self._find(*subnet.prefix_value(prefix)) is not None
+
+    def __getitem__(self, prefix):
+        node = self._find(*subnet.prefix_value(prefix))
+        if node is None:
+            raise KeyError(prefix)
+
+        return node.value
+
+    def __setitem__(self, prefix, value):
+        self.insert(prefix, value)
+
+    def __delitem__(self, prefix):
+        self.delete(prefix)
+
+    def __iter__(self):
+        for prefix, value in self.items():
+            yield prefix
+
+    def get(self, prefix, default = None):
+        node = self._find(*subnet.prefix_value(prefix))
+        if node is None:
+            return default
+
+        return node.value
+
+    def items(self):
+        """
+        Generator of (prefix, value) pairs, IPv4 first, ordered by
+        network address and then by mask.
+        """
+        for IP in (Ip.Ipv4, Ip.Ipv6):
+            yield from self._walk(IP, self._roots[IP.type])
+
+    def insert(self, prefix: GenericIpType, value = None):
+        """
+        Inserts the prefix in the table, or replaces its value if it is already there.
+
+        :param prefix (str, subnet.Ipv4, subnet.Ipv6): Prefix to insert
+        :param value: Value attached to the prefix
+        """
+        IP, net, mask = subnet.prefix_value(prefix)
+        tbits = IP.tbits
+
+        parent = None
+        node = self._roots[IP.type]
+        while node is not None:
+            common = _common(node.net, net, min(node.mask, mask), tbits)
+            if common < node.mask:
+                break
+
+            if node.mask == mask:
+                if node.glue:
+                    node.glue = False
+                    self._len += 1
+
+                node.value = value
+                return
+
+            parent = node
+            node = node.r if _bit(net, node.mask, tbits) else node.l
+
+        new = _Node(net, mask, value)
+        self._len += 1
+
+        if node is not None:
+            if common == mask:
+                # The new prefix covers the node, so it takes its place
+                if _bit(node.net, mask, tbits):
+                    new.r = node
+                else:
+                    new.l = node
+            else:
+                glue = _Node(net & calc.net_bits(common, IP), common, glue=True)
+                if _bit(net, common, tbits):
+                    glue.l, glue.r = node, new
+                else:
+                    glue.l, glue.r = new, node
+
+                new = glue
+
+        self._replace(IP, parent, node, new, net)
+
+    def delete(self, prefix: GenericIpType):
+        """
+        Removes the prefix from the table. KeyError is raised if it is not there.
+
+        :param prefix (str, subnet.Ipv4, subnet.Ipv6): Prefix to remove
+        """
+        IP, net, mask = subnet.prefix_value(prefix)
+        path = self._path(IP, net, mask)
+
+        if not path or path[-1].mask != mask or path[-1].glue:
+            raise KeyError(prefix)
+
+        node = path.pop()
+        parent = path[-1] if path else None
+        self._len -= 1
+
+        if node.l is not None and node.r is not None:
+            node.glue = True
+            node.value = None
+            return
+
+        child = node.l if node.l is not None else node.r
+        self._replace(IP, parent, node, child, net)
+
+        # A glue node left with a single child is not needed anymore
+        if parent is not None and parent.glue and child is None:
+            grandparent = path[-2] if len(path) > 1 else None
+            self._replace(IP, grandparent, parent, parent.l if parent.l is not None else parent.r, net)
+
+    def exact(self, prefix: GenericIpType):
+        """
+        Returns the value of the prefix, or None if it is not in the table.
+
+        :param prefix (str, subnet.Ipv4, subnet.Ipv6): Prefix to search
+        """
+        return self.get(prefix)
+
+    def longest_match(self, prefix: GenericIpType) -> (IPType, any):
+        """
+        Returns the (prefix, value) pair of the longest prefix in the table
+        that covers the passed address or prefix, or None if there is none.
+
+        :param prefix (str, Ip.Ipv4, Ip.Ipv6, subnet.Ipv4, subnet.Ipv6): Address or prefix to search
+        """
+        IP, net, mask = subnet.prefix_value(prefix)
+        tbits = IP.tbits
+        best = None
+
+        node = self._roots[IP.type]
+        while node is not None and node.mask <= mask:
+            if (node.net ^ net) >> (tbits - node.mask):
+                break
+
+            if not node.glue:
+                best = node
+
+            if node.mask == mask:
+                break
+
+            node = node.r if (net >> (tbits - 1 - node.mask)) & 1 else node.l
+
+        if best is None:
+            return None
+
+        return (self._key(IP, best), best.value)
+
+    def covering(self, prefix: GenericIpType):
+        """
+        Generator of the (prefix, value) pairs in the table that cover the
+        passed prefix (including itself), from the shortest to the longest.
+
+        :param prefix (str, Ip.Ipv4, Ip.Ipv6, subnet.Ipv4, subnet.Ipv6): Address or prefix to search
+        """
+        IP, net, mask = subnet.prefix_value(prefix)
+
+        for node in self._path(IP, net, mask):
+            if not node.glue:
+                yield (self._key(IP, node), node.value)
+
+    def covered(self, prefix: GenericIpType):
+        """
+        Generator of the (prefix, value) pairs in the table covered by the
+        passed prefix (including itself), ordered by network address and mask.
+
+        :param prefix (str, subnet.Ipv4, subnet.Ipv6): Prefix to search
+        """
+        IP, net, mask = subnet.prefix_value(prefix)
+        tbits = IP.tbits
+
+        node = self._roots[IP.type]
+        while node is not None and node.mask < mask:
+            if _common(node.net, net, node.mask, tbits) < node.mask:
+                return
+
+            node = node.r if _bit(net, node.mask, tbits) else node.l
+
+        if node is not None and _common(node.net, net, mask, tbits) == mask:
+            yield from self._walk(IP, node)
+
+    def _find(self, IP: IPType, net: int, mask: MaskType) -> _Node:
+        path = self._path(IP, net, mask)
+
+        if path and path[-1].mask == mask and not path[-1].glue:
+            return path[-1]
+
+        return None
+
+    def _path(self, IP: IPType, net: int, mask: MaskType) -> [_Node]:
+        """
+        Nodes from the root whose prefix covers net/mask.
+        """
+        tbits = IP.tbits
+        path = []
+
+        node = self._roots[IP.type]
+        while node is not None and node.mask <= mask:
+            if _common(node.net, net, node.mask, tbits) < node.mask:
+                break
+
+            path.append(node)
+            if node.mask == mask:
+                break
+
+            node = node.r if _bit(net, node.mask, tbits) else node.l
+
+        return path
+
+    def _replace(self, IP: IPType, parent: _Node, old: _Node, new: _Node, net: int):
+        if parent is None:
+            self._roots[IP.type] = new
+        elif parent.l is old and (old is not None or not _bit(net, parent.mask, IP.tbits)):
+            parent.l = new
+        else:
+            parent.r = new
+
+    def _walk(self, IP: IPType, node: _Node):
+        stack = [node] if node is not None else []
+
+        while stack:
+            node = stack.pop()
+
+            if not node.glue:
+                yield (self._key(IP, node), node.value)
+
+            if node.r is not None:
+                stack.append(node.r)
+
+            if node.l is not None:
+                stack.append(node.l)
+
+    @staticmethod
+    def _key(IP: IPType, node: _Node) -> IPType:
+        if IP.type == Ip.Ipv4.type:
+            return subnet.Ipv4.from_int(node.net, node.mask)
+
+        return subnet.Ipv6.from_int(node.net, node.mask)
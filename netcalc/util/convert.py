@@ -1,3 +1,6 @@
+import operator
+import struct
+
 class BinaryConvertException(Exception):
     def __init__(self, message=None):
         self.message = "Error when trying to convert to binary"
@@ -7,70 +10,176 @@ class BinaryConvertException(Exception):
         else:
             super().__init__(self.message)
 
-def bd(binary: str) -> str:
-    if binary.count('0') + binary.count('1') != len(binary):
-        return ValueError("The value {} is not binary".format(binary))
-    
-    decimal = 0
-    for i, c in enumerate(binary[::-1]):
-        decimal += int(c) * (2 ** i)
+# Lookup tables, built once when the module is loaded
+HEX_DIGITS = '0123456789abcdefABCDEF'
+NIBBLE_BITS = {digit: format(int(digit, 16), '04b') for digit in HEX_DIGITS}
+OCTET_BITS = tuple([format(octet, '08b') for octet in range(0, 256)])
+OCTET_HEX = tuple([format(octet, 'x') for octet in range(0, 256)])
+# Deletes the hexadecimal digits, so only invalid characters are left
+NOT_HEX = str.maketrans('', '', HEX_DIGITS)
 
-    return decimal
+# struct formats of the packed forms, by width in bytes (1 for octets, 2 for hextets)
+PACK_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
 
-def db(decimal: int | str, bit_repr: int = 0) -> str:
-    decimal_str = bin(int(decimal)).replace('0b', '')
+def _bits(value: int, bit_repr: int, original) -> str:
+    if bit_repr == 8 and 0 <= value < 256:
+        return OCTET_BITS[value]
 
-    if int(decimal) == 0:
-        if bit_repr:
-            return '0' * bit_repr
+    binary = format(value, 'b')
+    if bit_repr > len(binary):
+        return '0' * (bit_repr - len(binary)) + binary
 
-        return '0'
-
-    if bit_repr == 0:
-        return decimal_str
+    if bit_repr and bit_repr < len(binary):
+        raise BinaryConvertException("The representation of decimal '{}' in bits does not support {} bits".format(original, bit_repr))
 
-    if bit_repr > len(decimal_str):
-        decimal_str = ('0' * (bit_repr - len(decimal_str))) + decimal_str
-        return decimal_str
-    
-    if bit_repr < len(decimal_str):
-        raise BinaryConvertException("The representation of decimal '{}' in bits does not support {} bits".format(decimal, bit_repr))
+    return binary
 
-    else:
-        return decimal_str
+def _strip_hex(hex_: str) -> str:
+    return hex_[2:] if hex_.startswith('0x') else hex_
 
-def bh(binary: str) -> str:
-    decimal = bd(binary)
+def bd(binary: str) -> int:
+    if binary.count('0') + binary.count('1') != len(binary):
+        raise ValueError("The value {} is not binary".format(binary))
 
-    return hex(decimal).replace('0x', '')
+    return int(binary, 2) if binary else 0
 
-def hb(hex_: str, bit_repr: int = 0) -> str:
-    if hex_.startswith('0x'):
-        hex_ = hex_[2:]
+def db(decimal: int | str, bit_repr: int = 0) -> str:
+    return _bits(int(decimal), bit_repr, decimal)
 
-    hexadecimal_chars = "0123456789ABCDEF"
-    hexadecimal_letters = {'A': 10, 'B': 11, 'C': 12, 'D': 13, 'E': 14, 'F': 15}
+def bh(binary: str) -> str:
+    return format(bd(binary), 'x')
 
-    binary = ""
-    for h in hex_.upper():
-        if not h in hexadecimal_chars:
-            raise ValueError("The value '{}' is not a valid hexadecimal!".format(hex_))
+def hb(hex_: str, bit_repr: int = 0) -> str:
+    hex_ = _strip_hex(hex_)
 
-        try:
-            binary += db(int(h), 4)
-        except ValueError:
-            binary += db(hexadecimal_letters[h])
+    try:
+        binary = ''.join([NIBBLE_BITS[digit] for digit in hex_])
+    except KeyError:
+        raise ValueError("The value '{}' is not a valid hexadecimal!".format(hex_))
 
     if bit_repr == 0:
         return binary
 
     if bit_repr < len(binary):
-         raise BinaryConvertException("The representation of hex '{}' in bits does not support {} bits".format(decimal, bit_repr))
+        raise BinaryConvertException("The representation of hex '{}' in bits does not support {} bits".format(hex_, bit_repr))
 
     return ('0' * (bit_repr - len(binary))) + binary
 
-def hd(hex_: str) -> str:
-    return bd(hb(hex_))
+def hd(hex_: str) -> int:
+    hex_ = _strip_hex(hex_)
+    if hex_.translate(NOT_HEX):
+        raise ValueError("The value '{}' is not a valid hexadecimal!".format(hex_))
+
+    return int(hex_, 16) if hex_ else 0
 
 def dh(decimal: str | int) -> str:
-    return bh(db(decimal))
+    decimal = int(decimal)
+    if 0 <= decimal < 256:
+        return OCTET_HEX[decimal]
+
+    return format(decimal, 'x')
+
+def bd_many(binaries: [str]) -> [int]:
+    """
+    bd over a list of binary strings.
+    """
+    return [bd(binary) for binary in binaries]
+
+def db_many(decimals, bit_repr: int = 0) -> [str]:
+    """
+    db over a list (or array) of integers.
+
+    Ex:
+        db_many([10, 0, 4, 1], 8) == ['00001010', '00000000', '00000100', '00000001']
+    """
+    decimals = decimals.tolist() if hasattr(decimals, 'tolist') else decimals
+
+    if bit_repr == 8 and all([0 <= decimal < 256 for decimal in decimals]):
+        return [OCTET_BITS[decimal] for decimal in decimals]
+
+    return [_bits(int(decimal), bit_repr, decimal) for decimal in decimals]
+
+def hd_many(hexes: [str]) -> [int]:
+    """
+    hd over a list of hexadecimal strings.
+    """
+    return [hd(hex_) for hex_ in hexes]
+
+def dh_many(decimals) -> [str]:
+    """
+    dh over a list (or array) of integers.
+    """
+    decimals = decimals.tolist() if hasattr(decimals, 'tolist') else decimals
+
+    return [dh(decimal) for decimal in decimals]
+
+def hb_many(hexes: [str], bit_repr: int = 0) -> [str]:
+    """
+    hb over a list of hexadecimal strings.
+    """
+    return [hb(hex_, bit_repr) for hex_ in hexes]
+
+def bh_many(binaries: [str]) -> [str]:
+    """
+    bh over a list of binary strings.
+    """
+    return [bh(binary) for binary in binaries]
+
+def pack_many(decimals, width: int = 1) -> bytes:
+    """
+    Packs a list (or array) of integers into big endian bytes, 'width'
+    bytes each: 1 for octets, 2 for hextets.
+
+    Ex:
+        pack_many([10, 0, 4, 1]) == b'\\n\\x00\\x04\\x01'
+        pack_many([0x2001, 0xdb8], 2) == b' \\x01\\r\\xb8'
+    """
+    if hasattr(decimals, 'astype'):
+        # The cast would wrap the values that do not fit, and truncate the ones that are not integers, silently
+        if decimals.dtype.kind not in 'iub':
+            raise TypeError("The values must be integers, not {}".format(decimals.dtype))
+
+        if decimals.size and (decimals.min() < 0 or decimals.max() >= 1 << (8 * width)):
+            _check_packed(decimals.ravel().tolist(), width)
+
+        return decimals.astype('>u{}'.format(width)).tobytes()
+
+    try:
+        if width == 1:
+            return bytes(decimals)
+
+        return struct.pack('>{}{}'.format(len(decimals), PACK_FORMATS[width]), *decimals)
+    except (struct.error, ValueError, TypeError):
+        _check_packed(decimals, width)
+        raise
+
+def _check_packed(decimals, width: int):
+    """
+    Raises the error of the first value that can not be packed in 'width' bytes.
+    """
+    top = (1 << (8 * width)) - 1
+
+    for i, decimal in enumerate(decimals):
+        try:
+            value = operator.index(decimal)
+        except TypeError:
+            raise TypeError("The value {!r} at position {} is not an integer".format(decimal, i))
+
+        if not 0 <= value <= top:
+            raise ValueError("The value {} at position {} is not between 0 and {}".format(value, i, top))
+
+def unpack_many(buffer: bytes, width: int = 1) -> [int]:
+    """
+    Unpacks big endian bytes into a list of integers, 'width' bytes
+    each: 1 for octets, 2 for hextets.
+
+    Ex:
+        unpack_many(b' \\x01\\r\\xb8', 2) == [0x2001, 0xdb8]
+    """
+    if len(buffer) % width:
+        raise ValueError("The buffer size {} is not a multiple of {}".format(len(buffer), width))
+
+    if width == 1:
+        return list(buffer)
+
+    return list(struct.unpack('>{}{}'.format(len(buffer) // width, PACK_FORMATS[width]), buffer))
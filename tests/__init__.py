@@ -1,6 +1,6 @@
 import sys, os
 
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import netcalc
 
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from netcalc import allocator, audit, ipset
+
+def keys(prefixes):
+    return ['{}/{}'.format(prefix.IP, prefix.mask) for prefix in prefixes]
+
+def test_allocator_allocate_release_and_merge():
+    pool = allocator.Allocator(['10.0.0.0/24', '2001:db8::/64'])
+
+    assert keys([pool.allocate(26), pool.allocate(26), pool.allocate(25)]) == [
+        '10.0.0.0/26', '10.0.0.64/26', '10.0.0.128/25']
+    assert keys([pool.allocate(66, allocator.Ip.Ipv6)]) == ['2001:db8:0000:0000:0000:0000:0000:0000/66']
+
+    with pytest.raises(allocator.AllocationException):
+        pool.allocate(26)
+
+    pool.release('10.0.0.64/26')
+    with pytest.raises(allocator.AllocationException):
+        pool.release('10.0.0.64/26')
+
+    assert keys(pool.free()) == ['10.0.0.64/26', '2001:db8:0000:0000:4000:0000:0000:0000/66',
+                                 '2001:db8:0000:0000:8000:0000:0000:0000/65']
+
+    pool.release('10.0.0.0/26')
+    pool.release('10.0.0.128/25')
+    assert keys(pool.free())[0] == '10.0.0.0/24'
+    assert pool.available() == 256
+
+def test_allocator_allocate_specific():
+    pool = allocator.Allocator(['192.168.0.0/16'])
+
+    assert keys([pool.allocate_specific('192.168.77.64/27')]) == ['192.168.77.64/27']
+    with pytest.raises(allocator.AllocationException):
+        pool.allocate_specific('192.168.77.0/24')
+    with pytest.raises(allocator.AllocationException):
+        pool.allocate_specific('10.0.0.0/24')
+
+    assert pool.available() == 65536 - 32
+    assert ipset.IPSet(pool.free()) == ipset.IPSet(['192.168.0.0/16']) - ipset.IPSet(['192.168.77.64/27'])
+
+    with pytest.raises(allocator.AllocationException):
+        pool.add_parent('192.168.128.0/17')
+
+def test_allocator_random_operations_and_snapshot(tmp_path):
+    rnd = random.Random(16)
+    pool = allocator.Allocator(['10.0.0.0/16', '10.2.0.0/20'])
+    allocated = []
+
+    for i in range(3000):
+        if allocated and rnd.random() < 0.4:
+            pool.release(allocated.pop(rnd.randrange(len(allocated))))
+            continue
+
+        try:
+            allocated.append(pool.allocate(rnd.randrange(20, 31)))
+        except allocator.AllocationException:
+            pass
+
+    assert len(pool) == len(allocated)
+    assert list(audit.conflicts(list(pool.allocated()) + list(pool.free()))) == []
+    assert ipset.IPSet(list(pool.allocated()) + list(pool.free())) == ipset.IPSet(['10.0.0.0/16', '10.2.0.0/20'])
+
+    path = str(tmp_path / 'pool.json')
+    pool.snapshot(path)
+    restored = allocator.Allocator.restore(path)
+
+    assert keys(restored.allocated()) == keys(pool.allocated())
+    assert keys([restored.allocate(24) for i in range(3)]) == keys([pool.allocate(24) for i in range(3)])
+
+    for prefix in list(pool.allocated()):
+        pool.release(prefix)
+
+    assert keys(pool.free()) == ['10.0.0.0/16', '10.2.0.0/20']
@@ -0,0 +1,47 @@
+import random
+
+from netcalc import audit, subnet
+
+def summary(found):
+    return [(conflict.kind, str(conflict.first), str(conflict.second), conflict.start.IP, conflict.end.IP)
+            for conflict in found]
+
+def test_conflicts_kinds_and_gaps():
+    items = ['10.0.0.0/8', '10.1.0.0/16', '10.1.0.0/16', '11.0.0.0/24', '11.0.0.128-11.0.1.10',
+             '11.0.3.0/24', '2001:db8::/32', '2001:db9::/32']
+
+    assert summary(audit.conflicts(items, gaps=True)) == [
+        ('nested', '10.0.0.0/8', '10.1.0.0/16', '10.1.0.0', '10.1.255.255'),
+        ('duplicate', '10.1.0.0/16', '10.1.0.0/16', '10.1.0.0', '10.1.255.255'),
+        ('nested', '10.0.0.0/8', '10.1.0.0/16', '10.1.0.0', '10.1.255.255'),
+        ('overlap', '11.0.0.0/24', '11.0.0.128-11.0.1.10', '11.0.0.128', '11.0.0.255'),
+        ('gap', '11.0.0.128-11.0.1.10', '11.0.3.0/24', '11.0.1.11', '11.0.2.255'),
+    ]
+
+    assert list(audit.conflicts(['2001:db8::/32', '2001:db9::/32'])) == []
+
+def test_conflicts_against_pairwise_comparison():
+    rnd = random.Random(15)
+    prefixes = []
+
+    for i in range(300):
+        mask = rnd.randrange(8, 29)
+        prefixes.append(subnet.Ipv4.from_int(rnd.getrandbits(32) & 0xff3f0000, mask))
+
+    def bounds(prefix):
+        first, last = prefix.calc().range
+        return (int(first), int(last))
+
+    expected = set()
+    for i in range(len(prefixes)):
+        for j in range(i + 1, len(prefixes)):
+            (a_start, a_end), (b_start, b_end) = bounds(prefixes[i]), bounds(prefixes[j])
+            if a_start <= b_end and b_start <= a_end:
+                expected.add(frozenset([i, j]))
+
+    index = {id(prefix): i for i, prefix in enumerate(prefixes)}
+    found = [frozenset([index[id(conflict.first)], index[id(conflict.second)]])
+             for conflict in audit.conflicts(prefixes)]
+
+    assert len(found) == len(set(found))
+    assert set(found) == expected
@@ -0,0 +1,187 @@
+import ipaddress
+import random
+
+import pytest
+
+from netcalc import calc, subnet, Ip
+
+def test_calc_ipv4():
+    assert calc.calc('10.0.4.1', 10) == {
+        'ip': '10.0.4.1/10', 'broadcast': '10.63.255.255', 'class': 'B',
+        'usable_range': ('10.0.0.1', '10.63.255.254'), 'net_address': '10.0.0.0',
+        'range': ('10.0.0.0', '10.63.255.255'), 'wildcard_mask': '0.63.255.255',
+        'subnet_mask': '255.192.0.0'}
+
+def test_calc_ipv6():
+    assert calc.calc('2001:db8:85a3::8a2e:370:7334', 37) == {
+        'ip': '2001:db8:85a3:0000:0000:8a2e:370:7334/37',
+        'net_address': '2001:db8:8000:0000:0000:0000:0000:0000',
+        'range': ('2001:db8:8000:0000:0000:0000:0000:0000', '2001:db8:87ff:ffff:ffff:ffff:ffff:ffff'),
+        'usable_range': ('2001:db8:8000:0000:0000:0000:0000:1', '2001:db8:87ff:ffff:ffff:ffff:ffff:fffe'),
+        'wildcard_mask': '0000:0000:7ff:ffff:ffff:ffff:ffff:ffff',
+        'subnet_mask': 'ffff:ffff:f800:0000:0000:0000:0000:0000'}
+
+@pytest.mark.parametrize('IP, mask, expected', [
+    ('10.0.4.1', 0, ('0.0.0.0', '255.255.255.255')),
+    ('10.0.4.0', 31, ('10.0.4.0', '10.0.4.1')),
+    ('10.0.4.1', 32, ('10.0.4.1', '10.0.4.1')),
+    ('::1', 128, ('0000:0000:0000:0000:0000:0000:0000:1', '0000:0000:0000:0000:0000:0000:0000:1')),
+])
+def test_ip_range_edges(IP, mask, expected):
+    assert tuple(ip.IP for ip in calc.ip_range(IP, mask)) == expected
+
+def test_usable_range_empty():
+    assert all(ip.empty() for ip in calc.ip_usable_range('10.0.4.1', 31))
+    assert all(ip.empty() for ip in calc.ip_usable_range('2001:db8::1', 127))
+
+def test_invalid_mask():
+    with pytest.raises(calc.MaskException):
+        calc.net_address('10.0.4.1', 33)
+
+    with pytest.raises(calc.MaskException):
+        calc.net_address('2001:db8::1', 129)
+
+    # Integral floats are still taken as their integer, other values are not masks
+    assert calc.calc('10.0.0.1', 24.0) == calc.calc('10.0.0.1', 24)
+    for mask in (24.5, '24', None, float('nan')):
+        with pytest.raises(calc.MaskException):
+            calc.calc('10.0.0.1', mask)
+        with pytest.raises(calc.MaskException):
+            calc.ipv6_mask(mask)
+
+def test_address_value():
+    IP = Ip.Ipv4('10.0.4.1', True)
+
+    assert int(IP) == 0x0a000401
+    assert Ip.Ipv4.from_int(0x0a000401).IP == '10.0.4.1'
+    assert Ip.Ipv6.from_int(1).IP == '0000:0000:0000:0000:0000:0000:0000:1'
+    assert subnet.Ipv4('10.0.4.1', 10).bin() == '00001010.00000000.00000100.00000001'
+    assert not hasattr(IP, '__dict__')
+
+def test_calc_many_matches_calc():
+    np = pytest.importorskip('numpy')
+
+    IPs = ['10.0.4.1', '192.168.1.77', '0.0.0.0', '255.255.255.255']
+    masks = [10, 31, 0, 32]
+    result = calc.calc_many(np.array([int(Ip.Ip(IP)) for IP in IPs], dtype=np.uint32), masks)
+
+    assert list(calc.calc_many_rows(result)) == [calc.calc(IP, mask) for IP, mask in zip(IPs, masks)]
+
+def test_calc_many_ipv6_lanes():
+    np = pytest.importorskip('numpy')
+
+    IPs = [Ip.Ip('2001:db8:85a3::8a2e:370:7334'), Ip.Ip('::1'), Ip.Ip('fe80::1')]
+    masks = [37, 128, 64]
+    lanes = np.array([(int(IP) >> 64, int(IP) & (2 ** 64 - 1)) for IP in IPs], dtype=np.uint64)
+    structured = np.empty(len(IPs), dtype=calc.IPV6_LANES_DTYPE)
+    structured['hi'], structured['lo'] = lanes[:, 0], lanes[:, 1]
+    expected = [calc.calc(Ip.Ipv6.from_int(int(IP)), mask) for IP, mask in zip(IPs, masks)]
+
+    assert list(calc.calc_many_rows(calc.calc_many(lanes, masks))) == expected
+    assert list(calc.calc_many_rows(calc.calc_many(structured, masks))) == expected
+
+def test_calc_many_invalid_mask():
+    np = pytest.importorskip('numpy')
+
+    with pytest.raises(calc.MaskException):
+        calc.calc_many(np.zeros(2, dtype=np.uint32), [8, 33])
+
+def test_mask_tables():
+    assert len(calc.MASK_TABLES['ipv4']) == 33
+    assert len(calc.MASK_TABLES['ipv6']) == 129
+    assert calc.subnet_mask(20, Ip.Ipv4).IP == '255.255.240.0'
+    assert calc.wildcard_mask(20, Ip.Ipv4).IP == '0.0.15.255'
+    assert int(calc.subnet_mask(64, Ip.Ipv6)) == ((1 << 64) - 1) << 64
+    assert [calc.ip_class(mask) for mask in (0, 8, 9, 16, 17, 32)] == ['A', 'A', 'B', 'B', 'C', 'C']
+    assert calc.host_count(24, Ip.Ipv4) == 256
+    assert calc.host_count(24, Ip.Ipv4, True) == 254
+    assert calc.host_count(31, Ip.Ipv4, True) == 0
+    assert calc.host_count(64, Ip.Ipv6) == 2 ** 64
+    assert subnet.Ipv4('10.0.4.1', 10).submask().IP == '255.192.0.0'
+
+def test_subnet_info():
+    info = subnet.Ipv4('10.0.4.1', 10).calc()
+
+    assert info == calc.calc('10.0.4.1', 10)
+    assert info.to_dict() == calc.calc('10.0.4.1', 10)
+    assert info['broadcast'] == '10.63.255.255'
+    assert info.net_address.IP == '10.0.0.0'
+    assert [ip.IP for ip in info.usable_range] == ['10.0.0.1', '10.63.255.254']
+    assert info.ip_class == 'B'
+    assert info.hosts == 2 ** 22
+
+    with pytest.raises(AttributeError):
+        info.mask = 8
+
+    info = calc.SubnetInfo('2001:db8::1', 127)
+    assert all(ip.empty() for ip in info.usable_range)
+    assert info.to_dict() == calc.calc('2001:db8::1', 127)
+    assert 'broadcast' not in info.to_dict()
+
+def test_subnet_info_is_a_value():
+    sub = subnet.Subnet('10.0.4.1/24')
+    info = sub.calc()
+
+    # The subnet can not be changed afterwards, and the result only keeps its value
+    with pytest.raises(AttributeError):
+        sub.IP = '192.168.1.1'
+
+    assert info.to_dict() == calc.calc('10.0.4.1', 24)
+    assert info.ip.IP == '10.0.4.1'
+
+    assert hash(info) == hash(calc.SubnetInfo('10.0.4.1', 24))
+    assert len({info, calc.SubnetInfo('10.0.4.1', 24), calc.SubnetInfo('10.0.4.1', 25)}) == 2
+
+def test_range_cidrs_minimal():
+    rng = random.Random(19)
+
+    for IP, address in ((Ip.Ipv4, ipaddress.IPv4Address), (Ip.Ipv6, ipaddress.IPv6Address)):
+        tbits = IP.tbits
+        for _ in range(200):
+            first = rng.getrandbits(tbits)
+            last = min(first + rng.getrandbits(rng.randint(0, tbits)), 2 ** tbits - 1)
+            expected = [(str(net.network_address), net.prefixlen)
+                        for net in ipaddress.summarize_address_range(address(first), address(last))]
+
+            assert [(ipaddress.ip_address(int(net)).compressed, mask)
+                    for net, mask in calc.range_cidrs(IP.from_int(first), IP.from_int(last))] == expected
+
+    assert [(net.IP, mask) for net, mask in calc.range_cidrs('0.0.0.0', '255.255.255.255')] == [('0.0.0.0', 0)]
+
+    with pytest.raises(ValueError):
+        calc.range_cidrs('10.0.0.2', '10.0.0.1')
+    with pytest.raises(ValueError):
+        calc.range_cidrs('10.0.0.1', '::1')
+
+def test_range_cidrs_many_matches_range_cidrs():
+    np = pytest.importorskip('numpy')
+    rng = random.Random(19)
+
+    firsts = [rng.getrandbits(32) for _ in range(300)] + [0, 0, 2 ** 32 - 1]
+    lasts = [min(first + rng.getrandbits(rng.randint(0, 32)), 2 ** 32 - 1) for first in firsts[:-3]]
+    lasts += [2 ** 32 - 1, 0, 2 ** 32 - 1]
+    nets, masks, offsets = calc.range_cidrs_many(np.array(firsts, dtype=np.uint32), np.array(lasts, dtype=np.uint32))
+
+    assert nets.dtype == np.uint32 and len(offsets) == len(firsts) + 1
+    for i, (first, last) in enumerate(zip(firsts, lasts)):
+        expected = [(int(net), mask) for net, mask in calc.range_cidrs(Ip.Ipv4.from_int(first), Ip.Ipv4.from_int(last))]
+        assert list(zip(nets[offsets[i]:offsets[i + 1]].tolist(), masks[offsets[i]:offsets[i + 1]].tolist())) == expected
+
+    firsts = [0x20010db8 << 96 | 1, 0, 2 ** 128 - 2]
+    lasts = [(0x20010db8 << 96) + 2 ** 70, 2 ** 128 - 1, 2 ** 128 - 1]
+    lanes = lambda values: np.array([(value >> 64, value & (2 ** 64 - 1)) for value in values], dtype=np.uint64)
+    nets, masks, offsets = calc.range_cidrs_many(lanes(firsts), lanes(lasts))
+
+    for i, (first, last) in enumerate(zip(firsts, lasts)):
+        expected = [(int(net), mask) for net, mask in calc.range_cidrs(Ip.Ipv6.from_int(first), Ip.Ipv6.from_int(last))]
+        assert [(int(hi) << 64 | int(lo), int(mask)) for (hi, lo), mask
+                in zip(nets[offsets[i]:offsets[i + 1]], masks[offsets[i]:offsets[i + 1]])] == expected
+
+    with pytest.raises(ValueError):
+        calc.range_cidrs_many(np.array([2], dtype=np.uint32), np.array([1], dtype=np.uint32))
+
+    # The address out of the space is the one reported
+    with pytest.raises(Ip.Ipv4Exception, match="'-5'"):
+        calc.range_cidrs_many(np.array([-5, 1]), np.array([3, 2 ** 32 - 1]))
+    with pytest.raises(Ip.Ipv4Exception, match="'4294967296'"):
+        calc.range_cidrs_many(np.array([1]), np.array([2 ** 32]))
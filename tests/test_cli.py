@@ -0,0 +1,31 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+from netcalc import calc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+LINES = ['10.0.4.1/10', '', '192.168.1.7/31', 'not-an-ip/8', '2001:db8::1/64']
+
+def run(*args):
+    return subprocess.run([sys.executable, '-m', 'netcalc', *args], input='\n'.join(LINES) + '\n',
+                          capture_output=True, text=True, cwd=ROOT)
+
+def test_cli_jsonl():
+    result = run('-c', '2')
+    expected = [calc.calc('10.0.4.1', 10), calc.calc('192.168.1.7', 31), calc.calc('2001:db8::1', 64)]
+
+    assert result.returncode == 1
+    assert 'line 4' in result.stderr
+    assert [json.loads(line) for line in result.stdout.splitlines()] == json.loads(json.dumps(expected))
+
+def test_cli_pool_csv():
+    ordered = run('-f', 'csv', '-c', '1', '-j', '2')
+    unordered = run('-f', 'csv', '-c', '1', '-j', '2', '-u')
+
+    assert ordered.stdout.splitlines()[0].startswith('ip,net_address,broadcast')
+    assert ordered.stdout.splitlines()[1].startswith('10.0.4.1/10,10.0.0.0,10.63.255.255,B')
+    assert len(ordered.stdout.splitlines()) == 4
+    assert sorted(ordered.stdout.splitlines()) == sorted(unordered.stdout.splitlines())
@@ -0,0 +1,68 @@
+import pytest
+
+from netcalc.util import convert
+
+def test_single_conversions():
+    assert convert.bd('00001010') == 10
+    assert convert.bd('') == 0
+    assert convert.db(10, 8) == '00001010'
+    assert convert.db(0x2001, 16) == '0010000000000001'
+    assert convert.db('7') == '111'
+    assert convert.bh('0010000000000001') == '2001'
+    assert convert.hb('0x0dB8') == '0000110110111000'
+    assert convert.hb('a', 8) == '00001010'
+    assert convert.hd('0DB8') == 0xdb8
+    assert convert.dh(255) == 'ff'
+    assert convert.dh(0x2001) == '2001'
+
+    with pytest.raises(ValueError):
+        convert.bd('102')
+    with pytest.raises(ValueError):
+        convert.hd('12g')
+    with pytest.raises(ValueError):
+        convert.hb('1_0')
+    with pytest.raises(convert.BinaryConvertException):
+        convert.db(256, 8)
+    with pytest.raises(convert.BinaryConvertException):
+        convert.hb('fff', 8)
+
+def test_bulk_conversions():
+    octets = [10, 0, 4, 255]
+    hextets = [0x2001, 0xdb8, 0, 1]
+
+    assert convert.db_many(octets, 8) == [convert.db(octet, 8) for octet in octets]
+    assert convert.bd_many(convert.db_many(hextets, 16)) == hextets
+    assert convert.hd_many(convert.dh_many(hextets)) == hextets
+    assert convert.bh_many(convert.hb_many(['2001', 'db8'])) == ['2001', 'db8']
+
+    assert convert.pack_many(octets) == bytes([10, 0, 4, 255])
+    assert convert.unpack_many(convert.pack_many(hextets, 2), 2) == hextets
+
+    with pytest.raises(ValueError):
+        convert.unpack_many(b'\x01\x02\x03', 2)
+
+    # The error names the value that can not be packed
+    with pytest.raises(ValueError, match='300 at position 1'):
+        convert.pack_many([1, 300])
+    with pytest.raises(TypeError, match="'a' at position 1"):
+        convert.pack_many([1, 'a'], 2)
+    with pytest.raises(TypeError, match='2.5 at position 0'):
+        convert.pack_many([2.5])
+
+def test_bulk_conversions_of_arrays():
+    np = pytest.importorskip('numpy')
+    hextets = np.array([0x2001, 0xdb8, 0, 1], dtype=np.uint16)
+
+    assert convert.pack_many(hextets, 2) == bytes.fromhex('20010db800000001')
+    assert convert.dh_many(hextets) == ['2001', 'db8', '0', '1']
+    assert convert.db_many(np.array([1, 2], dtype=np.uint8), 8) == ['00000001', '00000010']
+
+    # Values out of range are rejected like in lists, not wrapped
+    for values, width in (([2 ** 32 + 5], 4), ([256], 1), ([-1], 2), ([2 ** 16], 2)):
+        with pytest.raises(ValueError):
+            convert.pack_many(values, width)
+        with pytest.raises(ValueError):
+            convert.pack_many(np.array(values), width)
+
+    with pytest.raises(TypeError):
+        convert.pack_many(np.array([1.5, 2.0]))
@@ -0,0 +1,94 @@
+import ipaddress
+import random
+
+from netcalc import diff, prefixfile, subnet, table
+
+def text(prefix):
+    if isinstance(prefix, tuple):
+        return tuple([text(item) for item in prefix])
+
+    return prefix and ipaddress.ip_network('{}/{}'.format(prefix.IP, prefix.mask), strict=False).compressed
+
+def summary(changes):
+    return [(change.kind, text(change.old), text(change.new), change.old_value, change.new_value)
+            for change in changes]
+
+def test_diff_kinds():
+    old = {'10.0.0.0/23': 'a', '10.1.0.0/24': 'b', '10.2.0.0/24': 'c', '10.3.0.0/25': 'd', '10.3.0.128/25': 'e',
+           '10.4.0.0/16': 'f', '2001:db8::/33': 'g'}
+    new = {'10.0.0.0/24': 'a', '10.0.1.0/24': 'a', '10.1.0.0/24': 'x', '10.3.0.0/24': 'd', '10.4.0.0/16': 'f',
+           '10.5.0.0/16': 'h', '2001:db8::/32': 'g'}
+
+    assert summary(diff.diff(old, new)) == [
+        ('split', '10.0.0.0/23', ('10.0.0.0/24', '10.0.1.0/24'), 'a', ('a', 'a')),
+        ('changed', '10.1.0.0/24', '10.1.0.0/24', 'b', 'x'),
+        ('removed', '10.2.0.0/24', None, 'c', None),
+        ('merged', ('10.3.0.0/25', '10.3.0.128/25'), '10.3.0.0/24', ('d', 'e'), 'd'),
+        ('added', None, '10.5.0.0/16', None, 'h'),
+        ('added', None, '2001:db8::/32', None, 'g'),
+        ('removed', '2001:db8::/33', None, 'g', None),
+    ]
+
+    assert list(diff.diff(new, new)) == []
+
+def test_diff_inputs():
+    # Plain prefixes have no values, host bits are ignored and the last repeated prefix wins
+    assert summary(diff.diff(['10.0.4.1/24', '10.0.5.0/24'], [subnet.Subnet('10.0.4.0/23')])) == [
+        ('merged', ('10.0.4.0/24', '10.0.5.0/24'), '10.0.4.0/23', (None, None), None),
+    ]
+
+    assert summary(diff.diff([('10.0.0.0/8', 1), ('10.0.0.0/8', 2)], table.PrefixTable({'10.0.0.0/8': 3}))) == [
+        ('changed', '10.0.0.0/8', '10.0.0.0/8', 2, 3),
+    ]
+
+def test_diff_nested_prefixes():
+    # The /8 is still there, so the new /16s inside it are only added
+    old = ['0.0.0.0/0', '10.0.0.0/8', '10.1.0.0/16']
+    new = ['0.0.0.0/0', '10.0.0.0/8', '10.1.0.0/17', '10.1.128.0/17', '10.2.0.0/16']
+
+    assert summary(diff.diff(old, new)) == [
+        ('split', '10.1.0.0/16', ('10.1.0.0/17', '10.1.128.0/17'), None, (None, None)),
+        ('added', None, '10.2.0.0/16', None, None),
+    ]
+
+def test_diff_prefix_file(tmp_path):
+    prefixes = ['2001:db8::/32', '2001:db8:1::/48', '2001:db9::/32']
+    prefixfile.write(str(tmp_path / 'old.ncp'), prefixes, values=[1, 2, 3], value_dtype='u4')
+
+    with prefixfile.PrefixFile(str(tmp_path / 'old.ncp')) as old:
+        new = {'2001:db8::/32': 1, '2001:db8:1::/48': 5, '2001:db9::/33': 3, '2001:db9:8000::/33': 3}
+
+        assert summary(diff.diff(old, new)) == [
+            ('changed', '2001:db8:1::/48', '2001:db8:1::/48', 2, 5),
+            ('split', '2001:db9::/32', ('2001:db9::/33', '2001:db9:8000::/33'), 3, (3, 3)),
+        ]
+
+def test_diff_against_sets():
+    rnd = random.Random(24)
+    old = {}
+
+    for i in range(2000):
+        prefix = subnet.Ipv4.from_int(rnd.getrandbits(32) & 0xff0f0000, rnd.randrange(8, 25))
+        old[text(prefix)] = rnd.randrange(3)
+
+    new = dict([item for item in old.items() if rnd.random() > 0.1])
+    for prefix in rnd.sample(sorted(new), 100):
+        new[prefix] = 3
+
+    for i in range(200):
+        new[text(subnet.Ipv4.from_int(rnd.getrandbits(32) & 0xff0f0000, rnd.randrange(8, 25)))] = 0
+
+    added, removed, changed = set(), set(), set()
+    for change in diff.diff(old, new):
+        if change.kind == 'changed':
+            changed.add(text(change.old))
+        for prefix in (change.old if isinstance(change.old, tuple) else (change.old,)):
+            if change.kind != 'changed' and prefix is not None:
+                removed.add(text(prefix))
+        for prefix in (change.new if isinstance(change.new, tuple) else (change.new,)):
+            if change.kind != 'changed' and prefix is not None:
+                added.add(text(prefix))
+
+    assert removed == set(old) - set(new)
+    assert added == set(new) - set(old)
+    assert changed == set([prefix for prefix in set(old) & set(new) if old[prefix] != new[prefix]])
@@ -0,0 +1,91 @@
+from collections import Counter
+import random
+
+import pytest
+
+from netcalc import heavyhitters, calc, subnet, Ip
+
+def stream(rnd: random.Random, count: int):
+    # A few busy /24 and /16 over uniform noise
+    busy = [0x0a000100, 0x0a000200, 0xc0a80000]
+    for i in range(0, count):
+        draw = rnd.random()
+        if draw < 0.3:
+            yield busy[0] | rnd.getrandbits(8)
+        elif draw < 0.4:
+            yield busy[1] | rnd.getrandbits(4)
+        elif draw < 0.6:
+            yield busy[2] | rnd.getrandbits(16)
+        else:
+            yield rnd.getrandbits(32)
+
+def exact(values: [int], mask: int) -> Counter:
+    bits = calc.net_bits(mask, Ip.Ipv4)
+    return Counter([value & bits for value in values])
+
+def test_space_saving():
+    summary = heavyhitters.SpaceSaving(2)
+    for key in 'abacad':
+        summary.add(key)
+
+    assert len(summary) == 2
+    assert summary.top(1) == [('a', 3, 0)]
+    assert dict([(key, (count, error)) for key, count, error in summary.items()]) == {'a': (3, 0), 'd': (3, 2)}
+
+def test_counts_within_the_error_bound():
+    rnd = random.Random(22)
+    values = list(stream(rnd, 20000))
+    hitters = heavyhitters.HeavyHitters(epsilon=0.01, batch_size=1000)
+    hitters.update(iter(values))
+
+    assert hitters.total[Ip.Ipv4.type] == len(values)
+    bound = 0.01 * len(values)
+
+    for mask in (8, 16, 24, 32):
+        real = exact(values, mask)
+        for prefix, count, error in hitters.top(5, mask):
+            assert real[int(prefix)] <= count <= real[int(prefix)] + bound
+            assert count - error <= real[int(prefix)]
+
+    assert [prefix for prefix, count, error in hitters.top(2, 24)] == [subnet.Subnet('10.0.1.0/24'),
+                                                                      subnet.Subnet('10.0.2.0/24')]
+    assert hitters.top(1)[0][0] == subnet.Subnet('10.0.0.0/8')
+    assert hitters.count('10.0.1.0/24')[0] >= exact(values, 24)[0x0a000100]
+
+def test_heavy_and_hierarchical():
+    rnd = random.Random(23)
+    values = list(stream(rnd, 20000))
+    hitters = heavyhitters.HeavyHitters(epsilon=0.005)
+    for value in values[:5000]:
+        hitters.add(value)
+    hitters.update(values[5000:])
+
+    heavy = [(prefix.IP, prefix.mask) for prefix, count, error in hitters.heavy(0.15)]
+    assert ('10.0.1.0', 24) in heavy and ('192.168.0.0', 16) in heavy and ('10.0.0.0', 8) in heavy
+    assert ('10.0.2.0', 24) not in heavy
+
+    # Every prefix that really reaches the threshold is reported
+    for mask in (8, 16, 24):
+        for net, count in exact(values, mask).items():
+            if count >= 0.15 * len(values):
+                assert (Ip.Ipv4.to_str(net), mask) in heavy
+
+    # Without the busy /24 inside them, the /8 and the /22 are not heavy on their own
+    hierarchical = {(prefix.IP, prefix.mask): count for prefix, count, error in hitters.heavy(0.18, hierarchical=True)}
+    assert sorted(hierarchical) == [('10.0.1.0', 24), ('192.168.0.0', 16)]
+    assert hierarchical[('10.0.1.0', 24)] == hitters.count('10.0.1.0/24')[0]
+
+def test_mixed_input_types():
+    hitters = heavyhitters.HeavyHitters(epsilon=0.1, masks4=[24, 32], masks6=[32, 64])
+    hitters.update(['10.0.4.1', Ip.Ip('10.0.4.2'), 0x0a000403, '2001:db8::1', subnet.Subnet('2001:db8::2/128')])
+    hitters.add(1, IP_class=Ip.Ipv6)
+
+    assert hitters.masks() == [24, 32]
+    assert hitters.total == {Ip.Ipv4.type: 3, Ip.Ipv6.type: 3}
+    assert hitters.top(1, 24) == [(subnet.Subnet('10.0.4.0/24'), 3, 0)]
+    assert hitters.top(1, 32, Ip.Ipv6) == [(subnet.Subnet('2001:db8::/32'), 2, 0)]
+
+    with pytest.raises(ValueError):
+        hitters.top(1, 16)
+    with pytest.raises(Ip.Ipv4Exception):
+        hitters.update([2 ** 32])
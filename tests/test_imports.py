@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def run(code):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop('NETCALC_INSTRUMENT', None)
+
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd='/', env=env)
+
+def test_import_is_lazy_and_does_not_touch_sys_path():
+    result = run('\n'.join([
+        'import sys',
+        'path = list(sys.path)',
+        'import netcalc',
+        'assert sys.path == path',
+        'assert not [name for name in sys.modules if name.startswith("netcalc.")], sys.modules.keys()',
+        'assert netcalc.calc.calc("10.0.4.1", 24)["net_address"] == "10.0.4.0"',
+        'assert "numpy" not in sys.modules and "asyncio" not in sys.modules',
+        'assert "calc" not in sys.modules and "Ip" not in sys.modules',
+        'from netcalc.Ip import Ipv4',
+        'assert Ipv4 is netcalc.Ip.Ipv4',
+        'assert "subnet" in dir(netcalc)',
+    ]))
+
+    assert result.returncode == 0, result.stderr
+
+def test_unknown_attribute():
+    result = run('import netcalc; netcalc.missing')
+
+    assert "has no attribute 'missing'" in result.stderr
@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from netcalc import instrument, calc, subnet
+from netcalc.util import convert
+
+@pytest.fixture
+def instrumented():
+    instrument.enable(memory_every=2)
+    instrument.reset()
+    yield
+    instrument.disable()
+    instrument.reset()
+
+def test_instrument_records_stages(instrumented):
+    for i in range(10):
+        calc.calc('10.0.{}.1'.format(i), 24)
+
+    subnet.Ipv4('10.0.0.1', 24).net_address()
+    with pytest.raises(calc.MaskException):
+        calc.broadcast('10.0.0.1', 40)
+
+    stats = instrument.snapshot()
+
+    assert stats['calc.calc']['calls'] == 10
+    assert stats['calc.calc:body']['calls'] == 10
+    assert stats['calc.IPCalc']['calls'] == 12
+    assert stats['calc.broadcast']['errors'] == 1
+    assert stats['Ip.Ip']['calls'] >= 12
+    assert stats['calc.calc']['total_ms'] >= stats['calc.calc:body']['total_ms']
+    assert stats['calc.calc']['p50_us'] <= stats['calc.calc']['p99_us'] <= stats['calc.calc']['max_us']
+    assert stats['calc.calc']['memory_samples'] == 5
+
+    out = io.StringIO()
+    instrument.report(out)
+    assert out.getvalue().splitlines()[0].startswith('stage')
+
+def test_instrument_disable_restores_functions():
+    original, body = calc.calc, calc.calc.__wrapped__
+
+    instrument.enable()
+    assert calc.calc is not original and calc.calc.__name__ == 'timed'
+    with pytest.raises(instrument.InstrumentException):
+        instrument.enable()
+
+    instrument.disable()
+    instrument.reset()
+
+    assert calc.calc is original and calc.calc.__wrapped__ is body
+    assert convert.db(5, 8) == '00000101'
+    assert instrument.snapshot() == {}
+
+def test_instrument_enable_failure_restores_functions(monkeypatch):
+    original, body, db = calc.calc, calc.calc.__wrapped__, convert.db
+    monkeypatch.setitem(instrument.TARGETS, convert, ['db', 'missing'])
+
+    with pytest.raises(AttributeError):
+        instrument.enable(memory_every=2)
+
+    assert not instrument.enabled()
+    assert calc.calc is original and calc.calc.__wrapped__ is body and convert.db is db
+
+def test_instrument_from_environment(tmp_path):
+    path = str(tmp_path / 'stats.jsonl')
+    env = dict(os.environ, NETCALC_INSTRUMENT='1', NETCALC_INSTRUMENT_DUMP=path)
+    code = 'import netcalc.calc; netcalc.calc.calc("10.0.4.1", 24); netcalc.instrument.stop_dump()'
+
+    subprocess.run([sys.executable, '-c', code], check=True, env=env,
+                   cwd=os.path.join(os.path.dirname(__file__), '..'))
+
+    with open(path) as f:
+        assert json.loads(f.readline())['stats']['calc.calc']['calls'] == 1
+
+def test_instrument_dump(instrumented, tmp_path):
+    path = str(tmp_path / 'stats.jsonl')
+
+    instrument.start_dump(path, interval=60)
+    calc.Ip.Ip('2001:db8::1')
+    instrument.stop_dump()
+
+    lines = [json.loads(line) for line in open(path)]
+    assert lines[-1]['stats']['Ip.Ip']['calls'] == 1
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from netcalc import ipset, Ip
+
+def addresses(ip_set):
+    return {value for first, last in ip_set.ranges() for value in range(int(first), int(last) + 1)}
+
+def random_set(rnd):
+    items = []
+    for i in range(rnd.randrange(0, 8)):
+        start = rnd.randrange(0, 256)
+        items.append((Ip.Ipv4.from_int(start), Ip.Ipv4.from_int(min(255, start + rnd.randrange(0, 40)))))
+
+    return ipset.IPSet(items)
+
+def test_ipset_operations_against_python_sets():
+    rnd = random.Random(3)
+
+    for i in range(300):
+        a, b = random_set(rnd), random_set(rnd)
+
+        assert addresses(a | b) == addresses(a) | addresses(b)
+        assert addresses(a & b) == addresses(a) & addresses(b)
+        assert addresses(a - b) == addresses(a) - addresses(b)
+        assert addresses(a ^ b) == addresses(a) ^ addresses(b)
+        assert (a - b).size == len(addresses(a) - addresses(b))
+        assert (a | b).size == len(addresses(a) | addresses(b))
+        assert ipset.IPSet((a - b).cidrs()) == a - b
+
+def test_ipset_cidrs_and_membership():
+    s = ipset.IPSet(['10.0.0.0/25', '10.0.0.128/25', '10.0.1.0-10.0.1.2', '2001:db8::/33', '2001:db8:8000::/33'])
+
+    assert [(prefix.IP, prefix.mask) for prefix in s.cidrs()] == [
+        ('10.0.0.0', 24), ('10.0.1.0', 31), ('10.0.1.2', 32), ('2001:db8:0000:0000:0000:0000:0000:0000', 32)]
+    assert '10.0.0.77' in s
+    assert '10.0.1.0/30' not in s
+    assert '2001:db8:1::/48' in s
+    assert s.size == 256 + 3 + 2 ** 96
+    assert (s - ['0.0.0.0/0', '::/0']).size == 0
+
+def test_ipset_invalid_ranges():
+    for item in ['10.0.0.1-10.0.0.5-10.0.0.9', ('10.0.0.1', '10.0.0.5', '10.0.0.9'), '10.0.0.5-10.0.0.1']:
+        with pytest.raises(ValueError):
+            ipset.IPSet([item])
@@ -0,0 +1,45 @@
+import pytest
+
+from netcalc import Ip
+
+@pytest.mark.parametrize('IP, expected', [
+    ('10.0.4.1', ('ipv4', 0x0a000401)),
+    ('255.255.255.255', ('ipv4', 2 ** 32 - 1)),
+    ('::', ('ipv6', 0)),
+    ('::1', ('ipv6', 1)),
+    ('1::', ('ipv6', 1 << 112)),
+    ('2001:db8::8a2e:370:7334', ('ipv6', 0x20010db80000000000008a2e03707334)),
+    ('1:2:3:4:5:6:7:8', ('ipv6', 0x00010002000300040005000600070008)),
+    ('::ffff:10.0.4.1', ('ipv6', 0xffff0a000401)),
+    ('1:2:3:4:5:6:10.0.4.1', ('ipv6', 0x000100020003000400050006 << 32 | 0x0a000401)),
+])
+def test_parse_valid(IP, expected):
+    assert Ip.parse(IP) == expected
+
+@pytest.mark.parametrize('IP', [
+    '1.2.3', '1.2.3.4.5', '256.1.1.1', '+1.2.3.4', ' 1.2.3.4', '1.2.3.4/8', '',
+    ':::', '1::2::3', '1:2:3:4:5:6:7', '1:2:3:4:5:6:7:8:9', '12345::', 'g::', '::1.2.3', '1::2:',
+    '::2:3:4:5:6:7:8:9', '::ffff:256.1.1.1',
+])
+def test_parse_invalid(IP):
+    with pytest.raises((Ip.Ipv4Exception, Ip.Ipv6Exception)):
+        Ip.parse(IP)
+
+    assert not Ip.is_ipv4(IP)
+    assert not Ip.is_ipv6(IP)
+
+def test_ip_builds_from_parser():
+    assert Ip.Ip('10.0.4.1').IP == '10.0.4.1'
+    assert Ip.Ip('2001:db8:85a3::8a2e:370:7334').IP == '2001:db8:85a3:0000:0000:8a2e:370:7334'
+    assert Ip.Ipv6('::1', True).IP == '0000:0000:0000:0000:0000:0000:0000:1'
+
+def test_parse_many():
+    np = pytest.importorskip('numpy')
+
+    assert Ip.parse_many(b'10.0.4.1\r\n\n255.255.255.255\n').tolist() == [0x0a000401, 2 ** 32 - 1]
+    assert Ip.parse_many(' 10.0.4.1 \n0.0.0.0').tolist() == [0x0a000401, 0]
+    assert Ip.parse_many('::1\n2001:db8::\n').tolist() == [[0, 1], [0x20010db800000000, 0]]
+    assert Ip.parse_many(b'').shape == (0,)
+
+    with pytest.raises(Ip.Ipv4Exception):
+        Ip.parse_many(b'10.0.4.1\n10.0.4.256\n')
@@ -0,0 +1,33 @@
+import pytest
+
+from netcalc import planner, Ip
+
+def prefixes(subnets):
+    return [(sub.IP, sub.mask) for sub in subnets]
+
+def test_plan_vlsm():
+    allocated, free = planner.plan('192.168.0.0/24', [10, 100, 50])
+
+    assert [(hosts, sub.IP, sub.mask) for hosts, sub in allocated] == [
+        (10, '192.168.0.192', 28), (100, '192.168.0.0', 25), (50, '192.168.0.128', 26)]
+    assert prefixes(free) == [('192.168.0.208', 28), ('192.168.0.224', 27)]
+
+    with pytest.raises(planner.PlanException):
+        planner.plan('192.168.0.0/24', [200, 100])
+
+def test_split_and_subnets():
+    children, free = planner.split('10.0.0.0/24', 26, 3)
+
+    assert prefixes(children) == [('10.0.0.0', 26), ('10.0.0.64', 26), ('10.0.0.128', 26)]
+    assert prefixes(free) == [('10.0.0.192', 26)]
+    assert len(list(planner.subnets('10.0.0.0/16', 28))) == 4096
+    assert prefixes(planner.split('2001:db8::/32', 34, 1)[1]) == [
+        ('2001:db8:4000:0000:0000:0000:0000:0000', 34), ('2001:db8:8000:0000:0000:0000:0000:0000', 33)]
+
+    assert planner.split('10.0.0.0/24', 26, 0)[0] == [] and prefixes(planner.split('10.0.0.0/24', 26, 0)[1]) == [('10.0.0.0', 24)]
+    with pytest.raises(ValueError):
+        planner.split('10.0.0.0/24', 26, -2)
+
+def test_mask_for_hosts():
+    assert [planner.mask_for_hosts(hosts) for hosts in (1, 2, 3, 254, 255)] == [30, 30, 29, 24, 23]
+    assert planner.mask_for_hosts(2 ** 64 - 2, Ip.Ipv6) == 64
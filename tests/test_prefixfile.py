@@ -0,0 +1,86 @@
+import random
+
+import numpy as np
+import pytest
+
+from netcalc import prefixfile, table, calc, Ip
+
+def test_prefix_file_round_trip(tmp_path):
+    path = str(tmp_path / 'routes.ncp')
+    count = prefixfile.write(path, ['10.1.0.0/16', '10.0.0.0/8', '10.1.2.3/24', '192.168.0.1'],
+                             values=[2, 1, 3, 4], value_dtype='u4')
+    assert count == 4
+
+    with prefixfile.PrefixFile(path) as prefixes:
+        assert len(prefixes) == 4
+        assert prefixes.type == Ip.Ipv4.type
+        assert [(prefix.IP, prefix.mask, int(value)) for prefix, value in prefixes.items()] == [
+            ('10.0.0.0', 8, 1), ('10.1.0.0', 16, 2), ('10.1.2.0', 24, 3), ('192.168.0.1', 32, 4)]
+
+        prefix, value = prefixes.lookup('10.1.2.200')
+        assert (prefix.IP, prefix.mask, value) == ('10.1.2.0', 24, 3)
+        assert prefixes.lookup('10.1.3.1')[1] == 2
+        assert prefixes.lookup('11.0.0.1') is None
+        assert prefixes.calc()['broadcast'][0] == 0x0affffff
+
+def test_prefix_file_ipv6_without_values(tmp_path):
+    path = str(tmp_path / 'routes6.ncp')
+    prefixfile.write(path, ['2001:db8::/32', '2001:db8:1::/48', '::/0'])
+
+    with prefixfile.PrefixFile(path) as prefixes:
+        assert prefixes.values is None
+        assert prefixes.lookup('2001:db8:1::5')[0].mask == 48
+        assert prefixes.lookup('2001:db9::1')[0].mask == 0
+        assert calc.calc_many_rows(prefixes.calc()).__next__()['ip'] == '0000:0000:0000:0000:0000:0000:0000:0000/0'
+
+def test_prefix_file_against_prefix_table(tmp_path):
+    rnd = random.Random(12)
+    path = str(tmp_path / 'random.ncp')
+    reference = table.PrefixTable()
+
+    IPs = np.array([rnd.getrandbits(32) & 0xff0f00f0 for i in range(2000)], dtype=np.uint32)
+    masks = np.array([rnd.randrange(0, 33) for i in range(2000)], dtype=np.uint8)
+    for IP, mask in zip(IPs, masks):
+        reference.insert(calc.SubnetInfo(Ip.Ipv4.from_int(int(IP)), int(mask)).net_address.IP + '/' + str(mask), True)
+
+    # Repeated prefixes are written once
+    assert prefixfile.write_arrays(path, IPs, masks) == len(reference)
+
+    with prefixfile.PrefixFile(path) as prefixes:
+        queries = np.array([rnd.getrandbits(32) & 0xff0f00ff for i in range(500)], dtype=np.uint32)
+        found = prefixes.lookup_many(queries)
+
+        for query, i in zip(queries, found):
+            expected = reference.longest_match(Ip.Ipv4.from_int(int(query)))
+            if expected is None:
+                assert i == -1
+            else:
+                assert (prefixes.prefix(i).IP, prefixes.prefix(i).mask) == (expected[0].IP, expected[0].mask)
+
+        # Prefixes are matched by the longest prefix that covers all of them, like in the table
+        for query in queries[:100]:
+            prefix = '{}/{}'.format(Ip.Ipv4.to_str(int(query)), rnd.randrange(0, 33))
+            expected, found = reference.longest_match(prefix), prefixes.lookup(prefix)
+            assert (expected and (expected[0].IP, expected[0].mask)) == (found and (found[0].IP, found[0].mask))
+
+def test_prefix_file_repeated_prefixes(tmp_path):
+    path = str(tmp_path / 'repeated.ncp')
+
+    assert prefixfile.write(path, ['10.0.0.0/8', '10.1.0.0/16', '10.0.0.1/8', '10.0.0.0/8'],
+                            values=[1, 2, 3, 4], value_dtype='u4') == 2
+
+    with prefixfile.PrefixFile(path) as prefixes:
+        assert [(prefix.mask, int(value)) for prefix, value in prefixes.items()] == [(8, 4), (16, 2)]
+        assert prefixes.lookup('10.1.0.0/16')[0].mask == 16
+        assert prefixes.lookup('10.1.0.0/15')[0].mask == 8
+        assert prefixes.lookup('10.0.0.0/7') is None
+
+    with pytest.raises(ValueError):
+        prefixfile.write(path, ['10.0.0.0/8', '10.0.0.0/8'], values=[1])
+
+def test_prefix_file_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.ncp'
+    path.write_bytes(b'not a prefix file' * 8)
+
+    with pytest.raises(prefixfile.PrefixFileException):
+        prefixfile.PrefixFile(str(path))
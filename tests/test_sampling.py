@@ -0,0 +1,111 @@
+from collections import Counter
+
+import pytest
+
+from netcalc import sampling, subnet, ipset, Ip
+
+def test_addresses_are_allowed_and_reproducible():
+    sampler = sampling.Sampler('10.0.0.0/16', exclude=['10.0.1.0/24', '10.0.128.0/17'], usable=True, seed=23)
+    allowed = ipset.IPSet(['10.0.0.1-10.0.127.255']) - ipset.IPSet(['10.0.1.0/24'])
+
+    assert sampler.size == allowed.size
+    IPs = sampler.addresses(2000)
+    assert all([IP in allowed for IP in IPs])
+    assert [IP.IP for IP in IPs[:10]] == [IP.IP for IP in sampling.Sampler(
+        '10.0.0.0/16', exclude=['10.0.1.0/24', '10.0.128.0/17'], usable=True, seed=23).addresses(10)]
+
+def test_addresses_are_uniform():
+    sampler = sampling.Sampler('10.0.0.0/29', exclude=['10.0.0.2/31'], usable=True, seed=1)
+    counts = Counter([IP.IP for IP in sampler.addresses(8000)])
+
+    assert sorted(counts) == ['10.0.0.1', '10.0.0.4', '10.0.0.5', '10.0.0.6']
+    assert all([1700 < count < 2300 for count in counts.values()])
+
+def test_subnets():
+    sampler = sampling.Sampler('10.0.0.0/16', exclude=['10.0.0.128/25'], usable=True, seed=2)
+
+    for prefix in sampler.subnets(24, 500):
+        assert prefix.mask == 24 and int(prefix) & 0xff == 0
+        assert prefix.IP != '10.0.0.0'
+
+    # usable only excludes the network and broadcast addresses, not the subnets that hold them
+    assert sampling.Sampler('10.0.0.0/30', usable=True, seed=1).subnet(30) == subnet.Subnet('10.0.0.0/30')
+
+    with pytest.raises(sampling.SampleException):
+        sampling.Sampler('10.0.0.0/24', exclude=['10.0.0.5']).subnet(24)
+    with pytest.raises(sampling.SampleException):
+        sampling.Sampler('10.0.0.0/31', usable=True).address()
+    with pytest.raises(ValueError):
+        sampler.subnet(8)
+
+def test_ipv6():
+    sampler = sampling.Sampler('2001:db8::/32', exclude=['2001:db8::/33'], seed=3)
+    allowed = ipset.IPSet(['2001:db8:8000::/33'])
+
+    assert sampler.size == 2 ** 95
+    assert all([IP in allowed for IP in sampler.addresses(100)])
+    assert all([prefix.mask == 64 and prefix in allowed for prefix in sampler.subnets(64, 100)])
+
+def lanes_to_values(lanes):
+    return [(int(high) << 64) | int(low) for high, low in lanes]
+
+def test_many():
+    np = pytest.importorskip('numpy')
+
+    sampler = sampling.Sampler('10.0.0.0/8', exclude=['10.1.0.0/16', '10.0.0.0/9'], usable=True, seed=4)
+    values = sampler.addresses_many(20000)
+    assert values.dtype == np.uint32 and len(values) == 20000
+    assert all([sampler._allowed(int(value)) for value in values])
+    assert (values == sampling.Sampler('10.0.0.0/8', exclude=['10.1.0.0/16', '10.0.0.0/9'], usable=True,
+                                       seed=4).addresses_many(20000)).all()
+
+    nets = sampler.subnets_many(24, 1000)
+    assert not (nets & 0xff).any() and not ((nets >> 16) == 0x0a01).any()
+
+    # Every IPv6 path: exact ranks, random bits and Python integers
+    cases = [('2001:db8::/64', ['2001:db8::/66'], 0), ('2001:db8::/32', ['2001:db8::/33'], 0),
+             ('2001:db8::/32', ['2001:db8::/33', '2001:db8:8000::/34', '2001:db8:c000::/35'], 0),
+             ('2001:db8::/32', ['2001:db8::/33'], 64)]
+
+    for prefix, exclude, mask in cases:
+        sampler = sampling.Sampler(prefix, exclude=exclude, seed=5)
+        allowed = ipset.IPSet([prefix]) - ipset.IPSet(exclude)
+
+        if mask:
+            values = lanes_to_values(sampler.subnets_many(mask, 500))
+            assert all([value % 2 ** 64 == 0 and Ip.Ipv6.from_int(value) in allowed for value in values])
+        else:
+            values = lanes_to_values(sampler.addresses_many(500))
+            assert all([Ip.Ipv6.from_int(value) in allowed for value in values])
+
+        assert len(set(values)) > 490
+
+def test_permutation():
+    sampler = sampling.Sampler('10.0.0.0/22', exclude=['10.0.1.0/25'], usable=True, seed=6)
+    permutation = sampler.permutation()
+    IPs = [IP.IP for IP in permutation]
+
+    assert len(IPs) == len(set(IPs)) == sampler.size
+    assert set(IPs) == set([IP.IP for IP in subnet.Subnet('10.0.0.0/22').hosts()]) - \
+        set([IP.IP for IP in subnet.Subnet('10.0.1.0/25')])
+    assert IPs[:20] != sorted(IPs[:20])
+    assert [IP.IP for IP in sampling.Sampler('10.0.0.0/22', exclude=['10.0.1.0/25'], usable=True,
+                                             seed=6).permutation()] == IPs
+
+    # It can be resumed from its position
+    resumed = sampler.permutation()
+    first = [next(resumed).IP for i in range(0, 100)]
+    assert first + [IP.IP for IP in sampler.permutation(resumed.position)] == IPs
+
+    assert [IP.IP for IP in sampling.Sampler('10.0.0.7/32', seed=1).permutation()] == ['10.0.0.7']
+    assert next(sampling.Sampler('2001:db8::/32', seed=1).permutation()) in ipset.IPSet(['2001:db8::/32'])
+
+def test_unseeded_permutation_is_random():
+    orders = [[IP.IP for IP in sampling.Sampler('10.0.0.0/24').permutation()] for i in range(0, 2)]
+    assert orders[0] != orders[1]
+
+    # Still resumable within the same sampler
+    sampler = sampling.Sampler('10.0.0.0/24')
+    resumed = sampler.permutation()
+    first = [next(resumed).IP for i in range(0, 10)]
+    assert first + [IP.IP for IP in sampler.permutation(resumed.position)] == [IP.IP for IP in sampler.permutation()]
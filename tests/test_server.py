@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+
+from netcalc import server, calc
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 30))
+
+def test_server_unix_socket(tmp_path):
+    path = str(tmp_path / 'netcalc.sock')
+
+    async def scenario():
+        service = await server.Server(max_pending=8).start(path=path)
+        clients = [await server.Client.connect(path=path) for i in range(20)]
+
+        requests = [('10.0.{}.1'.format(i % 256), 8 + i % 25) for i in range(400)]
+        results = await asyncio.gather(*[clients[i % len(clients)].calc(IP, mask) for i, (IP, mask) in enumerate(requests)])
+
+        with pytest.raises(server.ServerException):
+            await clients[0].calc('10.0.0.300', 24)
+
+        stats = await clients[0].stats()
+
+        for client in clients:
+            await client.close()
+        await service.close()
+
+        return requests, results, stats
+
+    requests, results, stats = run(scenario())
+
+    assert results == [json.loads(json.dumps(calc.calc(IP, mask))) for IP, mask in requests]
+    assert stats['requests'] == 401
+    assert stats['errors'] == 1
+    assert stats['connections'] == 20
+    assert stats['batches'] < 401
+    assert 0 < stats['latency_us']['p50'] <= stats['latency_us']['p99'] <= stats['latency_us']['max']
+
+def test_server_tcp_raw_lines():
+    async def scenario():
+        service = await server.Server().start(port=0)
+        host, port = service.address
+        reader, writer = await asyncio.open_connection(host, port)
+
+        writer.write(b'{"id": 1, "prefix": "2001:db8::1/64"}\nnot json\n\n{"id": 3, "ip": "10.0.0.1"}\n')
+        answers = [json.loads(await reader.readline()) for i in range(3)]
+
+        writer.close()
+        await service.close()
+
+        return answers
+
+    answers = run(scenario())
+
+    assert answers[0] == {'id': 1, 'result': json.loads(json.dumps(calc.calc('2001:db8::1', 64)))}
+    assert answers[1]['id'] is None and 'Invalid request' in answers[1]['error']
+    assert answers[2]['id'] == 3 and 'mask' in answers[2]['error']
+
+def test_one_batch_serves_concurrent_clients(tmp_path, monkeypatch):
+    path = str(tmp_path / 'netcalc.sock')
+    batches = []
+    calc_many = calc.calc_many
+
+    def counted(IPs, masks, IP_type=None):
+        batches.append((IP_type, len(masks)))
+        return calc_many(IPs, masks, IP_type)
+
+    monkeypatch.setattr(calc, 'calc_many', counted)
+
+    async def scenario():
+        # The delay lets every client queue its request before the batch runs
+        service = await server.Server(batch_delay=0.2).start(path=path)
+        clients = [await server.Client.connect(path=path) for i in range(16)]
+
+        requests = [('10.1.{}.1'.format(i), 16 + i) for i in range(12)]
+        requests += [('2001:db8::{}'.format(i), 64) for i in range(4)]
+        results = await asyncio.gather(*[client.calc(IP, mask) for client, (IP, mask) in zip(clients, requests)])
+        stats = service.stats()
+
+        for client in clients:
+            await client.close()
+        await service.close()
+
+        return requests, results, stats
+
+    requests, results, stats = run(scenario())
+
+    assert results == [json.loads(json.dumps(calc.calc(IP, mask))) for IP, mask in requests]
+    assert stats['batches'] == 1
+    assert sorted(batches) == [('ipv4', 12), ('ipv6', 4)]
+
+def test_calc_batch_errors():
+    answers = server.calc_batch([{'ip': '10.0.0.1', 'mask': 24}, {'ip': '10.0.0.300', 'mask': 24},
+                                 {'prefix': '2001:db8::1/129'}, {'ip': 5, 'mask': 24}, {'prefix': '10.0.4.1/10'}])
+
+    assert answers[0] == ('result', calc.calc('10.0.0.1', 24))
+    assert [kind for kind, value in answers] == ['result', 'error', 'error', 'error', 'result']
+    assert answers[4] == ('result', calc.calc('10.0.4.1', 10))
+
+def test_calc_batch_masks():
+    answers = server.calc_batch([{'ip': '10.0.0.1', 'mask': 24.5}, {'ip': '10.0.0.1', 'mask': True},
+                                 {'ip': '10.0.0.1', 'mask': '24'}, {'prefix': '10.0.0.1/24.0'}, {'ip': '10.0.0.1', 'mask': None}])
+
+    assert [kind for kind, value in answers] == ['error', 'error', 'result', 'error', 'error']
+    assert answers[2] == ('result', calc.calc('10.0.0.1', 24))
+    assert answers[0][1] == str(calc.MaskException(24.5))
+
+def test_server_survives_a_failed_batch(monkeypatch):
+    failures = []
+
+    def calc_batch(messages):
+        if not failures:
+            failures.append(messages)
+            raise RuntimeError('boom')
+
+        return server_calc_batch(messages)
+
+    server_calc_batch = server.calc_batch
+    monkeypatch.setattr(server, 'calc_batch', calc_batch)
+
+    async def scenario():
+        service = await server.Server().start(port=0)
+        host, port = service.address
+        client = await server.Client.connect(host=host, port=port)
+
+        with pytest.raises(server.ServerException, match='boom'):
+            await client.calc('10.0.0.1', 24)
+        result = await client.calc('10.0.0.1', 24)
+
+        await client.close()
+        await service.close()
+
+        return result
+
+    assert run(scenario()) == json.loads(json.dumps(calc.calc('10.0.0.1', 24)))
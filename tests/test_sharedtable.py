@@ -0,0 +1,139 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import pickle
+import random
+import subprocess
+import sys
+
+import pytest
+
+from netcalc import sharedtable, table, Ip
+
+def random_table(rnd: random.Random, count: int) -> table.PrefixTable:
+    reference = table.PrefixTable()
+
+    for i in range(0, count):
+        if rnd.random() < 0.7:
+            mask = rnd.randint(8, 32)
+            reference['{}/{}'.format(Ip.Ipv4.to_str(rnd.getrandbits(32) & ~((1 << (32 - mask)) - 1)), mask)] = i % 50
+        else:
+            mask = rnd.randint(16, 64)
+            net = (0x2001 << 112 | rnd.getrandbits(112)) & ~((1 << (128 - mask)) - 1)
+            reference['{}/{}'.format(Ip.Ipv6.to_str(net), mask)] = 'v6-{}'.format(i % 20)
+
+        # Nested prefixes, so that the ranges have to be split
+        prefix, value = next(iter(reference.items())) if i % 10 == 0 else (None, None)
+        if prefix is not None and prefix.mask < prefix.tbits:
+            reference['{}/{}'.format(prefix.IP, prefix.mask + 1)] = 'nested'
+
+    return reference
+
+def addresses(rnd: random.Random, reference: table.PrefixTable) -> [str]:
+    result = []
+    for prefix, value in reference.items():
+        IP = Ip.Ipv4 if prefix.type == Ip.Ipv4.type else Ip.Ipv6
+        size = 1 << (IP.tbits - prefix.mask)
+        result += [IP.to_str(int(prefix) + offset) for offset in (0, size - 1, rnd.randrange(size), size)
+                   if int(prefix) + offset < 1 << IP.tbits]
+
+    return result + [Ip.Ipv4.to_str(rnd.getrandbits(32)) for i in range(0, 200)]
+
+def test_compiled_table_matches_prefix_table():
+    rnd = random.Random(20)
+    reference = random_table(rnd, 500)
+    compiled = sharedtable.CompiledTable.compile(reference)
+
+    for IP in addresses(rnd, reference):
+        match = reference.longest_match(IP)
+        assert compiled.lookup(IP) == (match[1] if match else None), IP
+
+    # Every range is covered by one value and they do not overlap
+    ranges = list(compiled.ranges())
+    assert all([int(first) <= int(last) for first, last, value in ranges])
+    assert all([int(a[1]) < int(b[0]) for a, b in zip(ranges, ranges[1:]) if a[0].type == b[0].type])
+    assert len(compiled.values) == len(set([value for prefix, value in reference.items()]))
+
+def test_lookup_many():
+    np = pytest.importorskip('numpy')
+    rnd = random.Random(21)
+    reference = random_table(rnd, 300)
+    compiled = sharedtable.CompiledTable.compile(reference)
+    IPs = [Ip.Ip(IP) for IP in addresses(rnd, reference)]
+
+    v4 = [IP for IP in IPs if IP.type == Ip.Ipv4.type]
+    found = compiled.lookup_many(np.array([int(IP) for IP in v4], dtype=np.uint32))
+    assert [compiled.values[i] if i >= 0 else None for i in found] == [compiled.lookup(IP) for IP in v4]
+
+    v6 = [int(IP) for IP in IPs if IP.type == Ip.Ipv6.type]
+    lanes = np.array([(IP >> 64, IP & (2 ** 64 - 1)) for IP in v6], dtype=np.uint64)
+    found = compiled.lookup_many(lanes)
+    assert [compiled.values[i] if i >= 0 else None for i in found] == [compiled.lookup(Ip.Ipv6.from_int(IP)) for IP in v6]
+
+def test_values_keep_their_type():
+    shared = ['dc1']
+    compiled = sharedtable.CompiledTable.compile([('10.0.0.0/8', 1), ('11.0.0.0/8', True), ('12.0.0.0/8', 1.0),
+                                                  ('13.0.0.0/8', shared), ('14.0.0.0/8', shared), ('15.0.0.0/8', ['dc1'])])
+    found = [compiled.lookup('{}.0.0.1'.format(first)) for first in range(10, 16)]
+
+    assert [(type(value), value) for value in found[:3]] == [(int, 1), (bool, True), (float, 1.0)]
+    assert found[3] == found[5] == ['dc1'] and len(compiled.values) == 5
+
+def test_empty_and_invalid():
+    compiled = sharedtable.CompiledTable.compile({})
+    assert len(compiled) == 0
+    assert compiled.lookup('10.0.0.1', 'none') == 'none'
+    assert compiled.lookup('::1') is None
+
+    with pytest.raises(sharedtable.SharedTableException):
+        sharedtable.CompiledTable(b'NCPREFIX' + bytes(100))
+
+def lookup_in_worker(args):
+    compiled, IPs = args
+    # The table arrives as the name of its block
+    return [compiled.lookup(IP) for IP in IPs]
+
+def test_publish_and_attach_from_workers():
+    compiled = sharedtable.CompiledTable.compile({'10.0.0.0/8': 'core', '10.1.0.0/16': {'site': 'dc1'},
+                                                  '2001:db8::/32': 'v6'})
+    shared = compiled.publish()
+
+    try:
+        assert len(pickle.dumps(shared)) < 200
+        IPs = ['10.1.2.3', '10.2.0.0', '2001:db8::1', '11.0.0.1']
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(lookup_in_worker, [(shared, IPs)] * 3))
+
+        assert results == [['core' if IP == '10.2.0.0' else compiled.lookup(IP) for IP in IPs]] * 3
+        assert results[0][0] == {'site': 'dc1'}
+
+        attached = sharedtable.CompiledTable.attach(shared.name)
+        assert attached.lookup('10.1.2.3') == {'site': 'dc1'}
+        attached.close()
+    finally:
+        shared.unlink()
+
+def test_workers_release_the_block_at_exit(tmp_path):
+    # Spawned workers unpickle the table and exit with it still attached. They import
+    # the main module again, so it has to be a file
+    script = tmp_path / 'workers.py'
+    script.write_text('\n'.join([
+        'import multiprocessing',
+        'from netcalc import sharedtable',
+        'def lookup(args):',
+        '    return args[0].lookup(args[1])',
+        'if __name__ == "__main__":',
+        '    shared = sharedtable.CompiledTable.compile({"10.0.0.0/8": "core", "2001:db8::/32": "v6"}).publish()',
+        '    try:',
+        '        with multiprocessing.get_context("spawn").Pool(2) as pool:',
+        '            print(pool.map(lookup, [(shared, "10.1.2.3"), (shared, "2001:db8::1")] * 4))',
+        '    finally:',
+        '        shared.unlink()',
+    ]))
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120,
+                            env=dict(os.environ, PYTHONPATH=root))
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == str(['core', 'v6'] * 4)
+    assert result.stderr == ''
@@ -0,0 +1,162 @@
+from bisect import bisect_left
+import gc
+
+import pytest
+
+from netcalc import subnet, Ip
+
+def ips(addresses):
+    return [address.IP for address in addresses]
+
+def test_subnet_addresses_sequence():
+    sub = subnet.Ipv4('10.0.4.1', 10)
+
+    assert len(sub) == 2 ** 22
+    assert sub[0].IP == '10.0.0.0'
+    assert sub[-1].IP == '10.63.255.255'
+    assert ips(sub[1000:1003]) == ['10.0.3.232', '10.0.3.233', '10.0.3.234']
+    assert ips(sub[5:1:-2]) == ['10.0.0.5', '10.0.0.3']
+    assert next(reversed(sub)).IP == '10.63.255.255'
+    assert ips(subnet.Ipv4('10.0.4.1', 30)) == ['10.0.4.0', '10.0.4.1', '10.0.4.2', '10.0.4.3']
+
+    with pytest.raises(IndexError):
+        sub[2 ** 22]
+
+def test_subnet_hosts():
+    assert ips(subnet.Ipv4('10.0.4.1', 30).hosts()) == ['10.0.4.1', '10.0.4.2']
+    assert list(subnet.Ipv4('10.0.4.1', 31).hosts()) == []
+    assert len(subnet.Ipv4('10.0.4.1', 10).hosts()) == 2 ** 22 - 2
+
+    # Masks that are not an int, but are accepted as one, work the same way
+    sub = subnet.Ipv4('10.0.4.1', 30.0)
+    assert ips(sub.addresses()) == ips(subnet.Ipv4('10.0.4.1', 30)) and ips(sub.hosts()) == ['10.0.4.1', '10.0.4.2']
+
+def test_subnet_ipv6_addresses():
+    sub = subnet.Ipv6('2001:db8::', 64)
+
+    assert sub.addresses().size == 2 ** 64
+    assert sub[-1].IP == '2001:db8:0000:0000:ffff:ffff:ffff:ffff'
+    assert sub[2 ** 63:][0].IP == '2001:db8:0000:0000:8000:0000:0000:0000'
+    assert sub
+
+    with pytest.raises(OverflowError, match=r'addresses\(\)\.size'):
+        len(sub)
+    with pytest.raises(OverflowError, match="'size'"):
+        len(sub.addresses())
+
+def test_address_equality_hash_and_order():
+    a, b = Ip.Ip('10.0.4.1'), Ip.Ipv4('10.0.4.1')
+
+    assert a == b and hash(a) == hash(b) and len({a, b}) == 1
+    assert Ip.Ip('10.0.4.1') != Ip.Ip('10.0.4.2')
+    assert Ip.Ip('::1') != Ip.Ipv4.from_int(1) and Ip.Ip('::1') != '::1'
+    assert sorted([Ip.Ip('::1'), Ip.Ip('10.0.4.2'), Ip.Ip('10.0.4.10'), Ip.Ip('9.255.0.0')]) == [
+        Ip.Ip('9.255.0.0'), Ip.Ip('10.0.4.2'), Ip.Ip('10.0.4.10'), Ip.Ip('::1')]
+
+    IPs = sorted([Ip.Ipv4.from_int(value) for value in range(0, 1000, 7)])
+    assert bisect_left(IPs, Ip.Ipv4.from_int(700)) == 100
+
+    with pytest.raises(TypeError):
+        Ip.Ip('10.0.4.1') < '10.0.4.2'
+
+def test_invalid_addresses_are_never_equal():
+    bad = Ip.Ipv4('999.1.1.1')
+
+    assert not bad == Ip.Ipv4('1.1.1.1') and bad != Ip.Ipv4('1.1.1.1')
+    assert Ip.Ipv4('1.1.1.1') != bad and bad == bad and Ip.Ipv6('zz::1') != Ip.Ipv6('::1')
+    assert Ip.Ipv4('1.1.1.1') not in [bad] and bad in [bad]
+    assert {bad: 1}.get(Ip.Ipv4('1.1.1.1')) is None and {bad: 1}[bad] == 1
+
+    # Ordering still needs valid addresses
+    with pytest.raises(Ip.Ipv4Exception):
+        bad < Ip.Ipv4('1.1.1.1')
+
+def test_subnet_equality_hash_and_order():
+    assert subnet.Subnet('10.0.4.0/24') == subnet.Ipv4('10.0.4.0', 24)
+    assert subnet.Subnet('10.0.4.0/24') != subnet.Subnet('10.0.4.0/25')
+    assert subnet.Subnet('10.0.4.1/32') == Ip.Ip('10.0.4.1')
+    assert hash(subnet.Subnet('10.0.4.1/32')) == hash(Ip.Ip('10.0.4.1'))
+    assert len({subnet.Subnet('10.0.0.0/8'), subnet.Subnet('10.0.0.0/8'), subnet.Subnet('10.0.0.0/16')}) == 2
+    assert sorted([subnet.Subnet('10.0.0.0/16'), subnet.Subnet('2001:db8::/32'), subnet.Subnet('10.0.0.0/8'),
+                   subnet.Subnet('9.0.0.0/8')]) == [subnet.Subnet('9.0.0.0/8'), subnet.Subnet('10.0.0.0/8'),
+                                                    subnet.Subnet('10.0.0.0/16'), subnet.Subnet('2001:db8::/32')]
+
+def test_intern_pool():
+    pool = Ip.InternPool()
+
+    first = pool.intern(Ip.Ip('10.0.4.1'))
+    assert pool.intern(Ip.Ip('10.0.4.1')) is first
+    assert pool.from_int(0x0a000401) is first
+    assert pool.parse('10.0.4.1') is first
+    assert pool.parse('::1') is pool.from_int(1, Ip.Ipv6)
+    assert pool.parse('::1') is not pool.from_int(1)
+
+    # Subnets are pooled apart from the addresses
+    prefix = pool.intern(subnet.Subnet('10.0.4.1/32'))
+    assert prefix is not first and pool.intern(subnet.Subnet('10.0.4.1/32')) is prefix
+
+    del first, prefix
+    gc.collect()
+    assert len(pool) == 0
+
+def test_hashed_objects_are_immutable():
+    pool = Ip.InternPool()
+    first = pool.intern(Ip.Ipv4('10.0.0.1'))
+    prefix = subnet.Subnet('10.0.0.0/24')
+    prefixes = {prefix}
+
+    with pytest.raises(AttributeError):
+        first.IP = '10.0.0.2'
+    with pytest.raises(AttributeError):
+        Ip.Ipv6('::1').IP = '::2'
+    with pytest.raises(AttributeError):
+        prefix.mask = 16
+    with pytest.raises(AttributeError):
+        prefix.IP = '10.0.1.0'
+
+    assert pool.intern(Ip.Ipv4('10.0.0.1')) is first and first.IP == '10.0.0.1'
+    assert subnet.Subnet('10.0.0.0/24') in prefixes and prefix.mask == 24
+
+def test_relatives():
+    prefix = subnet.Subnet('10.0.4.1/24')
+
+    assert prefix.supernet() == subnet.Subnet('10.0.4.0/23')
+    assert prefix.supernet(16) == subnet.Subnet('10.0.0.0/16')
+    assert prefix.supernet(24) == subnet.Subnet('10.0.4.0/24')
+    assert prefix.children() == (subnet.Subnet('10.0.4.0/25'), subnet.Subnet('10.0.4.128/25'))
+    assert prefix.sibling() == subnet.Subnet('10.0.5.0/24')
+    assert prefix.sibling().sibling() == subnet.Subnet('10.0.4.0/24')
+    assert prefix.next() == subnet.Subnet('10.0.5.0/24')
+    assert prefix.next(-5) == prefix.previous(5) == subnet.Subnet('9.255.255.0/24')
+
+    prefix6 = subnet.Subnet('2001:db8::/32')
+    assert prefix6.sibling() == subnet.Subnet('2001:db9::/32')
+    assert prefix6.children()[1] == subnet.Subnet('2001:db8:8000::/33')
+    assert prefix6.supernet(16) == subnet.Subnet('2001::/16')
+    assert subnet.Subnet('::/128').next().IP == Ip.Ip('::1').IP
+
+    for call in (subnet.Subnet('0.0.0.0/0').supernet, subnet.Subnet('0.0.0.0/0').sibling,
+                 subnet.Subnet('10.0.0.1/32').children, subnet.Subnet('255.255.255.0/24').next,
+                 subnet.Subnet('::/64').previous, lambda: prefix.supernet(25)):
+        with pytest.raises(ValueError):
+            call()
+
+def test_contains_and_arithmetic():
+    prefix = subnet.Subnet('10.0.0.0/16')
+
+    assert '10.0.4.1' in prefix and Ip.Ip('10.0.255.255') in prefix and '10.1.0.0' not in prefix
+    assert subnet.Subnet('10.0.4.0/24') in prefix and '10.0.0.0/16' in prefix and '10.0.0.0/8' not in prefix
+    assert '::a00:401' not in prefix and 167773185 not in prefix
+    assert '2001:db8:ffff::1' in subnet.Subnet('2001:db8::/32')
+
+    assert Ip.Ip('10.0.4.255') + 1 == 1 + Ip.Ip('10.0.4.255') == Ip.Ip('10.0.5.0')
+    assert Ip.Ip('10.0.5.0') - 1 == Ip.Ip('10.0.4.255')
+    assert Ip.Ip('10.0.5.0') - Ip.Ip('10.0.4.0') == 256
+    assert Ip.Ip('2001:db8::ffff') + 1 == Ip.Ip('2001:db8::1:0')
+
+    with pytest.raises(Ip.Ipv4Exception):
+        Ip.Ip('255.255.255.255') + 1
+    with pytest.raises(TypeError):
+        Ip.Ip('10.0.0.1') - Ip.Ip('::1')
+    with pytest.raises(TypeError):
+        prefix + 1
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from netcalc import table, subnet, calc, Ip
+
+def keys(pairs):
+    return [(prefix.IP, prefix.mask) for prefix, value in pairs]
+
+def test_prefix_table_operations():
+    t = table.PrefixTable({'10.0.0.0/8': 'a', '10.1.0.0/16': 'b', '10.1.2.0/24': 'c', '2001:db8::/32': 'v6'})
+
+    assert len(t) == 4
+    assert t['10.1.0.0/16'] == 'b'
+    assert t.exact('10.1.0.0/17') is None
+    assert '10.1.2.3/24' in t
+    assert t.longest_match('10.1.2.3')[1] == 'c'
+    assert t.longest_match('10.2.0.1')[1] == 'a'
+    assert t.longest_match('11.0.0.1') is None
+    assert t.longest_match('2001:db8::1')[1] == 'v6'
+    assert keys(t.covering('10.1.2.0/25')) == [('10.0.0.0', 8), ('10.1.0.0', 16), ('10.1.2.0', 24)]
+    assert keys(t.covered('10.1.0.0/16')) == [('10.1.0.0', 16), ('10.1.2.0', 24)]
+
+    del t['10.1.0.0/16']
+    assert len(t) == 3
+    assert t.longest_match('10.1.9.9')[1] == 'a'
+
+    with pytest.raises(KeyError):
+        t.delete('10.1.0.0/16')
+
+def test_prefix_table_against_linear_scan():
+    rnd = random.Random(5)
+    t = table.PrefixTable()
+    reference = {}
+
+    for i in range(3000):
+        mask = rnd.randrange(0, 33)
+        net = rnd.getrandbits(32) & 0xff0f00f0 & calc.net_bits(mask, Ip.Ipv4)
+
+        if rnd.random() < 0.7:
+            t[subnet.Ipv4.from_int(net, mask)] = i
+            reference[(net, mask)] = i
+        elif (net, mask) in reference:
+            del t[subnet.Ipv4.from_int(net, mask)]
+            del reference[(net, mask)]
+
+    assert len(t) == len(reference)
+    assert [(int(prefix), prefix.mask, value) for prefix, value in t.items()] == \
+        sorted((net, mask, value) for (net, mask), value in reference.items())
+
+    for i in range(200):
+        address = rnd.getrandbits(32) & 0xff0f00ff
+        matches = [(mask, value) for (net, mask), value in reference.items()
+                   if address & calc.net_bits(mask, Ip.Ipv4) == net]
+        result = t.longest_match(Ip.Ipv4.from_int(address))
+
+        assert (result and (result[0].mask, result[1])) == (max(matches) if matches else None)